@@ -0,0 +1,189 @@
+import os
+import re
+import time
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+from llm import DEFAULT_MODEL
+
+# Shared answers to repeated questions.
+# A question is keyed by model, sampling settings, the loaded document's
+# cache key and the prompt, with the asker's words normalized (case,
+# punctuation, spacing), so a class asking "What is photosynthesis?" gets
+# one upstream call. Answers live in memory for ANSWER_TTL seconds, at most
+# ANSWER_ENTRIES of them, least recently used dropped first. Identical
+# questions arriving while the first is still being answered follow that
+# call: streamed tokens are fanned out to every follower as they arrive.
+# Failed or cut-off answers are not kept.
+
+ANSWER_TTL = float(os.getenv("LEARNOUTLOUD_ANSWER_TTL", str(6 * 3600)))
+ANSWER_ENTRIES = int(os.getenv("LEARNOUTLOUD_ANSWER_ENTRIES", "1024"))
+CHARS_PER_TOKEN = 4     # rough token estimate for the saved-quota counter
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize(text):
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+class _Flight:
+    # One upstream call and the deltas it has produced so far
+    def __init__(self):
+        self.deltas = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def push(self, delta):
+        self.deltas.append(delta)
+        self._wake()
+
+    def finish(self, error=None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self):
+        i = 0
+        while True:
+            while i < len(self.deltas):
+                yield self.deltas[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class AnswerCache:
+    def __init__(self, llm, ttl=ANSWER_TTL, max_entries=ANSWER_ENTRIES):
+        self.llm = llm
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0
+        self.tokens_saved = 0
+        self._entries = OrderedDict()   # key -> (answer, stored at, seconds the call took, tokens), oldest first
+        self._flights = {}              # key -> _Flight still being answered
+
+    def key(self, messages, context, model, temperature, max_tokens):
+        last = len(messages) - 1
+        prompt = [[m["role"], normalize(m["content"]) if i == last and m["role"] == "user" else m["content"]]
+                  for i, m in enumerate(messages)]
+        raw = json.dumps([model, temperature, max_tokens, context, prompt], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > self.ttl:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.seconds_saved += entry[2]
+        self.tokens_saved += entry[3]
+        return entry[0]
+
+    def _tokens(self, messages, answer):
+        return (sum(len(m["content"]) for m in messages) + len(answer)) // CHARS_PER_TOKEN
+
+    def _put(self, key, messages, answer, seconds):
+        if not answer:
+            return
+        self._entries[key] = (answer, time.monotonic(), seconds, self._tokens(messages, answer))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def stream(self, messages, context="", model=DEFAULT_MODEL, temperature=0.7, max_tokens=400):
+        # Content deltas, like LLMClient.stream; a cached answer comes as one delta
+        key = self.key(messages, context, model, temperature, max_tokens)
+        answer = self._get(key)
+        if answer is not None:
+            yield answer
+            return
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            async for delta in flight.follow():
+                yield delta
+            self.tokens_saved += self._tokens(messages, "".join(flight.deltas))
+            return
+
+        self.misses += 1
+        flight = self._flights[key] = _Flight()
+        start = time.perf_counter()
+        try:
+            async for delta in self.llm.stream(messages, model=model, temperature=temperature, max_tokens=max_tokens):
+                flight.push(delta)
+                yield delta
+        except BaseException as e:
+            # Includes the asker hanging up; followers get the error and fall back
+            flight.finish(e if isinstance(e, Exception) else ConnectionError("answer abandoned"))
+            raise
+        finally:
+            self._flights.pop(key, None)
+        flight.finish()
+        self._put(key, messages, "".join(flight.deltas).strip(), time.perf_counter() - start)
+
+    async def complete(self, messages, context="", model=DEFAULT_MODEL, temperature=0.7, max_tokens=400):
+        key = self.key(messages, context, model, temperature, max_tokens)
+        answer = self._get(key)
+        if answer is not None:
+            return answer
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            answer = "".join([delta async for delta in flight.follow()]).strip()
+            self.tokens_saved += self._tokens(messages, answer)
+            return answer
+
+        self.misses += 1
+        flight = self._flights[key] = _Flight()
+        start = time.perf_counter()
+        try:
+            answer = await self.llm.complete(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+        except BaseException as e:
+            flight.finish(e if isinstance(e, Exception) else ConnectionError("answer abandoned"))
+            raise
+        finally:
+            self._flights.pop(key, None)
+        flight.push(answer)
+        flight.finish()
+        self._put(key, messages, answer, time.perf_counter() - start)
+        return answer
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "in_flight": len(self._flights),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "est_tokens_saved": self.tokens_saved
+        }
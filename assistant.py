@@ -3,10 +3,14 @@ import os
 import sys
 import winreg
 import time
+import urllib.request
+import urllib.error
 
 # -------- SETTINGS ----------
 FRONTEND_PORT = "5500"
 BACKEND_PORT = "8000"
+BACKEND_READY_URL = f"http://127.0.0.1:{BACKEND_PORT}/ready"
+BACKEND_READY_TIMEOUT = 60     # seconds
 
 PROJECT_DIR = r"D:\voice-assistant\voice-assistant"
 
@@ -33,21 +37,59 @@ def speak(text):
 
 
 # -------- START BACKEND SERVER --------
+def backend_ready():
+    try:
+        with urllib.request.urlopen(BACKEND_READY_URL, timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        # Not listening yet, or 503 while starting up
+        return False
+
+
+def wait_for_backend(process=None, timeout=BACKEND_READY_TIMEOUT):
+    # Poll /ready, 50 ms apart at first and backing off to 1 s
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+
+    while not backend_ready():
+
+        if process is not None and process.poll() is not None:
+            return False
+
+        if time.monotonic() + delay > deadline:
+            return False
+
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+    return True
+
+
 def start_backend():
+    if backend_ready():
+        print("Backend already running on port", BACKEND_PORT)
+        return True
+
     try:
-        subprocess.Popen(
-            ["python", "backend.py"],
+        process = subprocess.Popen(
+            ["python", "server.py"],
             cwd=PROJECT_DIR,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
 
-        time.sleep(3)
-
-        print("Backend started on port", BACKEND_PORT)
-
     except Exception as e:
         print("Backend start error:", e)
+        return False
+
+    start = time.monotonic()
+
+    if not wait_for_backend(process):
+        print("Backend did not become ready on port", BACKEND_PORT)
+        return False
+
+    print(f"Backend ready on port {BACKEND_PORT} after {time.monotonic() - start:.1f}s")
+    return True
 
 
 # -------- VOICE RECOGNITION --------
@@ -104,7 +146,8 @@ def listen():
 # -------- OPEN WEBSITE --------
 def open_website():
 
-    start_backend()
+    if not start_backend():
+        speak("The reading server is not ready yet. Documents may not load.")
 
     os.startfile(WEBSITE_URL)
 
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeLLM
+
+# Classroom load on general questions, with and without the answer cache.
+# A class of students asks a handful of questions in waves; each wave asks
+# them all at once (the first wave is coalesced, later ones are cache hits),
+# phrased with different case and punctuation, half on /talk and half on
+# /talk/stream. Reports upstream calls and per-question latency.
+#   python benchmarks/bench_answer_cache.py --students 30 --waves 3 --latency 1
+
+QUESTIONS = [
+    "what is photosynthesis",
+    "explain linear regression",
+    "who wrote hamlet",
+    "what causes the seasons",
+    "how does a vaccine work",
+]
+
+
+def phrasings(question):
+    return [question, question.capitalize() + "?", question.upper(), f"  {question} ...", question + "!"]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(args, fake, cached):
+    import httpx
+    import server
+
+    server.ANSWER_CACHE = cached
+    server.answers._entries.clear()
+    before = fake.requests
+    rng = random.Random(3)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def ask(student):
+            text = rng.choice(phrasings(rng.choice(QUESTIONS)))
+            start = time.perf_counter()
+            if student % 2:
+                r = await client.post("/talk/stream", json={"text": text, "session": f"s{student}"})
+            else:
+                r = await client.post("/talk", json={"text": text, "session": f"s{student}"})
+            r.raise_for_status()
+            return time.perf_counter() - start
+
+        times = []
+        started = time.perf_counter()
+        for _ in range(args.waves):
+            times += await asyncio.gather(*(ask(s) for s in range(args.students)))
+        wall = time.perf_counter() - started
+
+    return {"calls": fake.requests - before, "p50": percentile(times, 50), "p95": percentile(times, 95),
+            "wall": wall, "stats": server.answers.stats()}
+
+
+async def main_async(args, fake):
+    results = {}
+    for cached in (False, True):
+        results[cached] = await run(args, fake, cached)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--waves", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency)
+    os.environ["GROQ_BASE_URL"] = fake.start_in_thread()
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ["LEARNOUTLOUD_INGEST"] = "0"
+    results = asyncio.run(main_async(args, fake))
+
+    print(f"{args.students} students x {args.waves} waves, {len(QUESTIONS)} questions, {args.latency}s LLM latency")
+    print(f"{'cache':>6} {'upstream calls':>15} {'p50 s':>7} {'p95 s':>7} {'wall s':>7}")
+    for cached, r in results.items():
+        print(f"{'on' if cached else 'off':>6} {r['calls']:>15} {r['p50']:>7.2f} {r['p95']:>7.2f} {r['wall']:>7.2f}")
+    print("Answer cache:", results[True]["stats"])
+
+
+if __name__ == "__main__":
+    main()
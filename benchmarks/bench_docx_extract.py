@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_docx, scratch_dir, peak_rss_mb
+
+# python-docx vs streaming DOCX extraction on generated books.
+# Each run is a fresh process so peak RSS belongs to one extractor. The
+# legacy path is extract_docx before docx_stream: the python-docx object
+# model, doc.paragraphs only (tables dropped), text built with +=.
+#   python benchmarks/bench_docx_extract.py --pages 100 500 2000
+
+
+def legacy_extract(path):
+    from docx import Document
+    text = ""
+    doc = Document(path)
+    for para in doc.paragraphs:
+        if para.text.strip():
+            if para.style.name.lower().startswith('heading'):
+                text += f"[HEADING] {para.text}\n"
+            else:
+                text += para.text + "\n"
+    return text.strip()
+
+
+def run(mode, path):
+    if mode == "stream":
+        from docx_stream import extract_docx_text as extract
+    else:
+        import docx   # imported before the baseline, like the stream module
+        extract = legacy_extract
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    text = extract(path)
+    elapsed = time.perf_counter() - start
+    lines = text.splitlines()
+    return {"mode": mode, "seconds": round(elapsed, 3), "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+            "chars": len(text), "rows": sum(" | " in line for line in lines),
+            "prose": "\n".join(line for line in lines if " | " not in line)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(*args.child)))
+        return
+
+    folder = scratch_dir("docx")
+    print(f"{'pages':>6} {'MB':>5} {'python-docx s':>14} {'stream s':>9} {'speedup':>8} "
+          f"{'python-docx RSS':>16} {'stream RSS':>11} {'table rows':>11}")
+    for pages in args.pages:
+        path = os.path.join(folder, f"book_{pages}.docx")
+        if not os.path.exists(path):
+            write_docx(path, pages)
+        results = {}
+        for mode in ("python-docx", "stream"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                 capture_output=True, text=True, cwd=ROOT)
+            if out.returncode != 0:
+                sys.exit(f"{mode} failed: {out.stderr.strip()}")
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        legacy, stream = results["python-docx"], results["stream"]
+        assert legacy["prose"] == stream["prose"], "paragraph text differs from python-docx"
+        print(f"{pages:>6} {os.path.getsize(path) / 2 ** 20:>5.1f} {legacy['seconds']:>14.2f} {stream['seconds']:>9.2f} "
+              f"{legacy['seconds'] / stream['seconds']:>7.1f}x {legacy['peak_rss_mb']:>13.1f} MB "
+              f"{stream['peak_rss_mb']:>8.1f} MB {stream['rows']:>11}")
+
+
+if __name__ == "__main__":
+    main()
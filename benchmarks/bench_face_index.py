@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_index import FaceIndex, SIMILARITY_THRESHOLD
+from synthetic import peak_rss_mb
+
+# Face login lookup at 10k-1M enrolled users: FaceIndex vs the server.js loop.
+# Users come from an in-memory stand-in for the MongoDB collection (same
+# find/batch_size/estimated_document_count calls face_service makes, each
+# document a plain list of 128 floats as pymongo returns it). Descriptors
+# look like face-api.js ones (norm ~1, different people ~1.4 apart); half
+# of the login attempts are enrolled faces plus camera noise, half are new
+# people. The server.js baseline is its calculateDistance loop over every
+# user, without the database fetch, up to --scalar-max users. Each size
+# runs in a fresh process so peak RSS belongs to it.
+#   python benchmarks/bench_face_index.py --users 10000 100000 1000000
+
+
+class FixtureCollection:
+    # The slice of pymongo's Collection API that face_service.load_faces uses
+    def __init__(self, descriptors):
+        self.descriptors = descriptors
+
+    def estimated_document_count(self):
+        return len(self.descriptors)
+
+    def find(self, query=None, projection=None):
+        return self
+
+    def batch_size(self, size):
+        return (
+            {"name": f"user{i}", "faceDescriptor": row}
+            for start in range(0, len(self.descriptors), size)
+            for i, row in enumerate(self.descriptors[start:start + size].tolist(), start)
+        )
+
+
+def people(count, seed):
+    descriptors = np.random.default_rng(seed).standard_normal((count, 128), dtype=np.float32)
+    descriptors *= 0.09
+    return descriptors
+
+
+def attempts(descriptors, count, seed):
+    rng = np.random.default_rng(seed)
+    known = descriptors[rng.integers(0, len(descriptors), count // 2)]
+    known = known + (rng.standard_normal(known.shape) * 0.02).astype(np.float32)
+    return [q.tolist() for q in np.concatenate([known, people(count - len(known), seed + 1)])]
+
+
+def calculate_distance(desc1, desc2):
+    # server.js calculateDistance
+    total = 0.0
+    for i in range(len(desc1)):
+        diff = desc1[i] - desc2[i]
+        total += diff * diff
+    return math.sqrt(total)
+
+
+def scalar_check(users, descriptor):
+    best, best_distance = None, math.inf
+    for name, stored in users:
+        distance = calculate_distance(descriptor, stored)
+        if distance < best_distance:
+            best, best_distance = name, distance
+    return best if best_distance < SIMILARITY_THRESHOLD else None
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(count, args):
+    from face_service import load_faces
+    import face_service
+
+    descriptors = people(count, seed=count)
+    queries = attempts(descriptors, args.queries, seed=1)
+
+    baseline = peak_rss_mb()
+    face_service.faces = index = FaceIndex()
+    start = time.perf_counter()
+    load_faces(FixtureCollection(descriptors))
+    loaded = time.perf_counter() - start
+    rss = peak_rss_mb() - baseline
+    matrix_mb = index.memory_size() / 2 ** 20
+
+    times, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        found.append(index.match(q)[0])
+        times.append(time.perf_counter() - start)
+
+    # Exact float64 answers for the same attempts
+    exact = descriptors.astype(np.float64)
+    for q, name in zip(queries[:20], found):
+        d = np.sqrt(((exact - np.asarray(q)) ** 2).sum(axis=1))
+        expected = f"user{int(d.argmin())}" if d.min() < SIMILARITY_THRESHOLD else None
+        assert name == expected, f"index answered {name}, expected {expected}"
+
+    start = time.perf_counter()
+    for i in range(args.updates):
+        index.add(f"new{i}", queries[i % len(queries)])
+    for i in range(args.updates):
+        index.remove(f"new{i}")
+    update_us = (time.perf_counter() - start) / (2 * args.updates) * 1e6
+
+    scalar = None
+    if count <= args.scalar_max:
+        users = [(f"user{i}", row) for i, row in enumerate(descriptors.tolist())]
+        start = time.perf_counter()
+        for q in queries[:args.scalar_queries]:
+            scalar_check(users, q)
+        scalar = (time.perf_counter() - start) / args.scalar_queries
+        del users
+
+    return {"users": count, "load_s": loaded, "p50_ms": percentile(times, 50) * 1000,
+            "p95_ms": percentile(times, 95) * 1000, "update_us": update_us,
+            "matrix_mb": matrix_mb, "rss_mb": rss,
+            "matched": sum(1 for name in found if name), "scalar_ms": scalar * 1000 if scalar else None}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=1000, help="registers, then deletes, after loading")
+    parser.add_argument("--scalar-max", type=int, default=100000)
+    parser.add_argument("--scalar-queries", type=int, default=3)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.child, args)))
+        return
+
+    print(f"{'users':>8} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'add/del us':>11} {'matrix MB':>10} "
+          f"{'load RSS MB':>12} {'matched':>8} {'server.js loop ms':>18}")
+    for count in args.users:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(count),
+                              "--queries", str(args.queries), "--updates", str(args.updates),
+                              "--scalar-max", str(args.scalar_max), "--scalar-queries", str(args.scalar_queries)],
+                             capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            sys.exit(f"{count} users failed: {out.stderr.strip()}")
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        scalar = f"{r['scalar_ms']:>18.0f}" if r["scalar_ms"] is not None else f"{'-':>18}"
+        print(f"{r['users']:>8} {r['load_s']:>7.2f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['update_us']:>11.1f} "
+              f"{r['matrix_mb']:>10.1f} {r['rss_mb']:>12.1f} {r['matched']:>4}/{args.queries:<3} {scalar}")
+
+
+if __name__ == "__main__":
+    main()
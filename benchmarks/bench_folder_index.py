@@ -0,0 +1,132 @@
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folder_index import FolderIndex
+from synthetic import scratch_dir
+
+# File-name lookup latency and accuracy as the documents folder grows.
+# The legacy path is find_matching_file before the folder index: list the
+# folder and re-normalize every name per request, return the first
+# substring hit. Spoken names are the file names with recognizer-style
+# noise (a dropped or swapped letter, words run together, filler words).
+# A small hand-made folder then checks filler words whose trigrams are rare
+# there ("please", "now") against names they must not beat.
+#   python benchmarks/bench_folder_index.py --sizes 100 1000 10000
+
+SUBJECTS = ["biology", "chemistry", "physics", "history", "geography", "algebra", "calculus",
+            "literature", "economics", "civics", "botany", "zoology", "statistics", "grammar"]
+KINDS = ["notes", "book", "chapter", "homework", "revision", "syllabus", "worksheet", "lecture"]
+EXTENSIONS = [".pdf", ".docx", ".txt"]
+
+
+def legacy_find(folder, spoken):
+    if not os.path.exists(folder):
+        return None
+    spoken_clean = re.sub(r'[^a-z0-9]', '', spoken.lower())
+    candidates = []
+    for filename in os.listdir(folder):
+        if not filename.lower().endswith(('.pdf', '.docx', '.txt')):
+            continue
+        name_clean = re.sub(r'[^a-z0-9]', '', os.path.splitext(filename)[0].lower())
+        if spoken_clean in name_clean or name_clean in spoken_clean:
+            candidates.append(filename)
+    return candidates[0] if candidates else None
+
+
+def make_folder(n, seed=1):
+    rng = random.Random(seed)
+    folder = scratch_dir(f"folder_{n}")
+    shutil.rmtree(folder)
+    os.makedirs(folder)
+    names = set()
+    while len(names) < n:
+        names.add(f"{rng.choice(SUBJECTS)} {rng.choice(KINDS)} {rng.randint(1, max(1, n // 10))}")
+    files = []
+    for name in sorted(names):
+        filename = name + rng.choice(EXTENSIONS)
+        open(os.path.join(folder, filename), "w").close()
+        files.append(filename)
+    return folder, files
+
+
+def misheard(rng, name):
+    words = name.split()
+    noise = rng.randrange(4)
+    if noise == 0:
+        # drop a letter from the longest word
+        w = max(range(len(words)), key=lambda i: len(words[i]))
+        k = rng.randrange(len(words[w]))
+        words[w] = words[w][:k] + words[w][k + 1:]
+    elif noise == 1:
+        # a vowel heard as another vowel
+        w = rng.randrange(len(words))
+        words[w] = re.sub(r'[aeiou]', lambda m: rng.choice("aeiou"), words[w], count=1)
+    elif noise == 2:
+        words = ["".join(words)]
+    return rng.choice(["open ", "load ", "read ", ""]) + " ".join(words)
+
+
+# (file names, [(utterance, expected file), ...])
+FILLER_FOLDER = ["biology notes.pdf", "biology lab.pdf", "biology exam.pdf", "biology notes 2.pdf",
+                 "please help.txt", "open house.txt", "pen pals.txt", "apple pie.txt", "nowhere man.txt",
+                 "read me.txt"]
+FILLER_QUERIES = [("open biology notes please", "biology notes.pdf"),
+                  ("read biology lab now please", "biology lab.pdf"),
+                  ("please open the biology exam", "biology exam.pdf"),
+                  ("open apple pie", "apple pie.txt")]
+
+
+def filler_case():
+    folder = scratch_dir("folder_filler")
+    shutil.rmtree(folder)
+    os.makedirs(folder)
+    for filename in FILLER_FOLDER:
+        open(os.path.join(folder, filename), "w").close()
+    index = FolderIndex(folder, recheck=0)
+    legacy_ok = sum(legacy_find(folder, q) == t for q, t in FILLER_QUERIES)
+    index_ok = sum(index.best(q) == t for q, t in FILLER_QUERIES)
+    print(f"{'filler':>7} {'':>10} {'':>9} {'':>9} {legacy_ok:>10} {index_ok:>9}   of {len(FILLER_QUERIES)}")
+
+
+def timed_lookups(find, queries):
+    start = time.perf_counter()
+    found = [find(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries), found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'files':>7} {'legacy us':>10} {'index us':>9} {'build ms':>9} {'legacy ok':>10} {'index ok':>9}")
+    for n in args.sizes:
+        folder, files = make_folder(n)
+        rng = random.Random(n)
+        targets = [rng.choice(files) for _ in range(args.queries)]
+        queries = [misheard(rng, os.path.splitext(t)[0]) for t in targets]
+
+        index = FolderIndex(folder, recheck=0)
+        start = time.perf_counter()
+        index.refresh(force=True)
+        build = time.perf_counter() - start
+
+        legacy, legacy_found = timed_lookups(lambda q: legacy_find(folder, q), queries)
+        indexed, index_found = timed_lookups(index.best, queries)
+        legacy_ok = sum(f == t for f, t in zip(legacy_found, targets))
+        index_ok = sum(f == t for f, t in zip(index_found, targets))
+        print(f"{n:>7} {legacy * 1e6:>10.0f} {indexed * 1e6:>9.0f} {build * 1000:>9.1f} "
+              f"{legacy_ok:>10} {index_ok:>9}   of {len(queries)}")
+    filler_case()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import IntentRouter, COMMAND_ROUTES, LOAD_PRIORITY
+
+# Routing accuracy and throughput over a labeled utterance corpus.
+# The legacy router is the substring if/elif chain /talk used before the
+# compiled router (speed regexes first, then keyword lists in order). Both
+# routers see the same document folder, matched the way find_matching_file
+# does, so "file" labels measure how often a name in the utterance wins.
+#   python benchmarks/bench_intent_routing.py --repeat 2000
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utterances.tsv")
+FILES = ["biology book", "notes", "history notes"]
+COMMANDS = {"list", "read", "continue", "pause", "resume", "stop", "summary", "extract",
+            "speed_reset", "speed_set", "speed_up", "speed_down"}
+
+
+def load_corpus(path=CORPUS):
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                label, utterance = line.rstrip("\n").split("\t", 1)
+                corpus.append((label, utterance))
+    return corpus
+
+
+def match_file(spoken):
+    spoken_clean = re.sub(r'[^a-z0-9]', '', spoken.lower())
+    for name in FILES:
+        name_clean = re.sub(r'[^a-z0-9]', '', name)
+        if spoken_clean in name_clean or name_clean in spoken_clean:
+            return name
+    return None
+
+
+def legacy_speed(cmd):
+    if any(w in cmd for w in ["normal speed", "default speed", "speed 1", "1x"]):
+        return "speed_reset"
+    m = re.search(r'(?:set speed to|speed|set to)\s*(\d*\.?\d*)\s*(x|times)?', cmd)
+    if m:
+        try:
+            float(m.group(1))
+            return "speed_set"
+        except ValueError:
+            pass
+    if any(w in cmd for w in ["increase speed", "faster", "speed up", "go faster"]):
+        return "speed_up"
+    if any(w in cmd for w in ["decrease speed", "slower", "slow down", "go slower"]):
+        return "speed_down"
+    return None
+
+
+def legacy_route(spoken):
+    cmd = spoken.lower()
+    speed = legacy_speed(cmd)
+    if speed:
+        return speed
+    if any(x in cmd for x in ["list", "files", "documents", "show"]):
+        return "list"
+    if match_file(spoken) and (any(x in cmd for x in ["load", "open", "read", "start"]) or len(spoken.split()) <= 4):
+        return "file"
+    if "extract" in cmd:
+        return "extract"
+    if any(x in cmd for x in ["read", "start", "begin"]):
+        return "read"
+    if any(x in cmd for x in ["continue", "more", "next"]):
+        return "continue"
+    if "pause" in cmd:
+        return "pause"
+    if "resume" in cmd:
+        return "resume"
+    if any(x in cmd for x in ["stop", "end", "close"]):
+        return "stop"
+    if any(x in cmd for x in ["summary", "summarize"]):
+        return "summary"
+    return "general"
+
+
+def compiled_route(router, spoken):
+    # Mirrors server.respond: route once, then let a file name win below LOAD_PRIORITY
+    intent = router.route(spoken.lower())
+    if intent is None or intent.priority <= LOAD_PRIORITY:
+        if match_file(spoken) and ((intent and intent.name in ("load", "read")) or len(spoken.split()) <= 4):
+            return "file"
+    if intent is None:
+        return "general"
+    if intent.name == "speed_set" and float(intent.slots["rate"]) == 1.0:
+        return "speed_reset"
+    return intent.name
+
+
+def score(route, corpus):
+    wrong = []
+    fell_through = 0
+    for label, utterance in corpus:
+        got = route(utterance)
+        if got != label:
+            wrong.append((utterance, label, got))
+            if got == "general":
+                fell_through += 1
+    return wrong, fell_through
+
+
+def throughput(route, corpus, repeat):
+    utterances = [u for _, u in corpus] * repeat
+    start = time.perf_counter()
+    for u in utterances:
+        route(u)
+    return len(utterances) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--show", action="store_true", help="list every misrouted utterance")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    router = IntentRouter(COMMAND_ROUTES)
+    routers = {
+        "legacy": legacy_route,
+        "compiled": lambda u: compiled_route(router, u),
+    }
+
+    commands = sum(1 for label, _ in corpus if label != "general")
+    print(f"{len(corpus)} utterances, {commands} commands")
+    print(f"{'router':<10} {'utt/s':>10} {'misrouted':>10} {'to LLM':>8}")
+    for name, route in routers.items():
+        wrong, fell_through = score(route, corpus)
+        rate = throughput(route, corpus, args.repeat)
+        print(f"{name:<10} {rate:>10.0f} {len(wrong):>10} {fell_through:>8}")
+        if args.show:
+            for utterance, label, got in wrong:
+                print(f"    {utterance!r}: expected {label}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
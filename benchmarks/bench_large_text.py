@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import book_text, scratch_dir, peak_rss_mb
+
+# Peak memory of opening and reading a huge .txt, in-memory vs mapped.
+# Each run is a fresh process: open the file, read 50 chunks, seek to 50%
+# and 90%, extract a page range and the first and last paragraphs, then
+# report peak RSS above the interpreter's own. The in-memory path is the
+# regular one (extract_txt + LoadedDocument); the mapped one is large_text.
+#   python benchmarks/bench_large_text.py --sizes 16 64 256
+
+
+def write_big_txt(path, mb):
+    if os.path.exists(path) and os.path.getsize(path) >= mb * 1024 * 1024:
+        return path
+    block = book_text(200, seed=7).encode("utf-8") + b"\n\n"
+    with open(path, "wb") as f:
+        written = 0
+        while written < mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+    return path
+
+
+def run(mode, path):
+    from reader import ReadingCursor, chunk_table
+    if mode == "memory":
+        from extractors import extract_txt
+        from document_model import LoadedDocument
+    else:
+        from large_text import LargeTextDocument
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "memory":
+        document = LoadedDocument(extract_txt(path), "big", "TXT")
+    else:
+        document = LargeTextDocument(path, "big", "TXT")
+    opened = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cursor = ReadingCursor()
+    table = chunk_table(document, 1.0)
+    position = 0
+    for _ in range(50):
+        span = cursor.next_span(table, position)
+        text = cursor.take_prefetched(span) or document.text[span[0]:span[1]].strip()
+        cursor.spoke(table, span, document.text)
+        position = span[1]
+    for percent in (50, 90):
+        position = cursor.percent_position(table, percent, document.length)
+        document.text[position:table.span(table.locate(position))[1]]
+    document.approx_pages(10, 12)
+    document.first_paragraphs(3)
+    document.last_paragraphs(3)
+    reads = time.perf_counter() - start
+
+    return {"mode": mode, "open_s": round(opened, 3), "ops_ms": round(reads * 1000, 2),
+            "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+            "index_mb": round(document.memory_size() / 2 ** 20, 2) if mode == "mapped" else None}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256], help="file sizes in MB")
+    parser.add_argument("--modes", nargs="+", default=["memory", "mapped"])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(*args.child)))
+        return
+
+    folder = scratch_dir("large_text")
+    print(f"{'MB':>5} {'mode':>7} {'open s':>7} {'ops ms':>7} {'peak RSS MB':>12} {'index MB':>9}")
+    for mb in args.sizes:
+        path = write_big_txt(os.path.join(folder, f"big_{mb}.txt"), mb)
+        for mode in args.modes:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                 capture_output=True, text=True, cwd=ROOT)
+            if out.returncode != 0:
+                print(f"{mb:>5} {mode:>7}  failed: {out.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            index = f"{r['index_mb']:>9.2f}" if r["index_mb"] is not None else f"{'-':>9}"
+            print(f"{mb:>5} {mode:>7} {r['open_s']:>7.2f} {r['ops_ms']:>7.1f} {r['peak_rss_mb']:>12.1f} {index}")
+
+
+if __name__ == "__main__":
+    main()
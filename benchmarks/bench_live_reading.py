@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_txt, scratch_dir
+
+# Continuous reading of one book, chunk after chunk, two ways:
+#   http   a "continue" POST to /talk per chunk, sent when the chunk ends
+#   live   one /live WebSocket; the server pushes the next chunk ahead and
+#          the client only reports progress
+# Playback is simulated: each chunk "plays" for --play-ms (plus --rtt-ms
+# of network per round trip), and the gap is the time from the end of one
+# chunk to having the next one in hand. Requests (HTTP) and messages (sent
+# on the socket) are per hour of listening, with text spoken at --wpm.
+#   python benchmarks/bench_live_reading.py --chunks 200 --play-ms 20 --rtt-ms 30
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_http(client, args):
+    gaps, chars = [], 0
+    r = client.post("/talk", json={"text": "open live book", "session": "http"})
+    r = client.post("/talk", json={"text": "read", "session": "http"})
+    chars += len(r.json()["reply"])
+    for _ in range(args.chunks - 1):
+        time.sleep(args.play_ms / 1000)
+        ended = time.perf_counter()
+        time.sleep(args.rtt_ms / 1000)
+        r = client.post("/talk", json={"text": "continue", "session": "http"})
+        r.raise_for_status()
+        gaps.append(time.perf_counter() - ended)
+        chars += len(r.json()["reply"])
+    return {"gaps": gaps, "chars": chars, "requests": args.chunks + 1, "messages": 0}
+
+
+def run_live(client, args):
+    gaps, chars, queued, messages = [], 0, [], 2
+    with client.websocket_connect("/live?session=live") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "say", "text": "open live book", "epoch": 1})
+        while ws.receive_json()["type"] != "done":
+            pass
+        ws.send_json({"type": "say", "text": "read", "epoch": 2})
+        # The first chunk and LIVE_LOOKAHEAD after it
+        queued.append(ws.receive_json())
+        queued.append(ws.receive_json())
+        outstanding = 0
+        for _ in range(args.chunks):
+            chunk = queued.pop(0)
+            assert chunk["type"] == "chunk", chunk
+            chars += len(chunk["text"])
+            started = time.perf_counter()
+            # Whatever the last progress brought arrives while this chunk plays
+            while outstanding:
+                queued.append(ws.receive_json())
+                outstanding -= 1
+            remaining = args.play_ms / 1000 - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+            ended = time.perf_counter()
+            ws.send_json({"type": "progress", "id": chunk["id"], "epoch": chunk["epoch"]})
+            messages += 1
+            outstanding += 1
+            if not queued:
+                # Lookahead ran dry: the gap is the full round trip
+                time.sleep(args.rtt_ms / 1000)
+                queued.append(ws.receive_json())
+                outstanding -= 1
+            gaps.append(time.perf_counter() - ended)
+        ws.send_json({"type": "stop", "epoch": 3})
+        messages += 1
+        gaps.pop()
+    # One HTTP request: the upgrade
+    return {"gaps": gaps, "chars": chars, "requests": 1, "messages": messages}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--play-ms", type=float, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--wpm", type=float, default=160)
+    args = parser.parse_args()
+
+    home = scratch_dir("live_home")
+    folder = os.path.join(home, "Documents")
+    os.makedirs(folder, exist_ok=True)
+    book = os.path.join(folder, "live book.txt")
+    if not os.path.exists(book):
+        write_txt(book, args.pages)
+    os.environ["HOME"] = home
+    os.environ["LEARNOUTLOUD_CACHE_DIR"] = scratch_dir("live_cache")
+    os.environ["LEARNOUTLOUD_INGEST"] = "0"
+    os.environ["LEARNOUTLOUD_SERVER_TTS"] = "0"
+    shutil.rmtree(os.environ["LEARNOUTLOUD_CACHE_DIR"])
+
+    from fastapi.testclient import TestClient
+    import server
+
+    client = TestClient(server.app)
+    print(f"{args.chunks} chunks, {args.play_ms:.0f} ms playback each, {args.rtt_ms:.0f} ms round trip, "
+          f"lookahead {server.LIVE_LOOKAHEAD}")
+    print(f"{'mode':>6} {'gap p50 ms':>11} {'gap p95 ms':>11} {'gap max ms':>11} {'requests/h':>11} "
+          f"{'messages/h':>11}")
+    for name, run in (("http", run_http), ("live", run_live)):
+        r = run(client, args)
+        # Hours of listening the run covered, at the speaking rate
+        hours = r["chars"] / 6 / args.wpm / 60
+        gaps = [g * 1000 for g in r["gaps"]]
+        print(f"{name:>6} {percentile(gaps, 50):>11.1f} {percentile(gaps, 95):>11.1f} {max(gaps):>11.1f} "
+              f"{r['requests'] / hours:>11.0f} {r['messages'] / hours:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeLLM
+
+# Load test: slow LLM questions in flight while cheap commands keep coming.
+# Cheap commands ("list documents", speed changes) should stay in the
+# millisecond range no matter how many completions are pending.
+#   python benchmarks/bench_llm_concurrency.py --llm-requests 40 --latency 2
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(args):
+    import httpx
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def ask(text, session):
+            start = time.perf_counter()
+            r = await client.post("/talk", json={"text": text, "session": session})
+            r.raise_for_status()
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        llm_tasks = [asyncio.create_task(ask("explain linear regression", f"llm-{i}"))
+                     for i in range(args.llm_requests)]
+
+        cheap = []
+        await asyncio.sleep(0.05)
+        for i in range(args.cheap_requests):
+            cheap.append(await ask("speed 1.5" if i % 2 else "list documents", f"cheap-{i % 10}"))
+            await asyncio.sleep(args.latency / args.cheap_requests)
+
+        llm = await asyncio.gather(*llm_tasks)
+        total = time.perf_counter() - started
+
+    print(f"LLM requests:   {len(llm)} at {args.latency}s latency, concurrency cap {server.llm.max_concurrency}")
+    print(f"  p50 {percentile(llm, 50):.2f}s  p95 {percentile(llm, 95):.2f}s  wall {total:.2f}s")
+    print(f"Cheap commands: {len(cheap)} while LLM calls were pending")
+    print(f"  p50 {percentile(cheap, 50) * 1000:.1f}ms  p95 {percentile(cheap, 95) * 1000:.1f}ms  max {max(cheap) * 1000:.1f}ms")
+    print("LLM stats:", server.llm.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-requests", type=int, default=40)
+    parser.add_argument("--cheap-requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency)
+    os.environ["GROQ_BASE_URL"] = fake.start_in_thread()
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    # Every request asks the same question; measure the LLM path, not the answer cache
+    os.environ["LEARNOUTLOUD_ANSWER_CACHE"] = "0"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import metrics, span, tag, Trace
+
+# Cost of the request instrumentation: a bare span, a span inside a
+# request trace, a whole traced request of STAGES spans, and rendering
+# /metrics once the histograms hold every stage and command.
+#   python benchmarks/bench_metrics.py --iterations 200000
+
+STAGES = ("routing", "file_match", "extraction", "smart_extract", "llm")
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def empty():
+    pass
+
+
+def bare_span():
+    with span("routing"):
+        pass
+
+
+def traced_span():
+    with Trace("talk"):
+        with span("routing"):
+            pass
+
+
+def traced_request():
+    with Trace("talk") as trace:
+        tag("read")
+        for stage in STAGES:
+            with span(stage):
+                pass
+    trace.finish("x" * 600)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    loop = per_call_us(empty, args.iterations)
+    print(f"{'case':<28} {'on us':>8} {'off us':>8}")
+    for name, fn in (("span", bare_span), ("span in trace", traced_span),
+                     (f"request, {len(STAGES)} spans", traced_request)):
+        metrics.enabled = True
+        on = per_call_us(fn, args.iterations) - loop
+        metrics.enabled = False
+        off = per_call_us(fn, args.iterations) - loop
+        print(f"{name:<28} {on:>8.2f} {off:>8.2f}")
+    metrics.enabled = True
+
+    for intent in ("read", "continue", "extract", "question", "summary", "open_file"):
+        with Trace("talk") as trace:
+            tag(intent)
+        trace.finish()
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics: {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"{len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
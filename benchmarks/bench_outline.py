@@ -0,0 +1,73 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outline import Outline
+
+# Regression benchmark for named-section lookup on adversarial text.
+# The legacy path is the lazy-scan regex plus line-by-line fallback that
+# smart_extract used before the outline indexer; it goes quadratic when
+# keywords repeat and no terminator follows them.
+#   python benchmarks/bench_outline.py --sizes 500 1000 2000
+
+LEGACY_SECTIONS = {
+    'abstract':     r'(?i)(abstract|अमूर्त|సారాంశం)',
+    'introduction': r'(?i)(introduction|intro|परिचय|పరిచయం)',
+    'conclusion':   r'(?i)(conclusion|conclusions|निष्कर्ष|సారాంశం)'
+}
+
+
+def legacy_section(text, name):
+    pat = LEGACY_SECTIONS[name]
+    m = re.search(pat + r'[\s\S]*?(?=\n\s*(?i:(abstract|introduction|conclusion|references|bibliography|appendix|\[Page|\d+\.\d+)))', text, re.DOTALL | re.I)
+    if m:
+        return m.group(0), True
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if re.search(pat, line):
+            return "\n".join(lines[i:i+35]), False
+    return None
+
+
+def outline_section(text, name):
+    return Outline(text).section(name)
+
+
+def adversarial_inputs(n):
+    return {
+        # Keyword repeated on one line, nothing to stop the lazy scan
+        "repeated keyword": "introduction " * n,
+        # Every line mentions the section, still no terminator line
+        "keyword per line": "\n".join(f"as the intro said, item {i} continues" for i in range(n)),
+        # Hindi/Telugu keywords with the terminator keyword only mid-line
+        "indic, no terminator": "\n".join(f"परिचय సారాంశం line {i} see references" for i in range(n)),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    args = parser.parse_args()
+
+    print(f"{'input':<22} {'n':>6} {'section':<13} {'legacy ms':>10} {'outline ms':>11}")
+    for n in args.sizes:
+        for label, text in adversarial_inputs(n).items():
+            for name in ("introduction", "abstract", "conclusion"):
+                legacy, a = timed(legacy_section, text, name)
+                indexed, b = timed(outline_section, text, name)
+                assert a == b, f"outline disagrees with legacy on {label!r}/{name}"
+                print(f"{label:<22} {n:>6} {name:<13} {legacy * 1000:>10.1f} {indexed * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
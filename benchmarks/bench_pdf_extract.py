@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_parallel
+from synthetic import write_pdf, scratch_dir
+
+# Serial vs page-parallel PDF extraction on generated books.
+#   python benchmarks/bench_pdf_extract.py --pages 200 400 800 --workers 4
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--workers", type=int, default=pdf_parallel.PDF_WORKERS)
+    args = parser.parse_args()
+
+    folder = scratch_dir("pdf")
+    print(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'speedup':>8}  (workers={args.workers})")
+    for pages in args.pages:
+        path = write_pdf(os.path.join(folder, f"book_{pages}.pdf"), pages)
+
+        # Warm the pool so process start-up is not billed to the first run
+        pdf_parallel.extract_pdf_pages(path, workers=args.workers)
+
+        serial, a = timed(pdf_parallel.extract_pdf_pages, path, workers=1)
+        parallel, b = timed(pdf_parallel.extract_pdf_pages, path, workers=args.workers)
+        assert a == b, "parallel output differs from serial"
+        print(f"{pages:>6} {serial:>10.2f} {parallel:>11.2f} {serial / parallel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
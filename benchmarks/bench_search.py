@@ -0,0 +1,105 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import SearchIndex
+from synthetic import book_text
+
+# "find" on thousand-page books: the positional index vs a regex scan of
+# the text per query. Two corpora:
+#   small   synthetic.book_text, ~30 distinct words (worst case: every
+#           posting list is huge)
+#   zipf    20k-word vocabulary with Zipf frequencies, a fifth of it
+#           Devanagari and Telugu words with vowel signs and viramas
+# Queries are taken from the text: a common word, a rare word, two- and
+# three-word phrases, and a word that is not there. Hit counts are checked
+# against the scan.
+#   python benchmarks/bench_search.py --pages 100 1000 --repeat 20
+
+SYLLABLES_LATIN = ["ka", "lo", "mi", "ne", "ra", "tu", "sen", "dor", "vi", "pha"]
+SYLLABLES_DEVANAGARI = ["क", "मा", "स्ते", "नि", "र्म", "ध्या", "प्र", "शि"]
+SYLLABLES_TELUGU = ["ప్ర", "పం", "చం", "శు", "భో", "ద", "యం", "క్ష"]
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        syllables = rng.choice([SYLLABLES_LATIN] * 8 + [SYLLABLES_DEVANAGARI, SYLLABLES_TELUGU])
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_text(pages, seed=1, words_per_page=450):
+    rng = random.Random(seed)
+    vocab = vocabulary(20000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    parts = []
+    for page in range(pages):
+        words = rng.choices(vocab, weights, k=words_per_page)
+        sentences = [" ".join(words[i:i + 15]).capitalize() + "." for i in range(0, len(words), 15)]
+        parts.append(f"[Page {page + 1}]\n" + " ".join(sentences))
+    return "\n\n".join(parts)
+
+
+def queries(text, index, rng):
+    # (label, query) picked from the indexed words
+    words = [w for w in index.postings if len(w) > 1]
+    common = max(words, key=lambda w: len(index.postings[w]))
+    rare = min(words, key=lambda w: len(index.postings[w]))
+    starts = index.starts
+    picks = []
+    for label, n in (("phrase 2", 2), ("phrase 3", 3)):
+        i = rng.randrange(len(starts) - n)
+        picks.append((label, text[starts[i]:index.ends[i + n - 1]]))
+    return [("common word", common), ("rare word", rare)] + picks + [("absent", "zzqxj")]
+
+
+def scan(text, query):
+    # Linear alternative: one regex pass over the text
+    words = re.findall(r'\w+', query)
+    pattern = r'(?<!\w)' + r'\W+(?:\[Page\s*\d+\]\W*)?'.join(map(re.escape, words)) + r'(?!\w)'
+    return sum(1 for _ in re.finditer(pattern, text, re.I))
+
+
+def median_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'corpus':>6} {'pages':>6} {'words':>8} {'build s':>8} {'index MB':>9} {'query':>12} "
+          f"{'hits':>6} {'index ms':>9} {'scan ms':>8}")
+    for corpus, make in (("small", book_text), ("zipf", zipf_text)):
+        for pages in args.pages:
+            text = make(pages)
+            index = SearchIndex()
+            start = time.perf_counter()
+            index.update(text)
+            build = time.perf_counter() - start
+            for label, query in queries(text, index, rng):
+                index_s, (hits, _) = median_of(lambda: index.find(query), args.repeat)
+                scan_s, count = median_of(lambda: scan(text, query), max(1, args.repeat // 5))
+                # Both match across punctuation and page markers between the words
+                assert len(hits) == count, f"{corpus} {pages} {query!r}: index {len(hits)}, scan {count}"
+                print(f"{corpus:>6} {pages:>6} {len(index):>8} {build:>8.2f} {index.memory_size() / 2 ** 20:>9.1f} "
+                      f"{label:>12} {len(hits):>6} {index_s * 1000:>9.2f} {scan_s * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import scratch_dir
+
+# Cold start of the server, each run in a fresh interpreter:
+#   import    time to `import server`
+#   ready     from launching uvicorn to the first 200 from /ready
+# and the slowest modules by -X importtime self time. Modules that are
+# meant to load on first use only (DEFERRED) must not be imported by
+# `import server`; the run fails if one is. bench_suite.py records the
+# same numbers so --compare flags regressions.
+#   python benchmarks/bench_startup.py --runs 5 --top 15
+
+DEFERRED = ("groq", "httpx", "PyPDF2", "docx", "numpy", "pyttsx3")
+
+IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import server
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "deferred": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED,)
+
+
+def startup_env():
+    env = dict(os.environ)
+    env.setdefault("LEARNOUTLOUD_CACHE_DIR", scratch_dir("startup_cache"))
+    env["LEARNOUTLOUD_INGEST"] = "0"
+    return env
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def summary_ms(values):
+    return {"n": len(values), "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "min_ms": round(min(values) * 1000, 1), "max_ms": round(max(values) * 1000, 1)}
+
+
+def import_once(env):
+    out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, cwd=ROOT, env=env)
+    if out.returncode != 0:
+        sys.exit(f"import server failed: {out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def ready_once(env, timeout=60):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ready"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port),
+                                "--log-level", "warning"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, OSError):
+                pass
+            if process.poll() is not None:
+                sys.exit(f"server exited: {process.stderr.read().decode(errors='replace').strip()}")
+            time.sleep(0.005)
+        sys.exit(f"server not ready after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def slowest_imports(env, top):
+    # [(module, self ms, cumulative ms)] by self time
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"],
+                         capture_output=True, text=True, cwd=ROOT, env=env)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+
+def measure_startup(runs=5, env=None):
+    env = env or startup_env()
+    imports = [import_once(env) for _ in range(runs)]
+    loaded = sorted({m for r in imports for m in r["deferred"]})
+    if loaded:
+        sys.exit(f"import server loaded deferred modules: {', '.join(loaded)}")
+    ready = [ready_once(env) for _ in range(runs)]
+    return {"import": summary_ms([r["seconds"] for r in imports]), "ready": summary_ms(ready)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    args = parser.parse_args()
+
+    env = startup_env()
+    results = measure_startup(args.runs, env)
+    print(f"{'':>8} {'p50 ms':>8} {'min ms':>8} {'max ms':>8}")
+    for name in ("import", "ready"):
+        r = results[name]
+        print(f"{name:>8} {r['p50_ms']:>8.1f} {r['min_ms']:>8.1f} {r['max_ms']:>8.1f}")
+
+    print(f"\nSlowest imports (self ms, cumulative ms):")
+    for name, self_ms, cumulative_ms in slowest_imports(env, args.top):
+        print(f"  {name:<40} {self_ms:>8.1f} {cumulative_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeLLM
+
+# Time to first audio: how long until the client has a sentence it can speak,
+# for the buffered /talk endpoint versus the streaming /talk/stream endpoint.
+#   python benchmarks/bench_stream_ttfa.py --latency 3 --first-token 0.3
+
+REPLY = ("Linear regression fits a straight line through data points. "
+         "It finds the slope and intercept that make the squared errors as small as possible. "
+         "You can then use the line to predict new values. "
+         "It works best when the relationship really is close to linear.")
+
+
+def start_server(port):
+    # A real HTTP server: the in-process ASGI transport buffers whole responses
+    import threading
+    import uvicorn
+    import server
+
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning")
+    backend = uvicorn.Server(config)
+    threading.Thread(target=backend.run, daemon=True).start()
+    while not backend.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run(args, base_url):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        buffered, streamed, totals = [], [], []
+        for i in range(args.rounds):
+            start = time.perf_counter()
+            r = await client.post("/talk", json={"text": "explain linear regression", "session": "bench"})
+            r.raise_for_status()
+            buffered.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            first = None
+            async with client.stream("POST", "/talk/stream", json={"text": "explain linear regression", "session": "bench"}) as r:
+                async for line in r.aiter_lines():
+                    if line and first is None and "text" in json.loads(line):
+                        first = time.perf_counter() - start
+            streamed.append(first)
+            totals.append(time.perf_counter() - start)
+
+    avg = lambda xs: sum(xs) / len(xs)
+    print(f"LLM latency {args.latency}s, first token after {args.first_token}s, {args.rounds} rounds")
+    print(f"/talk         first speakable text after {avg(buffered):.2f}s")
+    print(f"/talk/stream  first speakable text after {avg(streamed):.2f}s (whole reply {avg(totals):.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=3.0)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency, reply=REPLY, first_token=args.first_token)
+    os.environ["GROQ_BASE_URL"] = fake.start_in_thread()
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    # Every request asks the same question; measure the LLM path, not the answer cache
+    os.environ["LEARNOUTLOUD_ANSWER_CACHE"] = "0"
+    asyncio.run(run(args, start_server(args.port)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeLLM
+from synthetic import write_pdf, write_docx, write_txt, scratch_dir
+from bench_startup import measure_startup
+
+# End-to-end benchmark of the /talk pipeline, written as JSON so runs can
+# be compared over time. Synthetic PDF, DOCX and TXT books are generated
+# into a scratch home folder, Groq is replaced by the local fake LLM, and
+# the suite measures:
+#   read_document       cold (empty cache) and warm extraction per file
+#   smart_extract       every extract mode on every file
+#   find_matching_file  spoken names, exact and misheard, in a padded folder
+#   /talk               per-command latency percentiles under concurrent clients
+#   startup             `import server` and launch-to-/ready times (bench_startup.py)
+#   python benchmarks/bench_suite.py --pages 10 100 500 2000 --clients 1 8 32
+#   python benchmarks/bench_suite.py --quick --compare benchmarks/.data/results/<earlier>.json
+
+FORMATS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+EXTRACT_MODES = [
+    "extract page 5",
+    "extract pages 2 to 4",
+    "extract abstract",
+    "extract introduction",
+    "extract conclusion",
+    "extract chapter 2",
+    "extract first 4 paragraphs",
+    "extract last 3 paragraphs",
+]
+
+# (label, utterance) played by every client; {doc} is the spoken file name
+SCENARIO = [
+    ("list", "list documents"),
+    ("open", "open {doc}"),
+    ("read", "read"),
+    ("continue", "continue"),
+    ("continue", "continue"),
+    ("repeat", "repeat"),
+    ("extract_page", "extract page 2"),
+    ("extract_paragraphs", "extract first 2 paragraphs"),
+    ("speed", "speed 1.5"),
+    ("goto_page", "go to page 3"),
+    ("seek", "jump to 50 percent"),
+    ("question", "what is photosynthesis"),
+    ("stop", "stop"),
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def summary_ms(values):
+    return {
+        "n": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3)
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def repeat_timed(fn, *args, budget=0.2, most=200):
+    # Calls fn until `budget` seconds or `most` calls have passed; [seconds per call]
+    times = []
+    spent = 0.0
+    while len(times) < most and (spent < budget or len(times) < 3):
+        t, _ = timed(fn, *args)
+        times.append(t)
+        spent += t
+    return times
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_home(pages, formats, extra_files):
+    # ~/Documents with one book per (format, size) plus empty padding files
+    home = scratch_dir("suite_home")
+    folder = os.path.join(home, "Documents")
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    books = scratch_dir("suite_books")
+    files = []
+    for n in pages:
+        for fmt in formats:
+            filename = f"{fmt} book {n}.{fmt}"
+            source = os.path.join(books, filename)
+            if not os.path.exists(source):
+                FORMATS[fmt](source, n)
+            target = os.path.join(folder, filename)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy(source, target)
+            files.append(filename)
+    rng = random.Random(0)
+    for i in range(extra_files):
+        open(os.path.join(folder, f"{rng.choice(['notes', 'homework', 'revision'])} {i}.txt"), "w").close()
+    return home, files
+
+
+def bench_read_document(server, folder, files, repeat):
+    from doc_cache import DocumentCache
+    results = []
+    for filename in files:
+        path = os.path.join(folder, filename)
+        cold = []
+        for _ in range(repeat):
+            cache_dir = scratch_dir("suite_cache_cold")
+            shutil.rmtree(cache_dir)
+            server.document_cache = DocumentCache(folder=cache_dir)
+            t, text = timed(server.read_document, path)
+            cold.append(t)
+        warm = repeat_timed(server.read_document, path, most=max(3, repeat))
+        results.append({
+            "file": filename,
+            "bytes": os.path.getsize(path),
+            "chars": len(text),
+            "cold_ms": round(min(cold) * 1000, 3),
+            "warm_ms": round(percentile(warm, 50) * 1000, 3)
+        })
+        print(f"  read_document {filename:<22} cold {min(cold) * 1000:>9.1f} ms   warm {percentile(warm, 50) * 1000:>8.2f} ms")
+    return results
+
+
+def bench_smart_extract(server, files):
+    results = []
+    for filename in files:
+        session = server.sessions.get(f"extract-{filename}")
+        asyncio.run(server.load_document(session, filename))
+        asyncio.run(server.wait_for_text(session.document, whole=True))
+        for mode in EXTRACT_MODES:
+            # The first call may build the outline; later ones show the steady state
+            first, _ = timed(server.smart_extract, session, mode)
+            steady = repeat_timed(server.smart_extract, session, mode)
+            results.append({"file": filename, "mode": mode, "first_ms": round(first * 1000, 3),
+                            **summary_ms(steady)})
+        slowest = max((r for r in results if r["file"] == filename), key=lambda r: r["p50_ms"])
+        print(f"  smart_extract {filename:<22} slowest '{slowest['mode']}' {slowest['p50_ms']:.2f} ms")
+    return results
+
+
+def bench_find_matching_file(server, files):
+    rng = random.Random(1)
+    spoken = []
+    for filename in files:
+        name = os.path.splitext(filename)[0]
+        spoken.append(("exact", f"open {name}", filename))
+        # A recognizer-style slip: words run together, one letter (not digit) dropped
+        run_together = name.replace(" ", "")
+        k = rng.choice([i for i, ch in enumerate(run_together) if ch.isalpha()])
+        spoken.append(("misheard", f"open {run_together[:k] + run_together[k + 1:]}", filename))
+
+    results = {}
+    for kind in ("exact", "misheard"):
+        queries = [(q, f) for k, q, f in spoken if k == kind]
+        times, correct = [], 0
+        for _ in range(20):
+            for query, expected in queries:
+                t, found = timed(server.find_matching_file, query)
+                times.append(t)
+                correct += found == expected
+        results[kind] = {**summary_ms(times), "accuracy": round(correct / len(times), 3)}
+        print(f"  find_matching_file {kind:<9} p50 {results[kind]['p50_ms']:.3f} ms  "
+              f"accuracy {results[kind]['accuracy']:.0%}")
+    return results
+
+
+async def bench_talk(server, files, clients, rounds):
+    import httpx
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+
+        async def play(i):
+            doc = os.path.splitext(files[i % len(files)])[0]
+            session = f"talk-{clients}-{i}"
+            samples = []
+            for _ in range(rounds):
+                for label, text in SCENARIO:
+                    start = time.perf_counter()
+                    r = await client.post("/talk", json={"text": text.format(doc=doc), "session": session})
+                    r.raise_for_status()
+                    samples.append((label, time.perf_counter() - start))
+            return samples
+
+        start = time.perf_counter()
+        played = await asyncio.gather(*(play(i) for i in range(clients)))
+        wall = time.perf_counter() - start
+
+    samples = [s for client_samples in played for s in client_samples]
+    by_label = {}
+    for label, t in samples:
+        by_label.setdefault(label, []).append(t)
+    return {
+        "clients": clients,
+        "requests": len(samples),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 2),
+        "all": summary_ms([t for _, t in samples]),
+        "commands": {label: summary_ms(times) for label, times in by_label.items()}
+    }
+
+
+async def bench_talk_levels(server, files, levels, rounds):
+    # One event loop for every level: the server's LLM client keeps pooled connections
+    runs = []
+    for clients in levels:
+        run = await bench_talk(server, files, clients, rounds)
+        runs.append(run)
+        local = max(s["p99_ms"] for label, s in run["commands"].items() if label != "question")
+        print(f"  {clients:>3} clients  {run['requests']:>5} requests  {run['throughput_rps']:>7.1f} req/s  "
+              f"p50 {run['all']['p50_ms']:.1f} ms  p99 {run['all']['p99_ms']:.1f} ms  "
+              f"(p99 without the LLM {local:.1f} ms)")
+    return runs
+
+
+def flatten(results, prefix=""):
+    # {"a": {"b": 1}} -> {"a.b": 1}, lists keyed by their file/mode/clients fields
+    flat = {}
+    if isinstance(results, dict):
+        for k, v in results.items():
+            flat.update(flatten(v, f"{prefix}{k}."))
+    elif isinstance(results, list):
+        for item in results:
+            key = "/".join(str(item[k]) for k in ("file", "mode", "clients") if k in item)
+            flat.update(flatten(item, f"{prefix}{key}."))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix[:-1]] = results
+    return flat
+
+
+def compare(previous_path, results, threshold=0.10):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    keep = ("p50_ms", "p99_ms", "cold_ms", "warm_ms")
+    old = {k: v for k, v in flatten({k: previous[k] for k in previous if k != "meta"}).items() if k.endswith(keep)}
+    new = {k: v for k, v in flatten({k: results[k] for k in results if k != "meta"}).items() if k.endswith(keep)}
+    print(f"\nCompared with {previous_path} ({previous['meta'].get('commit')}): changes over {threshold:.0%}")
+    changed = 0
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        if a > 0 and abs(b - a) / a > threshold and abs(b - a) > 0.05:
+            changed += 1
+            print(f"  {key:<70} {a:>10.2f} -> {b:>10.2f} ms  ({(b - a) / a:+.0%})")
+    if not changed:
+        print("  none")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=2, help="scenario repetitions per client")
+    parser.add_argument("--repeat", type=int, default=3, help="cold read_document runs per file")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM seconds per reply")
+    parser.add_argument("--extra-files", type=int, default=500, help="empty files padding the folder")
+    parser.add_argument("--startup-runs", type=int, default=3, help="fresh-process server starts")
+    parser.add_argument("--out", help="result file (default benchmarks/.data/results/suite-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    parser.add_argument("--quick", action="store_true", help="small sizes, one round, for a smoke run")
+    args = parser.parse_args()
+    if args.quick:
+        args.pages, args.clients, args.rounds, args.repeat, args.extra_files = [10, 100], [1, 4], 1, 1, 100
+        args.startup_runs = 1
+
+    home, files = prepare_home(args.pages, args.formats, args.extra_files)
+    fake = FakeLLM(args.latency)
+
+    # The server reads these at import time
+    os.environ["HOME"] = home
+    os.environ["GROQ_BASE_URL"] = fake.start_in_thread()
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ["LEARNOUTLOUD_CACHE_DIR"] = scratch_dir("suite_cache")
+    os.environ["LEARNOUTLOUD_INGEST"] = "0"
+    os.environ["LEARNOUTLOUD_SERVER_TTS"] = "0"
+    shutil.rmtree(os.environ["LEARNOUTLOUD_CACHE_DIR"])
+    import server
+
+    results = {"meta": {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    }}
+
+    print("read_document")
+    results["read_document"] = bench_read_document(server, server.DOCUMENT_FOLDER, files, args.repeat)
+    print("smart_extract")
+    results["smart_extract"] = bench_smart_extract(server, files)
+    print("find_matching_file")
+    results["find_matching_file"] = bench_find_matching_file(server, files)
+
+    print("/talk")
+    results["talk"] = asyncio.run(bench_talk_levels(server, files, args.clients, args.rounds))
+
+    print("startup")
+    results["startup"] = measure_startup(args.startup_runs, dict(os.environ))
+    for name, r in results["startup"].items():
+        print(f"  {name:<7} p50 {r['p50_ms']:.0f} ms")
+
+    out = args.out or os.path.join(scratch_dir("results"), f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_llm import FakeLLM
+from synthetic import write_txt
+
+# End-to-end run of the summary pipeline against the local fake LLM:
+# "summarize", then "summarize chapter 3", then "summarize" again. The last
+# two should be answered from the summary cache with no LLM calls.
+#   python benchmarks/bench_summarize.py --pages 300 --latency 0.5
+
+
+async def run(args, fake, folder):
+    import httpx
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+
+        async def say(text):
+            before = fake.requests
+            start = time.perf_counter()
+            r = await client.post("/talk", json={"text": text, "session": "bench"})
+            r.raise_for_status()
+            reply = r.json()["reply"]
+            print(f"{text!r:<28} {time.perf_counter() - start:>7.2f}s  {fake.requests - before:>4} LLM calls  {reply[:50]!r}")
+            return fake.requests - before
+
+        server.folder_index.set_folder(folder)
+        await say("open bench book")
+        first = await say("summarize")
+        chapter = await say("summarize chapter 3")
+        again = await say("summarize")
+
+    assert first > 0, "first summary should call the LLM"
+    assert chapter == 0 and again == 0, "cached summaries should not call the LLM"
+    print("OK: chapter and repeat summaries came from the cache")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--chapters", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="lol-summary-")
+    os.environ["LEARNOUTLOUD_CACHE_DIR"] = os.path.join(work, "cache")
+    folder = os.path.join(work, "Documents")
+    os.makedirs(folder)
+    write_txt(os.path.join(folder, "bench book.txt"), args.pages, args.chapters)
+
+    fake = FakeLLM(args.latency)
+    os.environ["GROQ_BASE_URL"] = fake.start_in_thread()
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    asyncio.run(run(args, fake, folder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import time
+import hashlib
+import asyncio
+import argparse
+import threading
+
+# Local stand-in for the Groq chat completions API with artificial latency.
+# Point the server at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+# Streaming requests get the first token after `first_token` seconds and the
+# rest spread out so the whole reply still takes `latency` seconds.
+#   python benchmarks/fake_llm.py --port 9100 --latency 1.5
+
+REPLY = "This is a stand-in answer from the local test model. It has a few sentences. Nothing here is real."
+
+
+class FakeLLM:
+    def __init__(self, latency=1.0, reply=REPLY, first_token=None):
+        self.latency = latency
+        self.first_token = latency / 5 if first_token is None else first_token
+        self.reply = reply
+        self.requests = 0
+        self.prompts = []
+
+    def answer(self, body):
+        # Tag the reply with a prompt digest so different prompts get different answers
+        digest = hashlib.sha1(json.dumps(body.get("messages", [])).encode("utf-8")).hexdigest()[:8]
+        return f"{self.reply} Reference {digest}."
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                length = 0
+                for line in lines[1:]:
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                body = json.loads(await reader.readexactly(length) or b"{}")
+                self.requests += 1
+                self.prompts.append(body.get("messages", []))
+
+                if body.get("stream"):
+                    await self.stream(writer, body)
+                    continue
+
+                await asyncio.sleep(self.latency)
+                payload = json.dumps({
+                    "id": f"fake-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.answer(body)},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }).encode("utf-8")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n" % len(payload) + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def stream(self, writer, body):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+
+        def send(data):
+            event = f"data: {data}\n\n".encode("utf-8")
+            writer.write(b"%x\r\n" % len(event) + event + b"\r\n")
+
+        tokens = [t + " " for t in self.answer(body).split(" ")]
+        gap = max(0.0, self.latency - self.first_token) / max(1, len(tokens) - 1)
+        await asyncio.sleep(self.first_token)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(gap)
+            send(json.dumps({
+                "id": f"fake-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }))
+            await writer.drain()
+        send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=0):
+        server = await asyncio.start_server(self.handle, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        # Runs on its own event loop so it never shares a loop with the code under test
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.serve(host, port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{self.port}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency)
+
+    async def run():
+        server = await fake.serve(port=args.port)
+        print(f"Fake LLM on http://127.0.0.1:{fake.port} (latency {args.latency}s)")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
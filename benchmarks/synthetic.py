@@ -0,0 +1,172 @@
+import os
+import sys
+import random
+import zipfile
+import resource
+
+# Synthetic documents for the benchmarks. No third-party writer is needed:
+# the PDFs are assembled by hand with one Helvetica text stream per page,
+# the DOCX files as a minimal zip of document and style parts.
+
+WORDS = (
+    "learning model gradient descent photosynthesis energy cell theory data "
+    "network student chapter equation function value result analysis method "
+    "system process structure example section figure table problem solution"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def page_lines(rng, lines=45):
+    return [sentence(rng, 9) for _ in range(lines)]
+
+
+def book_text(pages, chapters=10, seed=1, lines=45):
+    # Plain-text book: "Chapter N" headings, paragraphs of generated sentences
+    rng = random.Random(seed)
+    per_chapter = max(1, pages // max(1, chapters))
+    parts = []
+    for page in range(pages):
+        if page % per_chapter == 0:
+            parts.append(f"Chapter {page // per_chapter + 1} {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}")
+        body = page_lines(rng, lines)
+        for i in range(0, len(body), 5):
+            parts.append(" ".join(body[i:i + 5]))
+    return "\n\n".join(parts)
+
+
+def write_txt(path, pages, chapters=10, seed=1):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(book_text(pages, chapters, seed))
+    return path
+
+
+def write_pdf(path, pages, seed=1):
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(None)
+    kids = []
+    for _ in range(pages):
+        ops = ["BT /F1 10 Tf 14 TL 40 800 Td"]
+        for line in page_lines(rng):
+            ops.append(f"({line}) Tj T*")
+        ops.append("ET")
+        data = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, content)
+        ))
+    objects[pages_id - 1] = (
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % len(kids)
+    )
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+DOCX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        '</Relationships>'
+    ),
+    "word/_rels/document.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "word/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/></w:style>'
+        '<w:style w:type="table" w:styleId="TableGrid"><w:name w:val="Table Grid"/></w:style>'
+        '</w:styles>'
+    ),
+}
+
+
+def write_docx(path, pages, chapters=10, seed=1, table_rows=8):
+    # Word book: a Heading 1 per chapter, five paragraphs and one table per page
+    rng = random.Random(seed)
+    per_chapter = max(1, pages // max(1, chapters))
+
+    def para(text, style=None):
+        props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+        return f'<w:p>{props}<w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+    body = []
+    for page in range(pages):
+        if page % per_chapter == 0:
+            body.append(para(f"Chapter {page // per_chapter + 1} {rng.choice(WORDS).title()}", "Heading1"))
+        lines = page_lines(rng)
+        for i in range(0, len(lines), 9):
+            body.append(para(" ".join(lines[i:i + 9])))
+        rows = []
+        for _ in range(table_rows):
+            cells = "".join(f"<w:tc>{para(rng.choice(WORDS))}</w:tc>" for _ in range(4))
+            rows.append(f"<w:tr>{cells}</w:tr>")
+        body.append('<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/></w:tblPr>' + "".join(rows) + "</w:tbl>")
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(body) + '<w:sectPr/></w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in DOCX_PARTS.items():
+            z.writestr(name, data)
+        z.writestr("word/document.xml", document)
+    return path
+
+
+def scratch_dir(name):
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data", name)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def peak_rss_mb():
+    # VmHWM is reset by exec; ru_maxrss can carry over the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
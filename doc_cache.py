@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+import threading
+
+from extractors import format_version
+from file_store import FileStore
+
+# On-disk cache of extracted document text.
+# Entries are keyed by (absolute path, mtime, size, extractor version), so
+# an edited file, or one whose format's extractor changed, simply misses and
+# its old entry ages out through LRU eviction.
+# Derived data (e.g. the retrieval index) is stored beside an entry as
+# <key><suffix> and removed together with it.
+
+CACHE_FOLDER = os.getenv(
+    "LEARNOUTLOUD_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".learnoutloud", "cache")
+)
+CACHE_MAX_BYTES = int(os.getenv("LEARNOUTLOUD_CACHE_MAX_MB", "512")) * 1024 * 1024
+SIDECAR_SUFFIXES = (".idx.npz",)
+
+
+class DocumentCache:
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._store = FileStore(folder, ".json", max_bytes, SIDECAR_SUFFIXES, "Document cache")
+
+    @property
+    def evictions(self):
+        return self._store.evictions
+
+    def _file(self, key):
+        return self._store.path(key)
+
+    def sidecar_path(self, key, suffix):
+        return self._store.path(key, suffix)
+
+    def key_for(self, path):
+        st = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{format_version(path)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def contains(self, path):
+        # Presence check that does not count as a lookup or touch LRU order
+        try:
+            key = self.key_for(path)
+        except OSError:
+            return False
+        return key in self._store
+
+    def get(self, path):
+        try:
+            key = self.key_for(path)
+        except OSError:
+            return None
+
+        if key not in self._store:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._store.drop(key)
+            entry = None
+        if entry is None or not self._store.touch(key):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, path, text):
+        try:
+            key = self.key_for(path)
+        except OSError:
+            return
+
+        entry = {
+            "path": os.path.abspath(path),
+            "text": text
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        tmp = self._file(key) + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._file(key))
+        except OSError as e:
+            print("Document cache write failed:", e)
+            return
+
+        self._store.add(key, len(data))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                **self._store.stats(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
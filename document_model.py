@@ -0,0 +1,166 @@
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from outline import Outline
+from search import SearchIndex
+from sentences import SENTENCE_END
+
+# A loaded document plus offset tables built once at load time, so that
+# page, paragraph and word lookups slice the text instead of re-parsing it.
+# Text can be appended later (progressive PDF loading); only the new part
+# is indexed.
+
+PAGE_MARK = re.compile(r'\[Page\s*(\d+)\]')
+PARA_BREAK = re.compile(r'\n\s*\n+')
+WORD = re.compile(r'\S+')
+
+WORDS_PER_PAGE = 450
+
+
+class LoadedDocument:
+    def __init__(self, text="", name="", doc_type=""):
+        self.name = name
+        self.doc_type = doc_type
+        self.key = None           # parsed-document cache key, set when shared between sessions
+        self.text = ""
+        self.parts = 0
+        self._outline = None
+
+        # Background extractor still filling this document (progressive PDF), None once complete
+        self.loader = None
+
+        # Passage index for document questions (retrieval.IndexBuilder), built in the background
+        self.retrieval = None
+
+        # Word index for "find"; filled in the background at load and caught up by each search
+        self.search = SearchIndex()
+
+        # Pages: number, offset of the "[Page N]" marker, offset of its content
+        self.page_numbers = []
+        self.page_marks = array('I')
+        self.page_bodies = array('I')
+        self._page_index = {}
+
+        # Paragraphs as [start, end) spans; words and sentences as start offsets
+        self.para_starts = array('I')
+        self.para_ends = array('I')
+        self.word_starts = array('I')
+        self.sentence_starts = array('I')
+
+        # Reading chunk tables by chunk size (reader.ChunkTable), shared by every reader;
+        # chunk_size fixes the size instead of scaling it with the speaking rate
+        self.chunk_tables = {}
+        self.chunk_size = None
+
+        # Outline, summaries and retrieval work on the whole text (large_text documents have none in memory)
+        self.whole_text = True
+
+        if text:
+            self.append(text)
+
+    @property
+    def length(self):
+        return len(self.text)
+
+    @property
+    def word_count(self):
+        return len(self.word_starts)
+
+    def memory_size(self):
+        arrays = (self.page_marks, self.page_bodies, self.para_starts, self.para_ends,
+                  self.word_starts, self.sentence_starts)
+        arrays += tuple(t.starts for t in self.chunk_tables.values())
+        index = self.retrieval.index if self.retrieval else None
+        return (sys.getsizeof(self.text)
+                + sum(a.itemsize * len(a) for a in arrays)
+                + sys.getsizeof(self.page_numbers) + sys.getsizeof(self._page_index)
+                + (index.memory_size() if index else 0)
+                + self.search.memory_size())
+
+    def append(self, chunk):
+        # New parts always start a new paragraph, like pages joined by a blank line
+        if self.text:
+            self.text += "\n\n"
+        base = len(self.text)
+        self.text += chunk
+        self.parts += 1
+        self._outline = None
+
+        for m in PAGE_MARK.finditer(chunk):
+            num = int(m.group(1))
+            self._page_index[num] = len(self.page_numbers)
+            self.page_numbers.append(num)
+            self.page_marks.append(base + m.start())
+            self.page_bodies.append(base + m.end())
+
+        pos = 0
+        for m in PARA_BREAK.finditer(chunk):
+            self._add_paragraph(chunk, base, pos, m.start())
+            pos = m.end()
+        self._add_paragraph(chunk, base, pos, len(chunk))
+
+        self.word_starts.extend(base + m.start() for m in WORD.finditer(chunk))
+        self.sentence_starts.append(base)
+        self.sentence_starts.extend(base + m.end() for m in SENTENCE_END.finditer(chunk) if m.end() < len(chunk))
+
+    def _add_paragraph(self, chunk, base, start, end):
+        if chunk[start:end].strip():
+            self.para_starts.append(base + start)
+            self.para_ends.append(base + end)
+
+    # ── Pages ────────────────────────────────────
+
+    def has_page(self, num):
+        return num in self._page_index
+
+    def page_text(self, num):
+        i = self._page_index.get(num)
+        if i is None:
+            return None
+        end = self.page_marks[i + 1] if i + 1 < len(self.page_marks) else len(self.text)
+        return self.text[self.page_bodies[i]:end].strip()
+
+    def page_at(self, offset):
+        # Page number containing a text offset (None before the first marker)
+        i = bisect_right(self.page_marks, offset) - 1
+        return self.page_numbers[i] if i >= 0 else None
+
+    def page_start(self, num):
+        i = self._page_index.get(num)
+        return None if i is None else self.page_marks[i]
+
+    def approx_page_start(self, num, words_per_page=WORDS_PER_PAGE):
+        # Offset where word-count page `num` begins (None past the end)
+        first = max(0, (num - 1) * words_per_page)
+        return self.word_starts[first] if first < len(self.word_starts) else None
+
+    def approx_pages(self, start, end, words_per_page=WORDS_PER_PAGE):
+        # Word-count pages for formats without page markers
+        first = max(0, (start - 1) * words_per_page)
+        last = min(end * words_per_page, len(self.word_starts))
+        if first >= last:
+            return ""
+        stop = self.word_starts[last] if last < len(self.word_starts) else len(self.text)
+        return " ".join(self.text[self.word_starts[first]:stop].split())
+
+    # ── Paragraphs and headings ──────────────────
+
+    def paragraph_count(self):
+        return len(self.para_starts)
+
+    def paragraphs(self, start, stop):
+        return [self.text[a:b].strip() for a, b in zip(self.para_starts[start:stop], self.para_ends[start:stop])]
+
+    def first_paragraphs(self, count):
+        return self.paragraphs(0, count)
+
+    def last_paragraphs(self, count):
+        return self.paragraphs(max(0, len(self.para_starts) - count), len(self.para_starts))
+
+    @property
+    def outline(self):
+        # Sections and headings, indexed on first use after the text last changed
+        if self._outline is None:
+            self._outline = Outline(self.text)
+        return self._outline
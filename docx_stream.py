@@ -0,0 +1,129 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Streaming DOCX text extraction.
+# word/document.xml is read straight from the zip with iterparse, so only
+# the paragraph or table row being read is held as elements; finished ones
+# are cleared. Paragraphs, "[HEADING]" lines (paragraph styles named
+# "heading ..." in word/styles.xml) and table rows come out in document
+# order, a row as its non-empty cells joined by " | ". Text boxes and
+# fallback copies of drawings are skipped, as python-docx does.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+BODY = W + "body"
+P = W + "p"
+PPR = W + "pPr"
+PSTYLE = W + "pStyle"
+T = W + "t"
+TAB = W + "tab"
+BREAKS = (W + "br", W + "cr")
+TBL = W + "tbl"
+TR = W + "tr"
+TC = W + "tc"
+SKIP = (W + "txbxContent", MC + "Fallback")
+CELL_SEPARATOR = " | "
+
+
+def heading_styles(z):
+    # Style ids whose display name starts with "heading" (ids may be localized)
+    try:
+        f = z.open("word/styles.xml")
+    except KeyError:
+        return set()
+    ids = set()
+    with f:
+        for _, el in ET.iterparse(f):
+            if el.tag == W + "style":
+                name = el.find(W + "name")
+                if name is not None and name.get(W + "val", "").lower().startswith("heading"):
+                    ids.add(el.get(W + "styleId"))
+                el.clear()
+    return ids
+
+
+def iter_docx(path):
+    # Lines of text in document order
+    with zipfile.ZipFile(path) as z:
+        headings = heading_styles(z)
+        with z.open("word/document.xml") as f:
+            yield from _lines(f, headings)
+
+
+def _lines(f, headings):
+    body = None
+    parts = []          # text of the paragraph being read
+    style = None
+    row = None          # cell texts of the outermost table row being read
+    cell = None         # paragraph texts of its current cell; nested tables fold in here
+    tables = 0
+    skip = 0
+    properties = 0      # inside pPr, whose w:tab elements are tab stops, not text
+
+    for event, el in ET.iterparse(f, events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag in SKIP:
+                skip += 1
+            elif skip:
+                pass
+            elif tag == PPR:
+                properties += 1
+            elif tag == TBL:
+                tables += 1
+            elif tag == TR and tables == 1:
+                row = []
+            elif tag == TC and tables == 1:
+                cell = []
+            elif tag == BODY:
+                body = el
+            continue
+
+        if tag in SKIP:
+            skip -= 1
+        elif skip:
+            continue
+        elif tag == T:
+            parts.append(el.text or "")
+        elif tag == TAB:
+            if not properties:
+                parts.append("\t")
+        elif tag in BREAKS:
+            parts.append("\n")
+        elif tag == PPR:
+            properties -= 1
+        elif tag == PSTYLE:
+            style = style or el.get(W + "val")
+        elif tag == P:
+            text = "".join(parts)
+            parts = []
+            if text.strip():
+                if tables:
+                    # A row stays on one line
+                    cell.append(" ".join(text.split()))
+                elif style in headings:
+                    yield f"[HEADING] {text}"
+                else:
+                    yield text
+            style = None
+            el.clear()
+        elif tag == TC and tables == 1:
+            row.append(" ".join(cell))
+            cell = None
+        elif tag == TR and tables == 1:
+            cells = [c for c in row if c]
+            if cells:
+                yield CELL_SEPARATOR.join(cells)
+            row = None
+            el.clear()
+        elif tag == TBL:
+            tables -= 1
+
+        # Drop finished top-level paragraphs and tables
+        if tables == 0 and body is not None and tag in (P, TBL):
+            body.clear()
+
+
+def extract_docx_text(path):
+    return "\n".join(iter_docx(path)).strip()
@@ -0,0 +1,53 @@
+import os
+from pdf_parallel import extract_pdf_pages
+from docx_stream import extract_docx_text
+
+# Text extraction for the supported formats.
+# Shared by the server and the background ingestion workers; failures come
+# back as "Error reading ..." strings, like every other reply.
+
+SUPPORTED = ('.pdf', '.docx', '.txt')
+
+# Part of the document cache key: bump a format's version whenever its
+# extractor's output changes, so text cached by the old one misses.
+# docx 2: table rows (streamed extractor)
+FORMAT_VERSIONS = {'.pdf': 1, '.docx': 2, '.txt': 1}
+
+
+def format_version(path):
+    return FORMAT_VERSIONS.get(os.path.splitext(path)[1].lower(), 0)
+
+
+def extract_pdf(path, workers=None):
+    try:
+        # Pages are spread over a process pool for large files, serial for small ones
+        return extract_pdf_pages(path, workers=workers)
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+
+def extract_docx(path):
+    try:
+        # Streamed from the document XML, tables included
+        return extract_docx_text(path)
+    except Exception as e:
+        return f"Error reading DOCX: {str(e)}"
+
+
+def extract_txt(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except Exception as e:
+        return f"Error reading TXT: {str(e)}"
+
+
+def extract_document(path, workers=None):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        return extract_pdf(path, workers)
+    if ext == '.docx':
+        return extract_docx(path)
+    if ext == '.txt':
+        return extract_txt(path)
+    return "Unsupported file format (only pdf, docx, txt)"
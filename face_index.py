@@ -0,0 +1,133 @@
+import math
+import threading
+
+import numpy as np
+
+# In-memory nearest-face lookup for the face login.
+# Every enrolled descriptor is a row of one contiguous float32 matrix, with
+# its squared norm kept alongside, so matching a login attempt against all
+# users is a single matrix-vector product:
+#   |x - q|^2 = |x|^2 - 2 x.q + |q|^2
+# Rows are appended in place (capacity grows by half when full) and a deleted
+# user's row is filled with the last row, so register and delete cost one
+# row copy. The winning distance is recomputed in float64 before it is
+# compared with the threshold.
+
+DESCRIPTOR_SIZE = 128
+SIMILARITY_THRESHOLD = 0.45
+INITIAL_CAPACITY = 1024
+
+
+class FaceIndex:
+    def __init__(self, dim=DESCRIPTOR_SIZE, capacity=INITIAL_CAPACITY):
+        self.dim = dim
+        self._matrix = np.empty((max(1, capacity), dim), dtype=np.float32)
+        self._norms = np.empty(max(1, capacity), dtype=np.float32)     # squared row norms
+        self.names = []                 # row -> name
+        self._rows = {}                 # name -> row
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def vector(self, descriptor):
+        v = np.asarray(descriptor, dtype=np.float32).reshape(-1)
+        if v.shape[0] != self.dim or not np.isfinite(v).all():
+            raise ValueError(f"descriptor must be {self.dim} finite numbers")
+        return v
+
+    def _reserve(self, count):
+        if count <= self._matrix.shape[0]:
+            return
+        capacity = max(count, self._matrix.shape[0] * 3 // 2)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        n = len(self.names)
+        matrix[:n] = self._matrix[:n]
+        norms[:n] = self._norms[:n]
+        self._matrix, self._norms = matrix, norms
+
+    def add(self, name, descriptor):
+        # Enrolls or replaces name's descriptor
+        v = self.vector(descriptor)
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                row = len(self.names)
+                self._reserve(row + 1)
+                self.names.append(name)
+                self._rows[name] = row
+            self._matrix[row] = v
+            self._norms[row] = v @ v
+
+    def load(self, users, count=None):
+        # Bulk enrollment from (name, descriptor) pairs; count presizes the matrix
+        if count:
+            with self._lock:
+                self._reserve(len(self.names) + count)
+        loaded = skipped = 0
+        for name, descriptor in users:
+            try:
+                self.add(name, descriptor)
+                loaded += 1
+            except (TypeError, ValueError):
+                skipped += 1
+        return loaded, skipped
+
+    def remove(self, name):
+        with self._lock:
+            row = self._rows.pop(name, None)
+            if row is None:
+                return False
+            last = len(self.names) - 1
+            if row != last:
+                moved = self.names[last]
+                self._matrix[row] = self._matrix[last]
+                self._norms[row] = self._norms[last]
+                self.names[row] = moved
+                self._rows[moved] = row
+            self.names.pop()
+            return True
+
+    def distance(self, name, descriptor):
+        # Distance to one user's descriptor, or None if the name is not enrolled
+        q = self.vector(descriptor).astype(np.float64)
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                return None
+            x = self._matrix[row].astype(np.float64)
+        return float(np.sqrt(((x - q) ** 2).sum()))
+
+    def nearest(self, descriptor):
+        # (name, distance) of the closest enrolled face, (None, inf) when nobody is enrolled
+        q = self.vector(descriptor)
+        with self._lock:
+            n = len(self.names)
+            if n == 0:
+                return None, math.inf
+            scores = self._matrix[:n] @ q
+            scores *= -2
+            scores += self._norms[:n]
+            row = int(np.argmin(scores))
+            name = self.names[row]
+            x = self._matrix[row].astype(np.float64)
+        return name, float(np.sqrt(((x - q.astype(np.float64)) ** 2).sum()))
+
+    def match(self, descriptor, threshold=SIMILARITY_THRESHOLD):
+        # Name of the enrolled face closer than threshold, its distance, and the closest face either way
+        name, distance = self.nearest(descriptor)
+        return (name if distance < threshold else None), name, distance
+
+    def memory_size(self):
+        return self._matrix.nbytes + self._norms.nbytes
+
+    def stats(self):
+        return {
+            "users": len(self.names),
+            "capacity": self._matrix.shape[0],
+            "matrix_bytes": self.memory_size()
+        }
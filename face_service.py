@@ -0,0 +1,187 @@
+import os
+import time
+import asyncio
+import datetime
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from typing import Optional
+
+from face_index import FaceIndex, SIMILARITY_THRESHOLD
+
+# Face login API (the /api routes login.html calls), in place of server.js.
+# Users stay in MongoDB, but every descriptor is also held in a FaceIndex
+# loaded once at startup and updated on register and delete, so a login
+# check is one vectorized distance computation instead of fetching every
+# user from the database. This service must be the only writer of the
+# users collection, or the index goes stale until the next restart.
+
+try:
+    from pymongo import MongoClient
+    MONGO_IMPORTED = True
+except ImportError:
+    MONGO_IMPORTED = False
+
+MONGO_URL = os.getenv("LEARNOUTLOUD_MONGO_URL", "mongodb://localhost:27017/voice_assistant_db")
+LOAD_BATCH = 10000
+NO_DATABASE = "User database unavailable"
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"]
+)
+
+faces = FaceIndex()
+users = None
+if MONGO_IMPORTED:
+    try:
+        # Same database and collection as the mongoose User model
+        users = MongoClient(MONGO_URL).get_default_database("voice_assistant_db")["users"]
+    except Exception as e:
+        print("MongoDB unavailable:", e)
+else:
+    print("Note: pymongo unavailable → face login disabled")
+
+class FaceRequest(BaseModel):
+    descriptor: Optional[list] = None
+    name: Optional[str] = None
+
+def failure(status, error):
+    return JSONResponse(status_code=status, content={"success": False, "error": error})
+
+def load_faces(collection):
+    # Every user's descriptor into the index, streamed in batches
+    start = time.perf_counter()
+    cursor = collection.find({}, {"_id": 0, "name": 1, "faceDescriptor": 1}).batch_size(LOAD_BATCH)
+    loaded, skipped = faces.load(((u.get("name"), u.get("faceDescriptor")) for u in cursor),
+                                 count=collection.estimated_document_count())
+    print(f"Face index: {loaded} users in {time.perf_counter() - start:.1f}s"
+          + (f", {skipped} without a valid descriptor" if skipped else ""))
+
+@app.on_event("startup")
+async def start_index():
+    global users
+    if users is None:
+        return
+    try:
+        await asyncio.to_thread(load_faces, users)
+    except Exception as e:
+        # MongoClient connects lazily, so an unreachable server shows up here;
+        # stay up and answer 500 like a missing pymongo rather than fail to start
+        print("MongoDB unavailable:", repr(e))
+        users = None
+
+@app.get("/")
+async def root():
+    return {"status": "ok", "message": "Server is running"}
+
+@app.get("/api/face/stats")
+async def face_stats():
+    return {**faces.stats(), "threshold": SIMILARITY_THRESHOLD}
+
+@app.post("/api/face/check")
+def check_face(req: FaceRequest):
+    # Is this face already registered?
+    if users is None:
+        return failure(500, NO_DATABASE)
+    try:
+        match, closest, distance = faces.match(req.descriptor or [])
+    except (TypeError, ValueError):
+        return failure(400, "Invalid descriptor")
+
+    if closest is None:
+        return {"success": False, "exists": False, "message": "No existing users. Please register.",
+                "descriptor": req.descriptor}
+    print(f"Best match: {closest} ({distance:.4f})")
+    if match:
+        return {"success": True, "exists": True, "name": match, "matchDistance": distance,
+                "descriptor": req.descriptor}
+    return {"success": False, "exists": False, "message": "New face - please register",
+            "descriptor": req.descriptor, "closestMatch": {"name": closest, "distance": distance}}
+
+@app.post("/api/face/verify")
+def verify_face(req: FaceRequest):
+    # Does the spoken name belong to this face?
+    if not req.name or not req.descriptor:
+        return failure(400, "Name and descriptor required")
+    if users is None:
+        return failure(500, NO_DATABASE)
+    try:
+        distance = faces.distance(req.name, req.descriptor)
+    except (TypeError, ValueError):
+        return failure(400, "Invalid descriptor")
+
+    if distance is None:
+        print(f"New name: {req.name}")
+        return {"success": True, "nameExists": False, "message": "New user - please complete registration"}
+    print(f"Face match distance for {req.name}: {distance:.4f}")
+    if distance >= SIMILARITY_THRESHOLD:
+        return {"success": False, "verified": False, "message": "Face does not match this name", "nameExists": True}
+
+    try:
+        users.update_one({"name": req.name},
+                         {"$set": {"lastLogin": datetime.datetime.now(datetime.timezone.utc)}, "$inc": {"loginCount": 1}})
+    except Exception as e:
+        print("Verification error:", repr(e))
+        return failure(500, str(e))
+    return {"success": True, "verified": True, "name": req.name, "message": "Access granted"}
+
+@app.post("/api/face/register")
+def register_face(req: FaceRequest):
+    if users is None:
+        return failure(500, NO_DATABASE)
+    if not req.name:
+        return failure(400, "Name and descriptor required")
+    if req.name in faces:
+        return failure(400, "Name already exists. Please choose a different name.")
+    try:
+        match, _, _ = faces.match(req.descriptor or [])
+    except (TypeError, ValueError):
+        return failure(400, "Invalid descriptor")
+    if match:
+        # One face, one name
+        return failure(400, f"This face appears to be already registered as {match}. Please use that name.")
+
+    try:
+        users.insert_one({"name": req.name, "faceDescriptor": [float(x) for x in req.descriptor],
+                          "loginCount": 1, "createdAt": datetime.datetime.now(datetime.timezone.utc)})
+    except Exception as e:
+        print("Registration error:", repr(e))
+        return failure(500, str(e))
+    faces.add(req.name, req.descriptor)
+    print(f"New user registered: {req.name}")
+    return {"success": True, "message": "Registration successful", "name": req.name}
+
+@app.get("/api/users")
+def list_users():
+    # For debugging; descriptors are left out
+    if users is None:
+        return failure(500, NO_DATABASE)
+    try:
+        found = list(users.find({}, {"_id": 0, "faceDescriptor": 0}))
+    except Exception as e:
+        return failure(500, str(e))
+    return {"success": True, "count": len(found), "users": found}
+
+@app.delete("/api/user/{name}")
+def delete_user(name: str):
+    if users is None:
+        return failure(500, NO_DATABASE)
+    try:
+        users.delete_one({"name": name})
+    except Exception as e:
+        return failure(500, str(e))
+    faces.remove(name)
+    print(f"Deleted user: {name}")
+    return {"success": True, "message": "User deleted"}
+
+if __name__ == "__main__":
+    print("Face recognition server")
+    print(f"Similarity threshold: {SIMILARITY_THRESHOLD}")
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Byte-capped, least-recently-used set of cache files in one folder, named
+# <key><suffix>. The document, summary and audio caches keep their files
+# through it. Sizes are held in memory, oldest first; at start they are
+# read back in file mtime order, and every hit bumps the file's mtime, so
+# the order carries over restarts. Files named <key><sidecar suffix> are
+# derived from an entry and removed with it.
+
+
+class FileStore:
+    def __init__(self, folder, suffix, max_bytes, sidecars=(), label="Cache", on_drop=None):
+        self.folder = folder
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.sidecars = tuple(sidecars)
+        self.on_drop = on_drop      # called with the key of every entry removed
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> size on disk, oldest first
+        self._total = 0
+        try:
+            os.makedirs(folder, exist_ok=True)
+            found = []
+            for name in os.listdir(folder):
+                if name.endswith(suffix):
+                    st = os.stat(os.path.join(folder, name))
+                    found.append((st.st_mtime, name[:-len(suffix)], st.st_size))
+        except OSError as e:
+            print(f"{label} unavailable:", e)
+            return
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+
+    def path(self, key, suffix=None):
+        return os.path.join(self.folder, key + (self.suffix if suffix is None else suffix))
+
+    def __contains__(self, key):
+        # Presence check that does not touch LRU order
+        with self._lock:
+            return key in self._entries
+
+    def touch(self, key):
+        # Mark an entry recently used; False when it is not (or no longer) on disk
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            self.drop(key)
+            return False
+        return True
+
+    def add(self, key, size):
+        # Record the file just written at path(key); least recently used files go while over max_bytes
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._total += size
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def drop(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _remove(self, key):
+        self._forget(key)
+        for suffix in (self.suffix,) + self.sidecars:
+            try:
+                os.remove(self.path(key, suffix))
+            except OSError:
+                pass
+        if self.on_drop:
+            self.on_drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total,
+                    "max_bytes": self.max_bytes, "evictions": self.evictions}
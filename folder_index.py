@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import heapq
+import threading
+
+# In-memory index of the documents folder.
+# The listing is re-read only when the folder's mtime changes (checked at
+# most every RECHECK_SECONDS), and each name is normalized and split into
+# character trigrams once. A lookup walks the trigram postings of the
+# spoken text, rarest first, so its cost depends on the utterance rather
+# than the folder size, and misheard names ("biology buk") still rank the
+# right file first. Each spoken word also contributes its own rarest
+# trigram, so a filler word ("please") whose trigrams happen to be rare in
+# the folder cannot crowd the named file out of the candidates.
+
+SUPPORTED = ('.pdf', '.docx', '.txt')
+RECHECK_SECONDS = float(os.getenv("LEARNOUTLOUD_FOLDER_RECHECK", "2"))
+MIN_SCORE = 0.6
+WHOLE_SCORE = 0.95  # the whole name is in the utterance, or the whole utterance in the name
+PROBE_GRAMS = 3     # rarest utterance trigrams used to find candidates
+WORD_PROBE_GRAMS = 1  # plus this many of the rarest in each spoken word
+SHORTLIST = 64      # candidates scored in full
+NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize(text):
+    return NON_WORD.sub('', text.lower())
+
+
+def trigrams(clean):
+    if len(clean) < 3:
+        return {clean} if clean else set()
+    return {clean[i:i + 3] for i in range(len(clean) - 2)}
+
+
+class FolderEntry:
+    def __init__(self, filename):
+        self.filename = filename
+        self.name = os.path.splitext(filename)[0]
+        self.clean = normalize(self.name)
+        self.grams = trigrams(self.clean)
+
+
+class FolderIndex:
+    def __init__(self, folder, recheck=RECHECK_SECONDS):
+        self.folder = folder
+        self.recheck = recheck
+        self.exists = False
+        self.refreshes = 0
+        self._mtime = None
+        self._checked = 0.0
+        self._entries = []
+        self._postings = {}     # trigram -> [entry index, ...]
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked < self.recheck:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.folder).st_mtime_ns
+            except OSError:
+                self.exists = False
+                self._mtime = None
+                self._entries = []
+                self._postings = {}
+                return
+            if mtime == self._mtime and not force:
+                return
+
+            try:
+                names = sorted(f for f in os.listdir(self.folder) if f.lower().endswith(SUPPORTED))
+            except OSError as e:
+                print("Documents folder unreadable:", e)
+                return
+            entries = [FolderEntry(f) for f in names]
+            postings = {}
+            for i, entry in enumerate(entries):
+                for gram in entry.grams:
+                    postings.setdefault(gram, []).append(i)
+
+            self.exists = True
+            self._mtime = mtime
+            self._entries = entries
+            self._postings = postings
+            self.refreshes += 1
+
+    def set_folder(self, folder):
+        with self._lock:
+            self.folder = folder
+            self._mtime = None
+            self._checked = 0.0
+
+    def files(self):
+        self.refresh()
+        return [e.filename for e in self._entries]
+
+    def names(self):
+        self.refresh()
+        return [e.name for e in self._entries]
+
+    def matches(self, spoken, limit=5):
+        # [(filename, score), ...] best first. Score is how much of the file
+        # name appears in the utterance, or of the utterance in the name
+        # (for partial names like "bio"); the whole name scores 1.0
+        self.refresh()
+        entries, postings = self._entries, self._postings
+        clean = normalize(spoken)
+        grams = trigrams(clean)
+        if not grams:
+            return []
+
+        # Candidates come from the rarest utterance trigrams that exist in the
+        # folder; those mostly belong to the file being named, and a misheard
+        # letter only removes trigrams, it cannot add misleading ones
+        probe = sorted((postings[g] for g in grams if g in postings), key=len)[:PROBE_GRAMS]
+        for word in spoken.lower().split():
+            word_grams = trigrams(normalize(word))
+            # A trigram in more files than the shortlist holds cannot narrow it
+            probe += sorted((postings[g] for g in word_grams if 0 < len(postings.get(g, ())) <= SHORTLIST),
+                            key=len)[:WORD_PROBE_GRAMS]
+        hits = {}
+        for posting in probe:
+            for i in posting:
+                hits[i] = hits.get(i, 0) + 1
+        shortlist = heapq.nlargest(SHORTLIST, hits, key=hits.get)
+
+        ranked = []
+        for i in shortlist:
+            entry = entries[i]
+            count = len(entry.grams & grams)
+            if entry.clean in clean:
+                score = 1.0
+            elif clean in entry.clean:
+                score = WHOLE_SCORE
+            else:
+                score = max(count / len(entry.grams), 0.9 * count / len(grams))
+            ranked.append((score, abs(len(entry.clean) - len(clean)), entry.filename))
+        # Ties go to the name closest in length to the utterance, so "open
+        # history notes" picks "history notes" over "notes"
+        ranked.sort(key=lambda r: (-r[0], r[1], r[2]))
+        return [(filename, round(score, 3)) for score, _, filename in ranked[:limit]]
+
+    def best(self, spoken, min_score=MIN_SCORE, fuzzy=True):
+        # fuzzy=False takes only whole names, not misheard ones
+        found = self.matches(spoken, limit=1)
+        if found and found[0][1] >= (min_score if fuzzy else WHOLE_SCORE):
+            return found[0][0]
+        return None
+
+    def stats(self):
+        return {
+            "folder": self.folder,
+            "exists": self.exists,
+            "files": len(self._entries),
+            "trigrams": len(self._postings),
+            "refreshes": self.refreshes
+        }
@@ -0,0 +1,209 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import extract_document
+from large_text import is_large_text
+
+# Background warm-up of the documents folder.
+# At startup, and again whenever the server has been idle for a while, every
+# supported file whose (path, mtime, size) is not in the document cache is
+# extracted in a small pool of niced worker processes and written into the
+# cache, so opening it later is a lookup. New work is only handed out while
+# no interactive request is in flight and none arrived in the last
+# IDLE_SECONDS; a file already being extracted is allowed to finish.
+
+INGEST_WORKERS = int(os.getenv("LEARNOUTLOUD_INGEST_WORKERS", "1"))
+IDLE_SECONDS = float(os.getenv("LEARNOUTLOUD_INGEST_IDLE", "2"))
+RESCAN_SECONDS = float(os.getenv("LEARNOUTLOUD_INGEST_RESCAN", "60"))
+NICE = 10
+
+
+def _lower_priority():
+    try:
+        os.nice(NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def _extract(path):
+    # Worker process: serial PDF extraction, the pool is already the parallelism
+    return extract_document(path, workers=1)
+
+
+class Ingestor:
+    def __init__(self, folder_index, cache, workers=INGEST_WORKERS,
+                 idle_seconds=IDLE_SECONDS, rescan_seconds=RESCAN_SECONDS):
+        self.folder_index = folder_index
+        self.cache = cache
+        self.workers = workers
+        self.idle_seconds = idle_seconds
+        self.rescan_seconds = rescan_seconds
+
+        self.state = "stopped"
+        self.total = 0           # files found in the last scan
+        self.cached = 0          # of those, already in the cache
+        self.ingested = 0
+        self.failed = 0
+        self.bytes_read = 0
+        self.back_offs = 0
+        self.current = []        # file names being extracted
+        self.last_scan = None
+
+        self._interactive = 0
+        self._last_interactive = 0.0
+        self._failures = {}      # cache key -> error, so a broken file is not retried until it changes
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+
+    # ── Interactive activity ─────────────────────
+
+    def request_started(self):
+        with self._lock:
+            self._interactive += 1
+            self._last_interactive = time.monotonic()
+
+    def request_finished(self):
+        with self._lock:
+            self._interactive -= 1
+            self._last_interactive = time.monotonic()
+
+    def _busy(self):
+        with self._lock:
+            return self._interactive > 0 or time.monotonic() - self._last_interactive < self.idle_seconds
+
+    def _wait_until_idle(self):
+        if not self._busy():
+            return True
+        self.back_offs += 1
+        previous, self.state = self.state, "paused"
+        while self._busy():
+            if self._stop.wait(0.2):
+                return False
+        self.state = previous
+        return True
+
+    # ── Scanning ─────────────────────────────────
+
+    def _pending_files(self):
+        self.folder_index.refresh(force=True)
+        files = self.folder_index.files()
+        pending = []
+        cached = 0
+        for filename in files:
+            path = os.path.join(self.folder_index.folder, filename)
+            if self.cache.contains(path) or is_large_text(path):
+                # Large text files are mapped in place when opened; there is nothing to extract
+                cached += 1
+                continue
+            try:
+                key = self.cache.key_for(path)
+            except OSError:
+                continue
+            if key not in self._failures:
+                pending.append((path, key))
+        self.total = len(files)
+        self.cached = cached
+        self.last_scan = time.time()
+        return pending
+
+    def _ingest(self, pending):
+        slots = threading.Semaphore(self.workers)
+        evictions = self.cache.evictions
+        done = threading.Event()
+        running = [0]
+
+        def finished(path, key, future):
+            name = os.path.basename(path)
+            try:
+                text = future.result()
+            except Exception as e:
+                text = f"Error reading file: {e!r}"
+            if text.startswith("Error reading") or text.startswith("Unsupported"):
+                self._failures[key] = text
+                self.failed += 1
+            else:
+                self.cache.put(path, text)
+                self.ingested += 1
+                self.cached += 1
+                self.bytes_read += os.path.getsize(path) if os.path.exists(path) else 0
+            with self._lock:
+                self.current.remove(name)
+                running[0] -= 1
+                if running[0] == 0:
+                    done.set()
+            slots.release()
+
+        for path, key in pending:
+            slots.acquire()
+            if self._stop.is_set() or not self._wait_until_idle():
+                slots.release()
+                break
+            if self.cache.evictions > evictions:
+                # The cache is full; ingesting more would only push out other books
+                self.state = "cache full"
+                slots.release()
+                break
+            with self._lock:
+                self.current.append(os.path.basename(path))
+                running[0] += 1
+                done.clear()
+            future = self._pool.submit(_extract, path)
+            future.add_done_callback(lambda f, path=path, key=key: finished(path, key, f))
+
+        with self._lock:
+            idle = running[0] == 0
+        if not idle:
+            done.wait()
+
+    def _run(self):
+        # Spawned rather than forked: this runs on a background thread of a threaded server
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_lower_priority,
+                                         mp_context=multiprocessing.get_context("spawn"))
+        try:
+            while not self._stop.is_set():
+                self.state = "scanning"
+                pending = self._pending_files()
+                if pending:
+                    self.state = "ingesting"
+                    self._ingest(pending)
+                if self.state == "cache full":
+                    break
+                self.state = "idle"
+                if self._stop.wait(self.rescan_seconds):
+                    break
+        except Exception as e:
+            print("Ingestion stopped:", repr(e))
+            self.state = "failed"
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.state = "stopped"
+
+    def status(self):
+        with self._lock:
+            current = list(self.current)
+        return {
+            "state": self.state,
+            "files": self.total,
+            "cached": self.cached,
+            "remaining": max(0, self.total - self.cached - len(self._failures)),
+            "ingested": self.ingested,
+            "failed": self.failed,
+            "current": current,
+            "bytes_read": self.bytes_read,
+            "back_offs": self.back_offs,
+            "last_scan": self.last_scan
+        }
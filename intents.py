@@ -0,0 +1,170 @@
+import re
+
+# Command routing for /talk.
+# Every route's pattern is compiled into one alternation, so a single
+# finditer pass over the utterance finds all candidate commands. The
+# highest-priority candidate wins (ties go to the earliest in the text).
+# Slots are the named groups of a route's pattern; patterns see stripped,
+# lowercased text and must start at a word.
+# Extend by adding (intent, pattern, priority) rows to COMMAND_ROUTES or
+# calling IntentRouter.add().
+
+
+def phrases(*words):
+    # Whole-word alternation of literal phrases
+    return r'\b(?:' + '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r')\b'
+
+
+# Words a spoken command may be wrapped in ("please go faster", "next please")
+LEAD = r'(?:(?:please|ok|okay|now|and|so|can you|could you)\s+)*'
+TAIL = r'(?:\s+(?:please|now|then|thanks|thank you))*'
+
+
+def command(pattern):
+    # The pattern as the whole utterance, give or take LEAD and TAIL words,
+    # for command words that also turn up in questions ("is it faster to walk")
+    return r'^' + LEAD + r'(?:' + pattern + r')' + TAIL + r'$'
+
+
+def leading(pattern):
+    # The pattern at the start of the utterance, after any LEAD words, with
+    # anything after it ("read biology notes", "continue from here")
+    return r'^' + LEAD + r'(?:' + pattern + r')\b'
+
+
+SLOT = re.compile(r'\(\?P<(\w+)>')
+RATE = r'(?P<rate>\d+(?:\.\d+)?|\.\d+)'
+HEADING_NUMBER = r'(?P<number>\d+(?:\.\d+)*)'
+RELATIVE_HEADING = r'(?P<which>next|following|previous|last|prior|this|current)\s+(?P<kind>chapter|section)\b'
+
+# Priorities: speed > navigation > search > listing > loading > document commands.
+# A file name in the utterance is tried for anything below LOAD_PRIORITY.
+LOAD_PRIORITY = 60
+
+COMMAND_ROUTES = [
+    ("speed_reset", phrases("normal speed", "default speed", "reset speed"), 100),
+    ("speed_set", r'\b(?:set (?:the )?speed to|speed(?: to)?|set to)\s*' + RATE + r'\s*(?:x\b|times\b)?', 100),
+    # A bare rate needs a speed word after it, or to be the whole utterance,
+    # so "what is 2 x 3" and "repeat 3 times" are left alone
+    ("speed_set", r'(?<![\w.])(?P<rate>\d+(?:\.\d+)?)\s*(?:x|times) speed\b', 100),
+    ("speed_set", r'^(?P<rate>\d+(?:\.\d+)?)\s*x$', 100),
+    ("speed_up", command(r'(?:(?:go|read|talk|speak) )?(?:(?:a )?(?:bit|little|lot|much) )?faster'
+                        r'|speed (?:it )?up|increase (?:the )?speed'), 100),
+    ("speed_down", command(r'(?:(?:go|read|talk|speak) )?(?:(?:a )?(?:bit|little|lot|much) )?slower'
+                          r'|slow (?:it )?down|decrease (?:the )?speed'), 100),
+
+    # Summaries of a chapter named by where the learner is, above the
+    # navigation they would otherwise be taken for
+    ("summary", r'\bsummar(?:y|ies|ize|ise|ising|izing)\b(?: of)?(?: the)?\s+' + RELATIVE_HEADING, 85),
+    ("summary", r'\bwhat (?:happened|happens) in (?:the )?' + RELATIVE_HEADING, 85),
+
+    ("goto_page", r'\b(?:go|jump|skip|turn|move)(?: back)? to\s+page\s*(?P<page>\d+)', 80),
+    ("goto_page", r'\b(?:read|start|begin)(?: reading)?(?: from| at)?\s+page\s*(?P<page>\d+)', 80),
+    ("goto_heading", r'\b(?:go|jump|skip|turn|move)(?: back)? to\s+(?P<kind>chapter|section)\s*' + HEADING_NUMBER, 80),
+    ("goto_heading", r'\b(?:read|start|begin)(?: reading)?(?: from| at)?\s+(?P<kind>chapter|section)\s*' + HEADING_NUMBER, 80),
+    ("next_heading", r'\b(?:next|following|skip(?: this| the)?)\s+(?P<kind>chapter|section)\b', 80),
+    ("previous_heading", r'\b(?:previous|last|prior|go back a)\s+(?P<kind>chapter|section)\b', 80),
+    ("seek_percent", r'\b(?:go|jump|skip|move|read|start|begin)(?: ahead| back| reading)?(?: to| from| at)?\s+(?P<percent>\d{1,3})\s*(?:%|percent)', 80),
+
+    ("next_match", r'\b(?:next|following) (?:match|result|hit|occurrence)\b', 78),
+    # Only as the whole request: "search next steps" is a search
+    ("next_match", r'\b(?:find|search) (?:next|again)$', 78),
+    ("previous_match", r'\b(?:previous|last|prior) (?:match|result|hit|occurrence)\b', 78),
+    ("previous_match", r'\b(?:find|search) previous$', 78),
+    ("find", r'\b(?:find|search(?: for)?|look for|where does it (?:say|mention))\s+(?P<query>\S.*)', 75),
+
+    ("list", phrases("list", "files", "documents", "what can i read", "what can you read"), 70),
+
+    ("load", phrases("load", "open"), LOAD_PRIORITY),
+
+    ("extract", phrases("extract", "show", "display"), 50),
+    ("read", leading(r'read|start|begin'), 40),
+    ("continue", leading(r'continue|go on|keep going|keep reading'), 40),
+    ("continue", command(r'next|more|next part|read more'), 40),
+    ("repeat", phrases("repeat", "again", "repeat that", "say that again", "one more time"), 45),
+    ("previous", phrases("previous", "go back", "previous part", "read that back"), 45),
+    ("previous", r'^back\b', 45),
+    ("pause", phrases("pause", "hold on"), 40),
+    ("resume", phrases("resume", "carry on"), 40),
+    ("stop", phrases("stop", "close", "stop reading"), 40),
+    ("stop", r'^(?:the )?end\b', 40),
+    ("summary", r'\bsummar(?:y|ies|ize|ise|ising|izing)\b', 55),
+]
+
+
+class Intent:
+    def __init__(self, name, slots=None, priority=0, span=(0, 0)):
+        self.name = name
+        self.slots = slots or {}
+        self.priority = priority
+        self.span = span
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    def __init__(self, routes=()):
+        self._routes = []      # (intent, pattern, priority) in insertion order
+        self._regex = None
+        self._slot_names = []
+        self._group_route = {}  # route group name -> index in _routes
+        for route in routes:
+            self.add(*route)
+
+    def add(self, intent, pattern, priority=0):
+        self._routes.append((intent, pattern, priority))
+        self._regex = None
+
+    def _compile(self):
+        # Higher priorities first, so at any one position "next chapter" is
+        # tried before plain "next"
+        order = sorted(range(len(self._routes)), key=lambda i: -self._routes[i][2])
+        parts = []
+        self._slot_names = [[] for _ in self._routes]
+        self._group_route = {f"r{i}": i for i in order}
+        for i in order:
+            _, pattern, _ = self._routes[i]
+            slots = self._slot_names[i]
+
+            def rename(m, i=i, slots=slots):
+                slots.append(m.group(1))
+                return f"(?P<r{i}_{m.group(1)}>"
+
+            # The shared word-start check below stands in for a leading \b
+            if pattern.startswith(r'\b'):
+                pattern = pattern[2:]
+            parts.append(f"(?P<r{i}>{SLOT.sub(rename, pattern)})")
+        # Every route starts at a word, so one check up front lets the scan
+        # skip mid-word and word-end positions without trying each
+        # alternative there
+        self._regex = re.compile(r"\b(?=\w)(?:" + "|".join(parts) + ")")
+
+    def route(self, text):
+        # Best Intent for the utterance, or None when no command phrase is present
+        if self._regex is None:
+            self._compile()
+        text = text.strip().lower()
+
+        best = None
+        best_index = None
+        best_priority = None
+        routes = self._routes
+        group_route = self._group_route
+        for m in self._regex.finditer(text):
+            # The route group encloses its slot groups, so it closes last
+            i = group_route[m.lastgroup]
+            if best is None or routes[i][2] > best_priority:
+                best = m
+                best_index = i
+                best_priority = routes[i][2]
+
+        if best is None:
+            return None
+        intent, _, priority = self._routes[best_index]
+        slots = {}
+        for name in self._slot_names[best_index]:
+            value = best.group(f"r{best_index}_{name}")
+            if value is not None:
+                slots[name] = value
+        return Intent(intent, slots, priority, best.span())
@@ -0,0 +1,230 @@
+import os
+import re
+import mmap
+from array import array
+
+from outline import Outline
+from reader import ChunkTable, BASE_CHUNK_CHARS
+from document_model import WORDS_PER_PAGE
+
+# Reading mode for very large plain-text files.
+# The file is memory-mapped instead of loaded as a str, and indexed in one
+# streaming pass of fixed-size blocks: paragraph starts and the reading
+# chunk table, as byte offsets in compact arrays. Reading, extraction and progress
+# decode only the slices they use, so memory stays at the index, about 2%
+# of the file. Chunks keep a fixed size here rather than scaling with the
+# speaking rate, which would take another pass over the file per speed.
+
+LARGE_TEXT_BYTES = int(os.getenv("LEARNOUTLOUD_LARGE_TEXT_MB", "64")) * 1024 * 1024
+BLOCK_BYTES = 4 * 1024 * 1024
+MAX_SLICE_BYTES = 64 * 1024     # most text one extract decodes
+OVERLAP = 256                   # bytes rescanned across a block boundary
+
+# sentences.SENTENCE_END over UTF-8 bytes (danda, double danda, ellipsis). Every
+# match starts with one of a few bytes, which lets the regex engine skip ahead
+SENTENCE_END = re.compile(
+    rb'[.!?\n\xe0\xe2](?:(?<=[.!?])|(?<=\xe0)\xa5[\xa4\xa5]|(?<=\xe2)\x80\xa6|(?<=\n)(?=\s*\n))["\')\]]*\s+'
+)
+PARA_BREAK = re.compile(rb'\n\s*\n+')
+SENTENCE_WINDOW = 160           # bytes before a chunk limit searched for a sentence end first
+
+
+def is_large_text(path, threshold=LARGE_TEXT_BYTES):
+    if not path.lower().endswith('.txt'):
+        return False
+    try:
+        return os.path.getsize(path) >= threshold
+    except OSError:
+        return False
+
+
+def decode(data):
+    return data.decode('utf-8', errors='replace')
+
+
+class MappedText:
+    # What readers of document.text use (slicing, length, truth), decoding on demand
+
+    def __init__(self, mm):
+        self._mm = mm
+
+    def __len__(self):
+        return len(self._mm)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("mapped text can only be sliced")
+        start, stop, _ = key.indices(len(self._mm))
+        return decode(self._mm[start:stop])
+
+
+class LargeTextDocument:
+    def __init__(self, path, name="", doc_type="TXT", chunk_chars=BASE_CHUNK_CHARS):
+        self.name = name
+        self.doc_type = doc_type
+        self.path = path
+        self.key = None
+        self.loader = None
+        self.retrieval = None
+        self.search = None
+        self.chunk_size = chunk_chars
+        self.whole_text = False
+        self._outline = Outline("")
+
+        with open(path, 'rb') as f:
+            self._size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.text = MappedText(self._mm)
+
+            # 32-bit offsets unless the file needs more
+            code = 'I' if self._size < 2 ** 32 else 'Q'
+            self.para_starts = array(code)
+            self.words = 0
+            table = ChunkTable(chunk_chars)
+            table.starts = array(code)
+            self._index(f, table)
+        self.chunk_tables = {chunk_chars: table}
+
+    @property
+    def length(self):
+        return self._size
+
+    @property
+    def word_count(self):
+        return self.words
+
+    def memory_size(self):
+        arrays = (self.para_starts,) + tuple(t.starts for t in self.chunk_tables.values())
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    # ── Index ────────────────────────────────────
+
+    def _index(self, f, table):
+        size, chars, starts = self._size, table.chars, table.starts
+        starts.append(0)
+        pos = 0         # start of the chunk being cut
+        base = 0        # file offset of buf[0]
+        para = 0        # where the next paragraph scan starts in buf
+        buf = b""
+
+        def cut(pos, limit):
+            # ChunkTable._cut over bytes: the last sentence end in (pos, limit], found
+            # in a short window before limit first; else the last word start; else a hard cut
+            lo = max(pos, limit - SENTENCE_WINDOW)
+            while True:
+                best = None
+                for m in SENTENCE_END.finditer(buf, lo - base, limit - base + OVERLAP):
+                    end = base + m.end()
+                    if end > limit:
+                        break
+                    if end > pos:
+                        best = end
+                if best is not None:
+                    return best
+                if lo == pos:
+                    break
+                lo = pos
+            space = max(buf.rfind(b' ', pos - base, limit - base),
+                        buf.rfind(b'\n', pos - base, limit - base))
+            if space >= 0:
+                return base + space + 1
+            while limit > pos + 1 and buf[limit - base] & 0xC0 == 0x80:
+                limit -= 1
+            return limit
+
+        while True:
+            data = f.read(BLOCK_BYTES)
+            self.words += data.count(b' ') + data.count(b'\n')
+
+            buf += data
+            eof = not data or base + len(buf) >= size
+
+            for m in PARA_BREAK.finditer(buf, para):
+                if m.end() == len(buf) and not eof:
+                    break       # the blank lines may continue in the next block
+                para = m.end()
+                if base + para >= size:
+                    break
+                if not self.para_starts and not buf[:m.start()].strip():
+                    continue    # only whitespace before the first break
+                if not self.para_starts:
+                    self.para_starts.append(0)
+                self.para_starts.append(base + para)
+
+            # A cut looks up to OVERLAP bytes past its limit to see where a sentence end stops
+            ready = size if eof else base + len(buf) - OVERLAP
+            while pos + chars < size and pos + chars <= ready:
+                pos = cut(pos, pos + chars)
+                starts.append(pos)
+            if eof:
+                break
+
+            keep = min(pos - base, para)
+            buf = buf[keep:]
+            base += keep
+            para -= keep
+
+        table.end = size
+        table.final = True
+        if not self.para_starts:
+            self.para_starts.append(0)
+        tail = self.para_starts[-1]
+        if len(self.para_starts) > 1 and size - tail < OVERLAP and not self._mm[tail:size].strip():
+            self.para_starts.pop()
+
+    # ── Pages ────────────────────────────────────
+
+    def has_page(self, num):
+        return False
+
+    def page_text(self, num):
+        return None
+
+    def page_at(self, offset):
+        return None
+
+    def page_start(self, num):
+        return None
+
+    def approx_page_start(self, num, words_per_page=WORDS_PER_PAGE):
+        # Pages of about words_per_page words, by the file's average word length
+        offset = int((num - 1) * words_per_page * self._size / max(1, self.words))
+        if offset <= 0:
+            return 0
+        if offset >= self._size:
+            return None
+        j = self._mm.find(b'\n', offset, offset + MAX_SLICE_BYTES)
+        if j == -1:
+            j = self._mm.find(b' ', offset)
+        return j + 1 if 0 <= j < self._size - 1 else None
+
+    def approx_pages(self, start, end, words_per_page=WORDS_PER_PAGE):
+        first = self.approx_page_start(max(1, start), words_per_page)
+        if first is None:
+            return ""
+        stop = self.approx_page_start(end + 1, words_per_page) or self._size
+        return " ".join(self.text[first:min(stop, first + MAX_SLICE_BYTES)].split())
+
+    # ── Paragraphs and headings ──────────────────
+
+    def paragraph_count(self):
+        return len(self.para_starts)
+
+    def paragraphs(self, start, stop):
+        starts = self.para_starts
+        result = []
+        for i in range(start, min(stop, len(starts))):
+            end = starts[i + 1] if i + 1 < len(starts) else self._size
+            result.append(self.text[starts[i]:min(end, starts[i] + MAX_SLICE_BYTES)].strip())
+        return result
+
+    def first_paragraphs(self, count):
+        return self.paragraphs(0, count)
+
+    def last_paragraphs(self, count):
+        return self.paragraphs(max(0, len(self.para_starts) - count), len(self.para_starts))
+
+    @property
+    def outline(self):
+        # Outline search needs the whole text; mapped files have none
+        return self._outline
@@ -0,0 +1,159 @@
+import os
+import asyncio
+import importlib.util
+
+# Async LLM access for /talk.
+# One AsyncGroq client (and so one pooled HTTP connection set) is shared by
+# every request, a semaphore caps how many completions are in flight, and
+# each call has a hard timeout that includes time spent waiting for a slot.
+# Set GROQ_BASE_URL to point the client at a local stand-in server.
+# groq and httpx are imported when the first completion is requested, not
+# at startup.
+
+GROQ_INSTALLED = all(importlib.util.find_spec(m) is not None for m in ("groq", "httpx"))
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+LLM_TIMEOUT = float(os.getenv("LEARNOUTLOUD_LLM_TIMEOUT", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LEARNOUTLOUD_LLM_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LEARNOUTLOUD_LLM_CONNECTIONS", "20"))
+
+
+class LLMReply:
+    # A reply that still needs a completion: /talk waits for all of it,
+    # /talk/stream speaks it sentence by sentence as tokens arrive
+    # context: key of the document the answer depends on ("" for none); None keeps it out of the answer cache
+    def __init__(self, messages, temperature=0.7, max_tokens=400, fallback="", label="LLM error", context=None):
+        self.messages = messages
+        self.context = context
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.fallback = fallback
+        self.label = label
+
+
+class LLMClient:
+    def __init__(self, api_key, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._client = None
+        # Without a key every call would fail; callers check `available` instead
+        self._failed = not GROQ_INSTALLED or not api_key
+
+    @property
+    def available(self):
+        return not self._failed
+
+    @property
+    def client(self):
+        # Built on first use; None if groq is missing or the client cannot be created
+        if self._client is None and not self._failed:
+            try:
+                import httpx
+                from groq import AsyncGroq
+                self._client = AsyncGroq(
+                    api_key=self.api_key,
+                    base_url=os.getenv("GROQ_BASE_URL") or None,
+                    timeout=self.timeout,
+                    max_retries=1,
+                    http_client=httpx.AsyncClient(
+                        timeout=self.timeout,
+                        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                            max_keepalive_connections=LLM_MAX_CONNECTIONS)
+                    )
+                )
+            except Exception as e:
+                print("LLM client unavailable:", e)
+                self._failed = True
+        return self._client
+
+    async def _create(self, **kwargs):
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            return await self.client.chat.completions.create(**kwargs)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def complete(self, messages, model=DEFAULT_MODEL, temperature=0.7, max_tokens=400):
+        try:
+            r = await asyncio.wait_for(
+                self._create(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens),
+                self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        self.completed += 1
+        return r.choices[0].message.content.strip()
+
+    async def stream(self, messages, model=DEFAULT_MODEL, temperature=0.7, max_tokens=400):
+        # Yields content deltas as they arrive; the slot is held until the stream ends
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            chunks = await asyncio.wait_for(
+                self.client.chat.completions.create(model=model, messages=messages, temperature=temperature,
+                                                    max_tokens=max_tokens, stream=True),
+                max(0.0, deadline - loop.time())
+            )
+            iterator = chunks.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+
+    def stats(self):
+        return {
+            "available": self.available,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "errors": self.errors
+        }
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+# Per-stage request timing.
+# Each /talk request opens a Trace held in a context variable, so spans
+# opened anywhere below it (routing, file matching, extraction,
+# smart_extract, retrieval, the LLM call) attach to it without passing it
+# around; asyncio tasks and to_thread calls inherit it. Spans and finished
+# requests also go into fixed-bucket histograms, rendered on /metrics in
+# the Prometheus text format. Requests slower than LEARNOUTLOUD_SLOW_MS
+# are kept with their span breakdown. A span costs two perf_counter calls,
+# a bisect and a short lock.
+
+METRICS_ENABLED = os.getenv("LEARNOUTLOUD_METRICS", "1") != "0"
+SLOW_MS = float(os.getenv("LEARNOUTLOUD_SLOW_MS", "0"))     # 0 turns the slow-request log off
+SLOW_KEEP = 50
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CHARS_BUCKETS = (100, 300, 1000, 3000, 10000, 30000, 100000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        self._series = {}       # label values -> [count per bucket..., overflow, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, counts in sorted(series.items()):
+            total = 0
+            for le, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                bound = 'le="%s"' % le
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, bound)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {counts[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {total}")
+        return lines
+
+
+class Metrics:
+    def __init__(self, enabled=METRICS_ENABLED, slow_ms=SLOW_MS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.stage_seconds = Histogram(
+            "learnoutloud_stage_seconds", "Time spent in each stage of a request.", ("stage",))
+        self.request_seconds = Histogram(
+            "learnoutloud_request_seconds", "Whole request time by endpoint and command.", ("endpoint", "intent"))
+        self.response_chars = Histogram(
+            "learnoutloud_response_chars", "Reply length in characters.", ("endpoint",), CHARS_BUCKETS)
+        self.slow = deque(maxlen=SLOW_KEEP)
+        self._gauges = []       # (name, help, kind, read)
+
+    def gauge(self, name, help, read, kind="gauge"):
+        # read() is called at scrape time; kind "counter" for values that only grow
+        self._gauges.append((name, help, kind, read))
+
+    def render(self):
+        lines = []
+        for histogram in (self.stage_seconds, self.request_seconds, self.response_chars):
+            lines += histogram.render()
+        for name, help, kind, read in self._gauges:
+            try:
+                value = read()
+            except Exception as e:
+                print("Metric failed:", name, repr(e))
+                continue
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def record(self, trace):
+        total = time.perf_counter() - trace.start
+        self.request_seconds.observe(total, trace.endpoint, trace.intent)
+        self.response_chars.observe(trace.chars, trace.endpoint)
+        if self.slow_ms and total * 1000 >= self.slow_ms:
+            entry = {
+                "time": round(time.time(), 3),
+                "endpoint": trace.endpoint,
+                "intent": trace.intent,
+                "ms": round(total * 1000, 1),
+                "chars": trace.chars,
+                "spans": [[stage, round(seconds * 1000, 2)] for stage, seconds in trace.spans]
+            }
+            self.slow.append(entry)
+            print("Slow request:", json.dumps(entry))
+
+
+metrics = Metrics()
+_current = ContextVar("learnoutloud_trace", default=None)
+
+
+class Trace:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.intent = "none"
+        self.chars = 0
+        self.spans = []         # (stage, seconds) in the order they finished
+        self.start = time.perf_counter()
+        self._token = None
+        self._done = False
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+
+    def attach(self):
+        # For async generators that outlive the endpoint; the response task ends with the request
+        _current.set(self)
+
+    def finish(self, reply=""):
+        if self._done or not metrics.enabled:
+            return
+        self._done = True
+        self.chars += len(reply)
+        metrics.record(self)
+
+
+def tag(intent):
+    # Name the command the current request turned out to be
+    trace = _current.get()
+    if trace is not None:
+        trace.intent = intent
+
+
+class span:
+    # with span("routing"): ...
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not metrics.enabled:
+            return
+        elapsed = time.perf_counter() - self.start
+        metrics.stage_seconds.observe(elapsed, self.stage)
+        trace = _current.get()
+        if trace is not None:
+            trace.spans.append((self.stage, elapsed))
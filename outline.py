@@ -0,0 +1,133 @@
+import re
+from bisect import bisect_left
+
+# Document outline built in one regex walk over the text: named sections
+# (abstract / introduction / conclusion in English, Hindi and Telugu),
+# docx [HEADING] lines, numbered headings like "3.2 Gradient Descent"
+# and "Chapter 3" lines. Lookups afterwards are dictionary hits.
+
+SECTION_KEYWORDS = {
+    'abstract':     ['abstract', 'अमूर्त', 'సారాంశం'],
+    'introduction': ['introduction', 'intro', 'परिचय', 'పరిచయం'],
+    'conclusion':   ['conclusion', 'conclusions', 'निष्कर्ष', 'సారాంశం'],
+}
+
+# A section runs until a line starting with one of these
+TERMINATORS = r'abstract|introduction|conclusion|references|bibliography|appendix|\[Page|\d+\.\d+'
+
+HEADING = (
+    r'\[HEADING\][^\n]*'
+    r'|[ \t]*chapter[ \t]+\d+\b[^\n]{0,100}(?=\n|\Z)'
+    r'|[ \t]*\d+(?:\.\d+)+\.?[ \t]+(?-i:[^\W\d_a-z])[^\n]{0,100}(?=\n|\Z)'
+)
+
+_KEYWORDS = sorted({k for words in SECTION_KEYWORDS.values() for k in words}, key=len, reverse=True)
+
+_SCAN = re.compile(
+    r'(?P<kw>' + '|'.join(map(re.escape, _KEYWORDS)) + r')'
+    r'|(?:\A|\n)(?=\s*(?:' + TERMINATORS + r')|' + HEADING + r')'
+    r'(?:(?=(?P<term>\s*(?:' + TERMINATORS + r'))))?'
+    r'(?:(?=(?P<head>' + HEADING + r')))?',
+    re.I
+)
+
+# A [HEADING] line's text can carry its own number: "Chapter 2 ...", "3.2 ...", "1. ..."
+_HEADING_PARTS = re.compile(
+    r'\s*(?:\[HEADING\]\s*)?(?:chapter\s+(\d+)\b[:.]?|(\d+(?:\.\d+)+|\d{1,3}(?=[.\s]))\.?)?\s*(.*)', re.I)
+
+APPROX_LINES = 35
+
+
+class Heading:
+    def __init__(self, start, end, level, number, title):
+        self.start = start
+        self.end = end
+        self.level = level
+        self.number = number
+        self.title = title
+
+
+class Outline:
+    def __init__(self, text):
+        self.text = text
+        self.first_keyword = {}      # section name -> offset of its first keyword
+        self.terminators = []        # offsets of "\n" that start a terminator line
+        self.headings = []
+        self.by_number = {}
+        self.by_title = {}
+        self._scan()
+
+    def _scan(self):
+        owners = {}
+        for name, words in SECTION_KEYWORDS.items():
+            for w in words:
+                owners.setdefault(w, []).append(name)
+
+        found = []
+        for m in _SCAN.finditer(self.text):
+            kw = m.group('kw')
+            if kw is not None:
+                for name in owners.get(kw.lower(), ()):
+                    self.first_keyword.setdefault(name, m.start())
+                continue
+            if m.group('term') is not None and m.end() > m.start():
+                self.terminators.append(m.start())
+            head = m.group('head')
+            if head is not None:
+                found.append((m.end(), head))
+
+        for start, line in found:
+            parts = _HEADING_PARTS.match(line)
+            chapter, number, title = parts.groups()
+            if chapter:
+                level, number = 1, chapter
+            elif number:
+                level = number.count('.') + 1
+            else:
+                level = 1
+            self.headings.append(Heading(start, len(self.text), level, number, title.strip()))
+
+        # A heading runs until the next heading at the same or a higher level
+        open_headings = []
+        for h in self.headings:
+            while open_headings and open_headings[-1].level >= h.level:
+                open_headings.pop().end = h.start
+            open_headings.append(h)
+
+        for i, h in enumerate(self.headings):
+            if h.number:
+                self.by_number.setdefault(h.number, i)
+            if h.title:
+                self.by_title.setdefault(h.title.lower(), i)
+
+    def section(self, name):
+        # (text, exact) for a named section, or None when the keyword never appears
+        start = self.first_keyword.get(name)
+        if start is None:
+            return None
+
+        i = bisect_left(self.terminators, start)
+        if i < len(self.terminators):
+            return self.text[start:self.terminators[i]], True
+
+        # No terminator after it: the keyword's line and the lines that follow
+        line_start = self.text.rfind('\n', 0, start) + 1
+        end = line_start
+        for _ in range(APPROX_LINES):
+            nl = self.text.find('\n', end)
+            if nl == -1:
+                end = len(self.text)
+                break
+            end = nl + 1
+        return self.text[line_start:end].rstrip('\n'), False
+
+    def heading(self, key):
+        # Look a heading up by number ("3", "3.2") or by its title
+        key = key.strip().lower()
+        i = self.by_number.get(key)
+        if i is None:
+            i = self.by_title.get(key)
+        return None if i is None else self.headings[i]
+
+    def heading_text(self, heading):
+        return self.text[heading.start:heading.end]
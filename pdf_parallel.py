@@ -0,0 +1,90 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Page-parallel PDF text extraction.
+# page.extract_text() is CPU-bound, so page ranges are spread over a process
+# pool and handed back in page order. Small files stay serial, where the cost
+# of shipping work to other processes would outweigh the gain.
+# Workers are spawned, not forked: the pool is created from request and
+# ingest threads, and a fork taken while another thread holds a lock (the
+# logging, import or cache locks) leaves that lock held in the child forever.
+
+PDF_WORKERS = int(os.getenv("LEARNOUTLOUD_PDF_WORKERS", "0")) or (os.cpu_count() or 1)
+PARALLEL_MIN_PAGES = int(os.getenv("LEARNOUTLOUD_PARALLEL_MIN_PAGES", "40"))
+MIN_PAGES_PER_TASK = 8
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+# Worker-side reader, reused while a worker keeps getting ranges of the same file
+_worker_reader = (None, None)
+
+
+def open_pdf(path):
+    # PyPDF2 is imported with the first PDF opened, not at startup
+    import PyPDF2
+    return PyPDF2.PdfReader(path)
+
+
+def _extract_range(path, start, end):
+    # Runs in a worker process: every worker opens its own reader
+    global _worker_reader
+    key = (path, os.stat(path).st_mtime_ns)
+    if _worker_reader[0] != key:
+        _worker_reader = (key, open_pdf(path))
+    reader = _worker_reader[1]
+    return [(reader.pages[i].extract_text() or "").strip() for i in range(start, end)]
+
+
+def _get_pool(workers):
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = workers
+        return _pool
+
+
+def page_ranges(start, total, workers):
+    # A few tasks per worker keeps the pool busy when some pages are heavier
+    count = total - start
+    size = max(MIN_PAGES_PER_TASK, -(-count // (workers * 4)))
+    return [(a, min(a + size, total)) for a in range(start, total, size)]
+
+
+def iter_pdf_pages(path, start=0, total=None, workers=None):
+    # Yields (page_number, text) in page order, starting at page index `start`
+    workers = workers or PDF_WORKERS
+    reader = None
+    if total is None:
+        reader = open_pdf(path)
+        total = len(reader.pages)
+
+    if workers <= 1 or total - start < PARALLEL_MIN_PAGES:
+        reader = reader or open_pdf(path)
+        for i in range(start, total):
+            yield i + 1, (reader.pages[i].extract_text() or "").strip()
+        return
+
+    pool = _get_pool(workers)
+    futures = [pool.submit(_extract_range, path, a, b) for a, b in page_ranges(start, total, workers)]
+    try:
+        page = start
+        for fut in futures:
+            for content in fut.result():
+                page += 1
+                yield page, content
+    finally:
+        # Stopped early (cancelled load or error): drop work nobody will read
+        for fut in futures:
+            fut.cancel()
+
+
+def extract_pdf_pages(path, workers=None):
+    blocks = [f"[Page {i}]\n{content}" for i, content in iter_pdf_pages(path, workers=workers)]
+    return "\n\n".join(blocks).strip()
@@ -0,0 +1,85 @@
+import os
+import threading
+from pdf_parallel import iter_pdf_pages, open_pdf
+
+# Progressive PDF loading: the first pages are extracted up front so the
+# document can be read right away, the rest stream in from a background thread.
+
+FIRST_PAGES = int(os.getenv("LEARNOUTLOUD_FIRST_PAGES", "5"))
+WAIT_TIMEOUT = float(os.getenv("LEARNOUTLOUD_PAGE_WAIT", "30"))
+
+
+class ProgressivePdf:
+    def __init__(self, path, first_pages=FIRST_PAGES, on_done=None):
+        self.path = path
+        self.first_pages = first_pages
+        self.on_done = on_done
+        self.pages = []          # "[Page N]\n..." blocks, in page order
+        self.length = 0          # length of text() so far
+        self.total_pages = 0
+        self.done = False
+        self.error = None
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        reader = open_pdf(self.path)
+        self.total_pages = len(reader.pages)
+
+        for i in range(min(self.first_pages, self.total_pages)):
+            self._add_page(i + 1, reader.pages[i].extract_text() or "")
+
+        if len(self.pages) >= self.total_pages:
+            self._finish()
+        else:
+            threading.Thread(target=self._extract_rest, daemon=True).start()
+        return self
+
+    def _add_page(self, number, content):
+        block = f"[Page {number}]\n{content.strip()}"
+        with self._cond:
+            self.length += len(block) + (2 if self.pages else 0)
+            self.pages.append(block)
+            self._cond.notify_all()
+
+    def _extract_rest(self):
+        try:
+            # The rest of the book goes through the page-parallel extractor
+            for number, content in iter_pdf_pages(self.path, start=len(self.pages), total=self.total_pages):
+                if self._cancelled:
+                    break
+                self._add_page(number, content)
+        except Exception as e:
+            self.error = f"Error reading PDF: {str(e)}"
+            print("Background PDF extraction failed:", e)
+        self._finish()
+
+    def _finish(self):
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+        if self.on_done and not self._cancelled and not self.error:
+            self.on_done(self)
+
+    def cancel(self):
+        self._cancelled = True
+
+    def text(self):
+        with self._cond:
+            return "\n\n".join(self.pages).strip()
+
+    def pages_ready(self):
+        with self._cond:
+            return len(self.pages)
+
+    def wait_for_page(self, page_number, timeout=WAIT_TIMEOUT):
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done or len(self.pages) >= page_number, timeout)
+
+    def wait_for_length(self, length, timeout=WAIT_TIMEOUT):
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done or self.length >= length, timeout)
+
+    def wait_until_done(self, timeout=WAIT_TIMEOUT):
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
@@ -0,0 +1,132 @@
+import os
+from array import array
+from bisect import bisect_right
+
+# Reading cursor over sentence-aligned chunks.
+# A document gets one chunk table per chunk size: the start offset of every
+# chunk, cut at the sentence starts indexed when the text was loaded. Chunk
+# size is BASE_CHUNK_CHARS times the speaking rate, so a chunk takes about
+# the same time to speak at any speed. The cursor remembers which chunk
+# starts at the reading position, so next, previous and repeat are O(1);
+# percent and page seeks bisect the table once. After each chunk the next
+# one is sliced ahead of time, so "continue" only hands it over.
+
+BASE_CHUNK_CHARS = int(os.getenv("LEARNOUTLOUD_CHUNK_CHARS", "650"))
+MIN_CHUNK_CHARS = 200
+
+
+def chunk_chars(rate):
+    # Quantized to 0.1x so sessions at similar speeds share a table
+    return max(MIN_CHUNK_CHARS, int(BASE_CHUNK_CHARS * round(rate, 1)))
+
+
+class ChunkTable:
+    def __init__(self, chars):
+        self.chars = chars
+        self.starts = array('I')
+        self.end = 0            # end of the last chunk; the table covers [0, end)
+        self.final = False      # covers the whole text and the text is complete
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _cut(self, document, pos):
+        # End of the chunk starting at pos: the last sentence start that fits,
+        # else the last word start, else a hard cut. None if the text ends first
+        limit = pos + self.chars
+        if limit >= document.length:
+            return None
+        i = bisect_right(document.sentence_starts, limit) - 1
+        if i >= 0 and document.sentence_starts[i] > pos:
+            return document.sentence_starts[i]
+        i = bisect_right(document.word_starts, limit) - 1
+        if i >= 0 and document.word_starts[i] > pos:
+            return document.word_starts[i]
+        return limit
+
+    def extend(self, document):
+        # Add the chunks that text appended since the last call made certain
+        if self.final:
+            return
+        complete = document.loader is None
+        pos = self.end
+        while pos < document.length:
+            cut = self._cut(document, pos)
+            if cut is None:
+                if not complete:
+                    break
+                cut = document.length
+            self.starts.append(pos)
+            pos = cut
+        self.end = pos
+        self.final = complete and pos >= document.length
+
+    def locate(self, offset):
+        # Chunk containing offset, or None past the end of the table
+        if offset >= self.end:
+            return None
+        return bisect_right(self.starts, offset) - 1
+
+    def span(self, i):
+        return self.starts[i], self.starts[i + 1] if i + 1 < len(self.starts) else self.end
+
+
+def chunk_table(document, rate):
+    chars = document.chunk_size or chunk_chars(rate)
+    table = document.chunk_tables.get(chars)
+    if table is None:
+        table = document.chunk_tables[chars] = ChunkTable(chars)
+    table.extend(document)
+    return table
+
+
+class ReadingCursor:
+    def __init__(self):
+        self.last = None         # (start, end) of the chunk spoken last
+        self._hint = None        # (table, chunk) starting at the reading position
+        self.prefetched = None   # (start, end, text) of the chunk after `last`
+
+    def reset(self):
+        self.last = None
+        self._hint = None
+        self.prefetched = None
+
+    def next_span(self, table, position):
+        # Chunk to speak from `position`: O(1) when reading straight on.
+        # A position inside a chunk (a heading, a page) reads to that chunk's end
+        if self._hint and self._hint[0] is table and self._hint[1] < len(table) \
+                and table.starts[self._hint[1]] == position:
+            return table.span(self._hint[1])
+        i = table.locate(position)
+        if i is None:
+            return None
+        return position, table.span(i)[1]
+
+    def previous_span(self, table):
+        if not self.last:
+            return None
+        i = table.locate(self.last[0])
+        if i is None:
+            i = len(table)
+        if i == 0:
+            return None
+        return table.span(i - 1)
+
+    def percent_position(self, table, percent, length):
+        i = table.locate(min(length - 1, max(0, int(length * percent / 100))))
+        return table.starts[i] if i is not None else None
+
+    def spoke(self, table, span, text):
+        # Record a spoken chunk and slice the one after it ahead of time
+        self.last = span
+        i = table.locate(span[1])
+        self._hint = (table, i) if i is not None and table.starts[i] == span[1] else None
+        self.prefetched = None
+        if self._hint:
+            start, end = table.span(i)
+            self.prefetched = (start, end, text[start:end].strip())
+
+    def take_prefetched(self, span):
+        if self.prefetched and self.prefetched[:2] == span:
+            return self.prefetched[2]
+        return None
@@ -0,0 +1,178 @@
+import os
+import re
+import math
+import zlib
+import threading
+import importlib.util
+
+# Local passage retrieval for document questions.
+# Passages are paragraph-aligned slices of ~800 characters, embedded as
+# hashed TF-IDF over words and word pairs (no model download, CPU only).
+# Vectors are kept sparse (CSR arrays), so memory grows with the text rather
+# than with the hash width, and a search is one numpy pass over the non-zeros.
+# The index is saved next to the parsed-document cache so a reload does not
+# re-embed. numpy is imported by the first build or load, on the index
+# thread.
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+
+HASH_BITS = 20
+PASSAGE_CHARS = 800
+TOP_K = int(os.getenv("LEARNOUTLOUD_RETRIEVAL_TOP_K", "4"))
+INDEX_SUFFIX = ".idx.npz"
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if len(t) > 1]
+
+
+def split_passages(text, limit=PASSAGE_CHARS):
+    passages = []
+    current = ""
+    for para in re.split(r'\n\s*\n+', text):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        while len(para) > limit:
+            cut = para.rfind(" ", 0, limit)
+            cut = cut if cut > limit // 2 else limit
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(para[:cut])
+            para = para[cut:].strip()
+        if current and len(current) + len(para) + 1 > limit:
+            passages.append(current)
+            current = ""
+        current = f"{current} {para}" if current else para
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+def term_weights(text):
+    # {bucket: 1 + log(tf)} for words and adjacent word pairs
+    tokens = tokenize(text)
+    counts = {}
+    mask = (1 << HASH_BITS) - 1
+    for term in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+        bucket = zlib.crc32(term.encode("utf-8")) & mask
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return {b: 1.0 + math.log(n) for b, n in counts.items()}
+
+
+class RetrievalIndex:
+    def __init__(self, passages, indptr, indices, values, terms, idf):
+        self.passages = passages
+        self.indptr = indptr      # passage i owns indices/values[indptr[i]:indptr[i + 1]]
+        self.indices = indices    # bucket ids, sorted within each passage
+        self.values = values      # tf-idf weights, each passage L2-normalized
+        self.terms = terms        # sorted buckets seen in the document
+        self.idf = idf            # idf of each entry in terms
+
+    @classmethod
+    def build(cls, text):
+        _import_numpy()
+        passages = []
+        rows = []
+        for p in split_passages(text):
+            weights = term_weights(p)
+            if weights:
+                passages.append(p)
+                rows.append(weights)
+
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((b for r in rows for b in sorted(r)), dtype=np.int32, count=int(indptr[-1]))
+        values = np.fromiter((r[b] for r in rows for b in sorted(r)), dtype=np.float32, count=int(indptr[-1]))
+
+        terms, df = np.unique(indices, return_counts=True)
+        idf = np.log((1 + len(rows)) / (1 + df)).astype(np.float32)
+        values *= idf[np.searchsorted(terms, indices)]
+
+        if len(rows):
+            norms = np.sqrt(np.add.reduceat(values * values, indptr[:-1]))
+            values /= np.repeat(np.maximum(norms, 1e-9), lengths)
+        return cls(passages, indptr, indices, values, terms, idf)
+
+    def _query_vector(self, query):
+        # Dense over the document's terms; words the document never uses are dropped
+        q = np.zeros(len(self.terms), dtype=np.float32)
+        for bucket, weight in term_weights(query).items():
+            i = np.searchsorted(self.terms, bucket)
+            if i < len(self.terms) and self.terms[i] == bucket:
+                q[i] = weight * self.idf[i]
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def search(self, query, k=TOP_K, min_score=0.08):
+        # [(passage, cosine score), ...] best first
+        if not self.passages:
+            return []
+        q = self._query_vector(query)
+        if not q.any():
+            return []
+        contrib = self.values * q[np.searchsorted(self.terms, self.indices)]
+        scores = np.add.reduceat(contrib, self.indptr[:-1])
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.passages[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def memory_size(self):
+        arrays = (self.indptr, self.indices, self.values, self.terms, self.idf)
+        return sum(a.nbytes for a in arrays) + sum(len(p) for p in self.passages)
+
+    def save(self, path):
+        blob = "\0".join(self.passages).encode("utf-8")
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, indptr=self.indptr, indices=self.indices, values=self.values,
+                 terms=self.terms, idf=self.idf, blob=np.frombuffer(blob, dtype=np.uint8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        _import_numpy()
+        with np.load(path) as data:
+            blob = data["blob"].tobytes().decode("utf-8")
+            return cls(blob.split("\0") if blob else [], data["indptr"], data["indices"],
+                       data["values"], data["terms"], data["idf"])
+
+
+class IndexBuilder:
+    # Builds (or loads) a document's index on a background thread
+    def __init__(self, text_source, path=None):
+        self.index = None
+        self.ready = threading.Event()
+        self._text_source = text_source
+        self._path = path
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            if self._path:
+                try:
+                    self.index = RetrievalIndex.load(self._path)
+                    return
+                except (OSError, ValueError, KeyError):
+                    pass
+            self.index = RetrievalIndex.build(self._text_source())
+            if self._path:
+                try:
+                    self.index.save(self._path)
+                except OSError as e:
+                    print("Retrieval index save failed:", e)
+        except Exception as e:
+            print("Retrieval index build failed:", repr(e))
+        finally:
+            self.ready.set()
@@ -0,0 +1,112 @@
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+
+# Positional inverted index for "find" in a loaded document.
+# Each word of the text gets a number in reading order; the index maps
+# every normalized word to the ascending numbers where it occurs, and keeps
+# each word's [start, end) offsets in the text. A word query is one dict
+# lookup; a phrase takes the positions of its rarest word and keeps those
+# where the other words follow in place, so neither scans the text.
+# Words are runs of letters, digits and combining marks: plain \w stops at
+# Devanagari and Telugu vowel signs and viramas, cutting words in pieces.
+# They are compared casefolded and NFC-normalized. "[Page N]" and
+# "[HEADING]" markers are not words, so phrases run across page breaks.
+# Text is indexed incrementally, like the document's other offset tables.
+
+MARKUP = r'\[(?:Page\s*\d+|HEADING)\]'
+TOKEN = None
+
+
+def _compile_tokens():
+    # The combining-mark class takes a pass over the BMP, so it is built on first use
+    global TOKEN
+    if TOKEN is None:
+        marks = "".join(chr(c) for c in range(0x300, 0x10000) if unicodedata.category(chr(c)) in ("Mn", "Mc", "Me"))
+        TOKEN = re.compile(rf'({MARKUP})|[\w{re.escape(marks)}]+')
+    return TOKEN
+
+
+def normalize(word):
+    word = word.casefold()
+    return word if word.isascii() else unicodedata.normalize("NFC", word)
+
+
+def tokenize(text):
+    return [normalize(m.group()) for m in _compile_tokens().finditer(text) if not m.group(1)]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}          # word -> array of word numbers, ascending
+        self.starts = array('I')    # word number -> offset of the word
+        self.ends = array('I')      # word number -> offset just past it
+        self.indexed = 0            # text before this offset is indexed
+        self._posting_bytes = 0     # words and posting entries, kept up to date by update()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def update(self, text):
+        # Index text appended since the last call; parts are joined by a blank line, so no word spans two calls
+        with self._lock:
+            if len(text) <= self.indexed:
+                return
+            postings = self.postings
+            n = len(self.starts)
+            added = n
+            new_words = 0
+            starts, ends = [], []
+            for m in _compile_tokens().finditer(text, self.indexed):
+                if m.group(1):
+                    continue
+                word = normalize(m.group())
+                posting = postings.get(word)
+                if posting is None:
+                    posting = postings[word] = array('I')
+                    new_words += sys.getsizeof(word)
+                posting.append(n)
+                starts.append(m.start())
+                ends.append(m.end())
+                n += 1
+            self.starts.extend(starts)
+            self.ends.extend(ends)
+            self.indexed = len(text)
+            self._posting_bytes += new_words + self.starts.itemsize * (n - added)
+
+    def update_in_background(self, text):
+        threading.Thread(target=self.update, args=(text,), daemon=True).start()
+
+    def find(self, query):
+        # (word numbers where the query starts, words in the query)
+        words = tokenize(query)
+        if not words:
+            return array('I'), 0
+        with self._lock:
+            lists = [self.postings.get(w) for w in words]
+            if not all(lists):
+                return array('I'), len(words)
+            if len(lists) == 1:
+                return array('I', lists[0]), 1
+            # Candidates from the rarest word, narrowed by each other word in turn
+            order = sorted(range(len(lists)), key=lambda j: len(lists[j]))
+            k = order[0]
+            hits = [p - k for p in lists[k] if p >= k]
+            for j in order[1:]:
+                if not hits:
+                    break
+                found = set(lists[j])
+                hits = [h for h in hits if h + j in found]
+            return array('I', hits), len(words)
+
+    def span(self, hit, length):
+        # Text offsets [start, end) of a hit from find()
+        return self.starts[hit], self.ends[hit + length - 1]
+
+    def memory_size(self):
+        # Counted as the index grows: callers poll this for every loaded document
+        return (sys.getsizeof(self.postings) + self._posting_bytes
+                + self.starts.itemsize * (len(self.starts) + len(self.ends)))
@@ -0,0 +1,48 @@
+import re
+
+# Sentence splitting shared by streaming replies and the reading cursor.
+# Handles ., !, ? and the Devanagari danda; very short pieces ("Dr.", "1.")
+# are merged into the next sentence so TTS gets natural phrases.
+
+SENTENCE_END = re.compile(r'(?<=[.!?।॥…])["\')\]]*\s+|\n\s*\n')
+MIN_SENTENCE = 25
+
+
+def split_sentences(text, min_chars=MIN_SENTENCE):
+    pieces = []
+    pending = ""
+    pos = 0
+    for m in SENTENCE_END.finditer(text):
+        pending += text[pos:m.end()]
+        pos = m.end()
+        if len(pending.strip()) >= min_chars:
+            pieces.append(pending.strip())
+            pending = ""
+    pending += text[pos:]
+    if pending.strip():
+        pieces.append(pending.strip())
+    return pieces
+
+
+class SentenceBuffer:
+    # Collects streamed tokens and hands back whole sentences as soon as they end
+
+    def __init__(self, min_chars=MIN_SENTENCE):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, delta):
+        self.buffer += delta
+        done = []
+        cut = 0
+        for m in SENTENCE_END.finditer(self.buffer):
+            if len(self.buffer[cut:m.end()].strip()) >= self.min_chars:
+                done.append(self.buffer[cut:m.end()].strip())
+                cut = m.end()
+        self.buffer = self.buffer[cut:]
+        return done
+
+    def flush(self):
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
@@ -1,23 +1,63 @@
 import os
 import re
+import json
+import asyncio
+import inspect
 import uvicorn
-from fastapi import FastAPI
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import partial
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, FileResponse, Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from docx import Document
-import PyPDF2
-from collections import deque
+from typing import Optional
+from doc_cache import DocumentCache
+from progressive_pdf import ProgressivePdf
+from extractors import extract_document
+from document_model import LoadedDocument
+from outline import SECTION_KEYWORDS
+from sessions import SessionStore
+from llm import LLMClient, LLMReply
+from sentences import split_sentences, SentenceBuffer
+from summarizer import Summarizer
+from intents import IntentRouter, COMMAND_ROUTES, LOAD_PRIORITY
+from folder_index import FolderIndex
+from reader import chunk_table, chunk_chars
+from tts import Synthesizer
+from ingest import Ingestor
+from large_text import LargeTextDocument, is_large_text
+from retrieval import IndexBuilder, INDEX_SUFFIX, NUMPY_AVAILABLE
+from metrics import metrics, span, tag, Trace
+from answer_cache import AnswerCache
 
-# Groq is optional
+# The Groq key comes from the environment or keys.env next to this file; variables already set win
 try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-    client = Groq(api_key="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")
-except:
-    GROQ_AVAILABLE = False
-    print("Note: Groq unavailable → summary & general chat disabled")
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "keys.env"))
+except ImportError:
+    pass
+
+# Groq is optional; one async client with a pooled connection set serves every request
+llm = LLMClient(api_key=os.getenv("GROQ_API_KEY"))
+GROQ_AVAILABLE = llm.available
+if not GROQ_AVAILABLE:
+    print("Note: Groq unavailable (groq not installed or GROQ_API_KEY unset) → summary & general chat disabled")
+
+# Map-reduce summaries over the whole document, cached by content hash
+summarizer = Summarizer(llm)
+
+# Repeated questions are answered once, from memory or by joining the call already under way
+answers = AnswerCache(llm)
+ANSWER_CACHE = os.getenv("LEARNOUTLOUD_ANSWER_CACHE", "1") != "0"
+
+# Document questions carry only the top matching passages, not the whole text
+RETRIEVAL_WAIT = float(os.getenv("LEARNOUTLOUD_RETRIEVAL_WAIT", "5"))
+if not NUMPY_AVAILABLE:
+    print("Note: numpy unavailable → document questions answered without passages")
 
 app = FastAPI()
+app.state.ready = False
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,102 +66,198 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Globals
-current_document_text = ""
-current_position = 0
-current_document_name = ""
-current_document_type = ""
+# Per-learner state (document, reading position, speech rate) by session token
+sessions = SessionStore()
 
-# Speech rate control
-speech_rate = 1.0
+DOCUMENT_FOLDER = os.path.join(os.path.expanduser("~"), "Documents")
 
-# History
-conversation_history = deque(maxlen=12)
+# Normalized names and trigrams of the folder, re-listed only when it changes
+folder_index = FolderIndex(DOCUMENT_FOLDER)
 
-DOCUMENT_FOLDER = os.path.join(os.path.expanduser("~"), "Documents")
+# Parsed-document cache (text + page boundaries), keyed by path, mtime and size
+document_cache = DocumentCache()
+
+# Uncached PDFs answer after the first pages and finish loading in the background
+PROGRESSIVE_PDF = os.getenv("LEARNOUTLOUD_PROGRESSIVE_PDF", "1") != "0"
+
+# Reading chunks are rendered to audio ahead of time when pyttsx3 or espeak is installed
+tts = Synthesizer()
+SERVER_TTS = tts.available and os.getenv("LEARNOUTLOUD_SERVER_TTS", "1") != "0"
+if not tts.available:
+    print("Note: pyttsx3/espeak unavailable → reading is spoken by the browser")
+
+# Files in the folder are extracted into the cache in the background while nobody is talking
+ingestor = Ingestor(folder_index, document_cache)
+INGEST = os.getenv("LEARNOUTLOUD_INGEST", "1") != "0"
+
+@app.middleware("http")
+async def track_interactive(request, call_next):
+    # Background ingestion pauses while learners are being answered
+    if not request.url.path.startswith(("/talk", "/audio")):
+        return await call_next(request)
+    ingestor.request_started()
+    try:
+        return await call_next(request)
+    finally:
+        ingestor.request_finished()
 
 class VoiceRequest(BaseModel):
     text: str
+    session: Optional[str] = None
 
 # ───────────────────────────────────────────────
-# Document extraction functions
+# Document extraction functions (extractors.py)
 # ───────────────────────────────────────────────
 
-def extract_pdf(path):
-    text = ""
-    try:
-        with open(path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for i, page in enumerate(reader.pages, 1):
-                content = page.extract_text() or ""
-                text += f"[Page {i}]\n{content.strip()}\n\n"
-        return text.strip()
-    except Exception as e:
-        return f"Error reading PDF: {str(e)}"
+def read_document(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ('.pdf', '.docx', '.txt'):
+        return "Unsupported file format (only pdf, docx, txt)"
+
+    cached = document_cache.get(path)
+    if cached is not None:
+        return cached["text"]
+
+    text = extract_document(path)
+    if not text.startswith("Error reading"):
+        document_cache.put(path, text)
+    return text
+
+def open_document(path):
+    # Returns (text, loader); loader is set while the rest of a PDF is still extracting
+    if not (PROGRESSIVE_PDF and path.lower().endswith('.pdf')):
+        return read_document(path), None
+
+    cached = document_cache.get(path)
+    if cached is not None:
+        return cached["text"], None
 
-def extract_docx(path):
-    text = ""
     try:
-        doc = Document(path)
-        for para in doc.paragraphs:
-            if para.text.strip():
-                if para.style.name.lower().startswith('heading'):
-                    text += f"[HEADING] {para.text}\n"
-                else:
-                    text += para.text + "\n"
-        return text.strip()
+        loader = ProgressivePdf(path, on_done=lambda l: document_cache.put(path, l.text())).start()
     except Exception as e:
-        return f"Error reading DOCX: {str(e)}"
+        return f"Error reading PDF: {str(e)}", None
 
-def extract_txt(path):
+    return loader.text(), (None if loader.done else loader)
+
+# Large text files being indexed, by cache key, so learners opening one at once share the pass
+large_text_builds = {}
+
+async def load_shared_document(path, name, doc_type):
+    # Returns (document, error); sessions opening the same file version share one document
     try:
-        with open(path, 'r', encoding='utf-8', errors='replace') as f:
-            return f.read().strip()
-    except Exception as e:
-        return f"Error reading TXT: {str(e)}"
+        key = document_cache.key_for(path)
+    except OSError as e:
+        return None, f"Error reading file: {str(e)}"
 
-def read_document(path):
-    ext = os.path.splitext(path)[1].lower()
-    if ext == '.pdf':
-        return extract_pdf(path)
-    if ext == '.docx':
-        return extract_docx(path)
-    if ext == '.txt':
-        return extract_txt(path)
-    return "Unsupported file format (only pdf, docx, txt)"
+    document = sessions.shared_document(key)
+    if document is not None:
+        return document, None
 
-# ───────────────────────────────────────────────
-# File matching
-# ───────────────────────────────────────────────
+    if is_large_text(path):
+        # Mapped and indexed rather than read into memory. The index pass
+        # takes seconds on a big file, so it runs in a thread
+        build = large_text_builds.get(key)
+        if build is None:
+            build = large_text_builds[key] = asyncio.ensure_future(
+                asyncio.to_thread(LargeTextDocument, path, name, doc_type))
+            build.add_done_callback(lambda _: large_text_builds.pop(key, None))
+        try:
+            with span("extraction"):
+                document = await asyncio.shield(build)
+        except (OSError, ValueError) as e:
+            return None, f"Error reading TXT: {str(e)}"
+        return sessions.share_document(key, document), None
+
+    with span("extraction"):
+        content, loader = open_document(path)
+    if content.startswith("Error reading"):
+        return None, content
 
-def find_matching_file(spoken: str):
-    if not os.path.exists(DOCUMENT_FOLDER):
-        return None
+    if loader:
+        document = LoadedDocument(name=name, doc_type=doc_type)
+        document.loader = loader
+        sync_document(document)
+    else:
+        document = LoadedDocument(content, name, doc_type)
+    # A progressive PDF's later pages are indexed by the first search that needs them
+    document.search.update_in_background(document.text)
+    if NUMPY_AVAILABLE:
+        def full_text():
+            # Runs on the index thread; a progressive PDF is indexed once fully extracted
+            if loader is None:
+                return document.text
+            while not loader.wait_until_done():
+                pass
+            return loader.text()
+        document.retrieval = IndexBuilder(full_text, document_cache.sidecar_path(key, INDEX_SUFFIX))
+    return sessions.share_document(key, document), None
+
+def sync_document(document):
+    # Pull newly extracted pages into the loaded document; never waits
+    loader = document.loader
+    if loader is None:
+        return
+
+    for block in loader.pages[document.parts:]:
+        document.append(block)
+    if loader.done:
+        if loader.error:
+            print(loader.error)
+        document.loader = None
+
+async def wait_for_text(document, length=None, page=None, whole=False):
+    # Make sure the text a command needs is extracted, then pull it in.
+    # A progressive PDF can take seconds to get there, so the wait runs in
+    # a thread and the event loop keeps serving other learners meanwhile
+    loader = document.loader
+    if loader is None:
+        return
+
+    if whole:
+        wait = loader.wait_until_done
+    elif page is not None:
+        wait = partial(loader.wait_for_page, page)
+    elif length is not None:
+        wait = partial(loader.wait_for_length, length)
+    else:
+        wait = None
+    if wait and not wait(timeout=0):
+        await asyncio.to_thread(wait)
+    sync_document(document)
 
-    spoken_clean = re.sub(r'[^a-z0-9]', '', spoken.lower())
-    candidates = []
+async def wait_for_paragraphs(document, count):
+    # Until the first `count` paragraphs are in; each extracted page ends a paragraph
+    sync_document(document)
+    while document.loader and document.paragraph_count() < count:
+        pages = len(document.loader.pages)
+        await wait_for_text(document, page=pages + 1)
+        if document.loader and len(document.loader.pages) == pages:
+            break   # timed out without another page
 
-    for filename in os.listdir(DOCUMENT_FOLDER):
-        if not filename.lower().endswith(('.pdf', '.docx', '.txt')):
-            continue
-        name_clean = re.sub(r'[^a-z0-9]', '', os.path.splitext(filename)[0].lower())
-        if spoken_clean in name_clean or name_clean in spoken_clean:
-            candidates.append(filename)
+# ───────────────────────────────────────────────
+# File matching
+# ───────────────────────────────────────────────
 
-    return candidates[0] if candidates else None
+def find_matching_file(spoken: str, fuzzy=True):
+    # Best-ranked file name in the utterance; fuzzy also accepts misheard names
+    with span("file_match"):
+        return folder_index.best(spoken, fuzzy=fuzzy)
 
 # ───────────────────────────────────────────────
 # Smart extraction
 # ───────────────────────────────────────────────
 
-def smart_extract(cmd_lower: str):
-    global current_document_text, current_document_name, current_document_type
+PAGE_RANGE = re.compile(r'(?:page|pages)\s*(\d+)(?:\s*(?:to|and|-|till)\s*(\d+))?')
+HEADING_REF = re.compile(r'(section|chapter)\s*(\d+(?:\.\d+)*)')
+PARAGRAPHS = re.compile(r'(first|last)\s*(\d*)\s*(paragraph|para|paragraphs)')
 
-    if not current_document_text:
+def smart_extract(session, cmd_lower: str):
+    # Expects the text it looks at extracted already (see extract_part)
+    document = session.document
+    if not session.document_text:
         return "No document is loaded. Say the filename or 'list documents' first."
 
-    text = current_document_text
-    doc_type = current_document_type.lower()
+    doc_type = document.doc_type.lower()
 
     def preview(s: str, maxlen=1400):
         s = s.strip()[:maxlen]
@@ -130,55 +266,46 @@ def smart_extract(cmd_lower: str):
         return s.replace('\n', ' ')
 
     # Page range
-    page_match = re.search(r'(?:page|pages)\s*(\d+)(?:\s*(?:to|and|-|till)\s*(\d+))?', cmd_lower)
+    page_match = PAGE_RANGE.search(cmd_lower)
     if page_match:
         start = int(page_match.group(1))
         end = int(page_match.group(2)) if page_match.group(2) else start
 
         if 'pdf' in doc_type:
-            parts = re.split(r'\[Page\s*(\d+)\]', text)
-            page_content = {}
-            for i in range(1, len(parts), 2):
-                try:
-                    page_content[int(parts[i])] = parts[i+1].strip()
-                except:
-                    pass
-
-            if start not in page_content:
+            if not document.has_page(start):
                 return f"Page {start} not found."
 
             result = ""
             for p in range(start, end + 1):
-                if p in page_content:
-                    result += f"[Page {p}]\n{page_content[p]}\n\n"
+                content = document.page_text(p)
+                if content is not None:
+                    result += f"[Page {p}]\n{content}\n\n"
             return f"Extracted page(s) {start}–{end}:\n{preview(result)}"
 
         else:
-            words = text.split()
-            wpp = 450
-            start_i = max(0, (start-1) * wpp)
-            end_i = end * wpp
-            chunk = " ".join(words[start_i:end_i])
+            chunk = document.approx_pages(start, end)
             return f"Approximate pages {start}–{end}:\n{preview(chunk)}"
 
-    # Named sections
-    sections = {
-        'abstract':     r'(?i)(abstract|अमूर्त|సారాంశం)',
-        'introduction': r'(?i)(introduction|intro|परिचय|పరిచయం)',
-        'conclusion':   r'(?i)(conclusion|conclusions|निष्कर्ष|సారాంశం)'
-    }
+    # Headings and named sections look at the whole document
+    outline = document.outline
 
-    for name, pat in sections.items():
-        if name in cmd_lower:
-            m = re.search(pat + r'[\s\S]*?(?=\n\s*(?i:(abstract|introduction|conclusion|references|bibliography|appendix|\[Page|\d+\.\d+)))', text, re.DOTALL | re.I)
-            if m:
-                return f"Extracted {name.title()}:\n{preview(m.group(0))}"
+    # Numbered sections and chapters
+    heading_match = HEADING_REF.search(cmd_lower)
+    if heading_match:
+        heading = outline.heading(heading_match.group(2))
+        if heading:
+            return f"Extracted {heading_match.group(1)} {heading.number}: {heading.title}\n{preview(outline.heading_text(heading))}"
+        return f"{heading_match.group(1).title()} {heading_match.group(2)} not found."
 
-            lines = text.splitlines()
-            for i, line in enumerate(lines):
-                if re.search(pat, line):
-                    block = "\n".join(lines[i:i+35])
-                    return f"{name.title()} (approximate):\n{preview(block)}"
+    # Named sections
+    for name in SECTION_KEYWORDS:
+        if name in cmd_lower:
+            found = outline.section(name)
+            if found:
+                block, exact = found
+                if exact:
+                    return f"Extracted {name.title()}:\n{preview(block)}"
+                return f"{name.title()} (approximate):\n{preview(block)}"
 
             if name == 'abstract':
                 return "This document doesn't seem to have a marked abstract section (common in non-research files). Would you like the first few paragraphs? Say 'extract first 5 paragraphs' or 'read'."
@@ -188,21 +315,21 @@ def smart_extract(cmd_lower: str):
                 return "No conclusion section detected. Say 'extract last 5 paragraphs' to hear the ending."
 
     # Paragraphs
-    para_match = re.search(r'(first|last)\s*(\d*)\s*(paragraph|para|paragraphs)', cmd_lower)
+    para_match = PARAGRAPHS.search(cmd_lower)
     if para_match:
         direction = para_match.group(1)
         count = int(para_match.group(2) or 3)
 
-        paras = [p.strip() for p in re.split(r'\n\s*\n+', text) if p.strip()]
-        if not paras:
+        if not document.paragraph_count():
             return "No clear paragraphs found."
 
         if direction == "first":
-            selected = paras[:count]
+            selected = document.first_paragraphs(count)
         else:
-            selected = paras[-count:]
+            selected = document.last_paragraphs(count)
 
-        return f"{direction.title()} {count} paragraph{'s' if count != 1 else ''}:\n{preview('\n\n'.join(selected))}"
+        joined = "\n\n".join(selected)
+        return f"{direction.title()} {count} paragraph{'s' if count != 1 else ''}:\n{preview(joined)}"
 
     return "Didn't understand which part to extract. Try:\n• extract page 5\n• extract abstract\n• extract first 4 paragraphs"
 
@@ -210,177 +337,845 @@ def smart_extract(cmd_lower: str):
 # Speed control
 # ───────────────────────────────────────────────
 
-def handle_speed_command(cmd_lower: str):
-    global speech_rate
+def speed_reset(session, spoken, intent):
+    session.speech_rate = 1.0
+    return "Speed set back to normal (1x)."
 
-    if any(w in cmd_lower for w in ["normal speed", "default speed", "speed 1", "1x"]):
-        speech_rate = 1.0
-        return "Speed set back to normal (1x)."
+def speed_set(session, spoken, intent):
+    rate = float(intent.slots["rate"])
+    if rate == 1.0:
+        return speed_reset(session, spoken, intent)
+    session.speech_rate = max(0.5, min(2.5, rate))
+    return f"Speed set to {session.speech_rate:.1f}x."
 
-    speed_match = re.search(r'(?:set speed to|speed|set to)\s*(\d*\.?\d*)\s*(x|times)?', cmd_lower)
-    if speed_match:
-        try:
-            new_rate = float(speed_match.group(1))
-            speech_rate = max(0.5, min(2.5, new_rate))
-            return f"Speed set to {speech_rate:.1f}x."
-        except:
-            pass
+def speed_up(session, spoken, intent):
+    session.speech_rate = min(2.5, session.speech_rate + 0.2)
+    return f"Speed increased to {session.speech_rate:.1f}x."
+
+def speed_down(session, spoken, intent):
+    session.speech_rate = max(0.5, session.speech_rate - 0.2)
+    return f"Speed decreased to {session.speech_rate:.1f}x."
 
-    if any(w in cmd_lower for w in ["increase speed", "faster", "speed up", "go faster"]):
-        speech_rate = min(2.5, speech_rate + 0.2)
-        return f"Speed increased to {speech_rate:.1f}x."
+# ───────────────────────────────────────────────
+# Cache statistics
+# ───────────────────────────────────────────────
 
-    if any(w in cmd_lower for w in ["decrease speed", "slower", "slow down", "go slower"]):
-        speech_rate = max(0.5, speech_rate - 0.2)
-        return f"Speed decreased to {speech_rate:.1f}x."
+@app.get("/cache/stats")
+async def cache_stats():
+    return document_cache.stats()
 
-    return None
+@app.get("/sessions/stats")
+async def session_stats():
+    return sessions.stats()
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return {**llm.stats(), "summaries": summarizer.stats(), "answers": answers.stats()}
+
+@app.get("/folder/stats")
+async def folder_stats():
+    return folder_index.stats()
+
+@app.get("/tts/stats")
+async def tts_stats():
+    return tts.stats()
+
+@app.get("/ingest/status")
+async def ingest_status():
+    return ingestor.status()
 
 # ───────────────────────────────────────────────
-# Main endpoint – fixed general questions
+# Health
 # ───────────────────────────────────────────────
 
-@app.post("/talk")
-async def talk(req: VoiceRequest):
-    global current_document_text, current_position, current_document_name, current_document_type, speech_rate
+@app.get("/health")
+async def health():
+    # The process is up and answering
+    return {"status": "ok"}
 
-    spoken = req.text.strip()
-    cmd = spoken.lower()
-    print(f"→ Heard: {spoken}")
+@app.get("/ready")
+async def ready():
+    # Startup has finished; the assistant launcher polls this before opening the site
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "llm": GROQ_AVAILABLE, "server_tts": SERVER_TTS, "retrieval": NUMPY_AVAILABLE}
 
-    reply_text = ""
-    response_data = {"reply": "", "rate": round(speech_rate, 2)}
+# ───────────────────────────────────────────────
+# Metrics
+# ───────────────────────────────────────────────
 
-    # 1. Speed commands
-    speed_reply = handle_speed_command(cmd)
-    if speed_reply:
-        reply_text = speed_reply
+# Read at scrape time, next to the stage and request histograms
+metrics.gauge("learnoutloud_llm_in_flight", "LLM calls in progress.", lambda: llm.in_flight)
+metrics.gauge("learnoutloud_llm_waiting", "LLM calls waiting for a slot.", lambda: llm.waiting)
+metrics.gauge("learnoutloud_answer_cache_hits_total", "Questions answered from the answer cache.", lambda: answers.hits, "counter")
+metrics.gauge("learnoutloud_answer_coalesced_total", "Questions that joined an identical call in progress.", lambda: answers.coalesced, "counter")
+metrics.gauge("learnoutloud_answer_misses_total", "Questions sent upstream.", lambda: answers.misses, "counter")
+metrics.gauge("learnoutloud_answer_seconds_saved_total", "LLM time not spent thanks to cached answers.", lambda: round(answers.seconds_saved, 3), "counter")
+metrics.gauge("learnoutloud_answer_tokens_saved_total", "Estimated LLM tokens not spent on repeated questions.", lambda: answers.tokens_saved, "counter")
+metrics.gauge("learnoutloud_sessions", "Live sessions.", lambda: sessions.stats()["sessions"])
+metrics.gauge("learnoutloud_document_cache_hits_total", "Parsed-document cache hits.", lambda: document_cache.hits, "counter")
+metrics.gauge("learnoutloud_document_cache_misses_total", "Parsed-document cache misses.", lambda: document_cache.misses, "counter")
+metrics.gauge("learnoutloud_tts_pending", "Reading chunks being rendered to audio.", lambda: tts.stats()["pending"])
+metrics.gauge("learnoutloud_ingest_remaining", "Folder files not yet in the document cache.", lambda: ingestor.status()["remaining"])
 
-    # 2. List documents
-    elif any(x in cmd for x in ["list", "files", "documents", "show"]):
-        if not os.path.exists(DOCUMENT_FOLDER):
-            reply_text = "Documents folder not found."
-        else:
-            files = [os.path.splitext(f)[0] for f in os.listdir(DOCUMENT_FOLDER)
-                     if f.lower().endswith(('.pdf','.docx','.txt'))]
-            if not files:
-                reply_text = "No supported files found."
-            else:
-                reply_text = f"Found: {', '.join(files)}. Say the name to open."
+@app.get("/metrics")
+async def metrics_text():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
-    # 3. Load document (auto or explicit)
-    elif matched := find_matching_file(spoken):
-        if any(x in cmd for x in ["load","open","read","start"]) or len(spoken.split()) <= 4:
-            path = os.path.join(DOCUMENT_FOLDER, matched)
-            content = read_document(path)
+@app.get("/metrics/slow")
+async def slow_requests():
+    # Requests over LEARNOUTLOUD_SLOW_MS with their span breakdown, oldest first
+    return list(metrics.slow)
 
-            if "error" in content.lower():
-                reply_text = content
-            else:
-                current_document_text = content
-                current_position = 0
-                current_document_name = os.path.splitext(matched)[0]
-                current_document_type = os.path.splitext(matched)[1][1:].upper()
-                words = len(content.split())
-                reply_text = f"Loaded {current_document_name} ({current_document_type}) – ~{words} words. Say read, extract abstract, extract page 3, etc."
-
-    # 4. Document-dependent commands
-    elif "extract" in cmd:
-        result = smart_extract(cmd)
-        if result:
-            reply_text = result
-
-    elif any(x in cmd for x in ["read", "start", "begin"]):
-        if not current_document_text:
-            reply_text = "No document loaded. Say a filename or 'list documents' first."
-        else:
-            current_position = 0
-            chunk = current_document_text[:650]
-            reply_text = f"Reading {current_document_name}...\n{chunk}\n\nSay continue, pause, stop."
+@app.on_event("startup")
+async def start_ingest():
+    if INGEST:
+        ingestor.start()
 
-    elif any(x in cmd for x in ["continue", "more", "next"]):
-        if not current_document_text:
-            reply_text = "No document loaded. Load one first."
-        else:
-            chunk = current_document_text[current_position:current_position+650]
-            if not chunk:
-                reply_text = f"End of {current_document_name}."
-            else:
-                current_position += 650
-                perc = round(current_position / len(current_document_text) * 100)
-                reply_text = f"{chunk}\n[Progress: {perc}%]"
+@app.on_event("startup")
+async def mark_ready():
+    app.state.ready = True
 
-    elif "pause" in cmd:
-        if current_document_text:
-            reply_text = "Paused. Say continue or resume."
-        else:
-            reply_text = "Nothing is playing right now."
+@app.on_event("shutdown")
+async def close_llm():
+    app.state.ready = False
+    await llm.aclose()
+    tts.shutdown()
+    ingestor.stop()
 
-    elif "resume" in cmd:
-        if current_document_text:
-            reply_text = "Resuming... Say continue."
-        else:
-            reply_text = "No document to resume. Load one first."
-
-    elif any(x in cmd for x in ["stop", "end", "close"]):
-        if current_document_text:
-            current_document_text = ""
-            current_position = 0
-            current_document_name = ""
-            current_document_type = ""
-            reply_text = "Document closed."
-        else:
-            reply_text = "No document is open."
-
-    # Summary (only when document is loaded)
-    elif any(x in cmd for x in ["summary", "summarize"]):
-        if not current_document_text:
-            reply_text = "No document loaded. Load one first to get a summary."
-        elif not GROQ_AVAILABLE:
-            reply_text = "Summary unavailable right now."
+# ───────────────────────────────────────────────
+# Command handling – fixed general questions
+# ───────────────────────────────────────────────
+
+NO_DOCUMENT = "No document loaded. Say a filename or 'list documents' first."
+
+def list_documents(session, spoken, intent):
+    files = folder_index.names()
+    if not folder_index.exists:
+        return "Documents folder not found."
+    if not files:
+        return "No supported files found."
+    return f"Found: {', '.join(files)}. Say the name to open."
+
+async def load_document(session, matched):
+    path = os.path.join(folder_index.folder, matched)
+    name = os.path.splitext(matched)[0]
+    doc_type = os.path.splitext(matched)[1][1:].upper()
+    document, error = await load_shared_document(path, name, doc_type)
+    if error:
+        return error
+
+    previous = session.document
+    session.open_document(document)
+    sessions.release(previous)
+    sessions.enforce_budget()
+    loader = document.loader
+    if loader:
+        return f"Loaded {name} ({doc_type}) – first {loader.pages_ready()} of {loader.total_pages} pages ready, the rest is loading. Say read, extract abstract, extract page 3, etc."
+    words = document.word_count
+    return f"Loaded {name} ({doc_type}) – ~{words} words. Say read, extract abstract, extract page 3, etc."
+
+def load_not_found(session, spoken, intent):
+    # "open ..." without a matching file name
+    return "I couldn't find that file. Say 'list documents' to hear what's available."
+
+async def extract_part(session, spoken, intent):
+    # Wait for as much of a loading PDF as the extract reads, in the order smart_extract tries them
+    document = session.document
+    cmd = spoken.lower()
+    page_match = PAGE_RANGE.search(cmd)
+    para_match = PARAGRAPHS.search(cmd)
+    if not document:
+        pass
+    elif page_match:
+        await wait_for_text(document, page=int(page_match.group(2) or page_match.group(1)))
+    elif HEADING_REF.search(cmd) or any(name in cmd for name in SECTION_KEYWORDS):
+        await wait_for_text(document, whole=True)
+    elif para_match and para_match.group(1) == "first":
+        await wait_for_paragraphs(document, int(para_match.group(2) or 3))
+    elif para_match:
+        await wait_for_text(document, whole=True)
+    with span("smart_extract"):
+        return smart_extract(session, spoken.lower())
+
+def speak_span(session, table, span, intro="", outro=None):
+    # Speak one chunk and move the reading position to its end
+    document = session.document
+    text = session.cursor.take_prefetched(span) or document.text[span[0]:span[1]].strip()
+    session.position = span[1]
+    session.cursor.spoke(table, span, document.text)
+    session.chunks += 1
+
+    if outro is None:
+        loader = document.loader
+        if loader:
+            outro = f"\n[Loaded {loader.pages_ready()} of {loader.total_pages} pages]"
         else:
-            try:
-                short = current_document_text[:3000] + "..." if len(current_document_text) > 3000 else current_document_text
-                r = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": f"Summarize concisely:\n{short}"}],
-                    temperature=0.3,
-                    max_tokens=250
-                )
-                reply_text = "Summary:\n" + r.choices[0].message.content.strip()
-            except Exception as e:
-                print("Summary failed:", e)
-                reply_text = "Could not generate summary right now."
+            outro = f"\n[Progress: {round(span[1] / document.length * 100)}%]"
+
+    if SERVER_TTS:
+        # Render this chunk and, while it plays, the one after it; the
+        # client speaks the intro and outro around the audio
+        session.audio = tts.render(text, session.speech_rate)
+        session.audio_text = (intro.strip(), outro.strip())
+        if session.cursor.prefetched:
+            tts.render(session.cursor.prefetched[2], session.speech_rate)
+    return f"{intro}{text}{outro}"
+
+async def read_on(session, intro="", outro=None):
+    with span("reading"):
+        return await _read_on(session, intro, outro)
+
+async def _read_on(session, intro, outro):
+    document = session.document
+    # One character past the chunk, so the table can tell where it ends
+    await wait_for_text(document, length=session.position + chunk_chars(session.speech_rate) + 1)
+    table = chunk_table(document, session.speech_rate)
+    span = session.cursor.next_span(table, session.position)
+    if span is None:
+        if session.position >= document.length:
+            if document.loader:
+                return "The next part is still loading. Say continue again in a moment."
+            return f"End of {session.document_name}."
+        # Still loading and less than a chunk extracted past the position
+        span = (session.position, document.length)
+    return speak_span(session, table, span, intro, outro)
+
+async def read_document_start(session, spoken, intent):
+    if not session.document_text:
+        return NO_DOCUMENT
+    session.position = 0
+    return await read_on(session, intro=f"Reading {session.document_name}...\n", outro="\n\nSay continue, pause, stop.")
+
+async def continue_reading(session, spoken=None, intent=None, intro=""):
+    if not session.document_text:
+        return "No document loaded. Load one first."
+    return await read_on(session, intro=intro)
+
+def repeat_chunk(session, spoken, intent):
+    if not session.document_text:
+        return NO_DOCUMENT
+    if not session.cursor.last:
+        return "Nothing has been read yet. Say read to start."
+    table = chunk_table(session.document, session.speech_rate)
+    return speak_span(session, table, session.cursor.last)
+
+def previous_chunk(session, spoken, intent):
+    if not session.document_text:
+        return NO_DOCUMENT
+    table = chunk_table(session.document, session.speech_rate)
+    span = session.cursor.previous_span(table)
+    if not span:
+        return "This is the beginning of the document."
+    return speak_span(session, table, span)
+
+async def seek_percent(session, spoken, intent):
+    document = session.document
+    if not document:
+        return NO_DOCUMENT
+    percent = int(intent.slots["percent"])
+    if percent > 100:
+        return "Say a percentage between 0 and 100."
+    await wait_for_text(document, whole=True)
+    table = chunk_table(document, session.speech_rate)
+    position = session.cursor.percent_position(table, percent, document.length)
+    if position is None:
+        return f"End of {session.document_name}."
+    session.position = position
+    return await read_on(session, intro=f"{percent}%:\n")
+
+async def goto_page(session, spoken, intent):
+    document = session.document
+    if not document:
+        return NO_DOCUMENT
+    page = int(intent.slots["page"])
+    if 'pdf' in document.doc_type.lower():
+        # PDF text carries its own "[Page N]" markers
+        await wait_for_text(document, page=page)
+        offset = document.page_start(page)
+        intro = ""
+    else:
+        offset = document.approx_page_start(page)
+        intro = f"Page {page} (approximate):\n"
+    if offset is None:
+        return f"Page {page} not found."
+    session.position = offset
+    return await continue_reading(session, intro=intro)
+
+async def chapter_headings(document, kind):
+    # Chapters are the top outline level; sections are every heading
+    await wait_for_text(document, whole=True)
+    headings = document.outline.headings
+    if kind == "chapter" and headings:
+        top = min(h.level for h in headings)
+        headings = [h for h in headings if h.level == top]
+    return headings
+
+async def read_from(session, offset):
+    # Headings are read out as part of the text that starts at them
+    session.position = offset
+    return await continue_reading(session)
+
+async def goto_heading(session, spoken, intent):
+    if not session.document:
+        return NO_DOCUMENT
+    await wait_for_text(session.document, whole=True)
+    kind = intent.slots["kind"]
+    heading = session.document.outline.heading(intent.slots["number"])
+    if not heading:
+        return f"{kind.title()} {intent.slots['number']} not found."
+    return await read_from(session, heading.start)
+
+async def relative_heading(document, kind, which, current):
+    # The next, previous or current chapter/section from a reading offset
+    headings = await chapter_headings(document, kind)
+    if which in ("next", "following"):
+        return next((h for h in headings if h.start > current), None)
+    before = [h for h in headings if h.start <= current]
+    if which in ("this", "current"):
+        return before[-1] if before else None
+    return before[-2] if len(before) >= 2 else None
+
+def reading_offset(session):
+    # Headings inside the chunk just read count as already reached
+    return session.cursor.last[0] if session.cursor.last else 0
+
+async def next_heading(session, spoken, intent):
+    if not session.document:
+        return NO_DOCUMENT
+    kind = intent.slots["kind"]
+    heading = await relative_heading(session.document, kind, "next", reading_offset(session))
+    if not heading:
+        return f"No next {kind} found."
+    return await read_from(session, heading.start)
+
+async def previous_heading(session, spoken, intent):
+    if not session.document:
+        return NO_DOCUMENT
+    kind = intent.slots["kind"]
+    heading = await relative_heading(session.document, kind, "previous", reading_offset(session))
+    if not heading:
+        return f"No previous {kind} found."
+    return await read_from(session, heading.start)
+
+async def search_index(document):
+    # The document's word index, caught up with text extracted since it was built
+    await wait_for_text(document, whole=True)
+    document.search.update(document.text)
+    return document.search
+
+async def read_match(session):
+    # Read on from the sentence holding the current match
+    query, hits, words, current = session.search
+    document = session.document
+    start, _ = document.search.span(hits[current], words)
+    i = bisect_right(document.sentence_starts, start) - 1
+    session.position = document.sentence_starts[i] if i >= 0 else start
+    page = document.page_at(start) if 'pdf' in document.doc_type.lower() else None
+    where = f", page {page}" if page else ""
+    return await continue_reading(session, intro=f"Match {current + 1} of {len(hits)} for {query}{where}:\n")
+
+def match_at_reading(session, hits):
+    # First match in or after the chunk being read
+    here = session.cursor.last[0] if session.cursor.last else session.position
+    return bisect_left(hits, bisect_left(session.document.search.starts, here))
+
+async def find_text(session, spoken, intent):
+    document = session.document
+    if not document:
+        return NO_DOCUMENT
+    if document.search is None:
+        return "This file is too large to search. Say go to page 5, or jump to 40 percent, to move around it."
+    query = re.sub(r'^the (?:word|words|phrase)\s+', '', intent.slots["query"].strip(" \"'.,?!"))
+    with span("search"):
+        hits, words = (await search_index(document)).find(query)
+    if not words:
+        return "Say a word or phrase to find, like find photosynthesis."
+    if not hits:
+        return f"No matches for {query} in {session.document_name}."
+    # The first match from the chunk being read on, else the first in the document
+    current = match_at_reading(session, hits)
+    session.search = (query, hits, words, current if current < len(hits) else 0)
+    return await read_match(session)
+
+async def next_match(session, spoken, intent):
+    if not session.document_text:
+        return NO_DOCUMENT
+    if not session.search:
+        return "Nothing to find yet. Say find and a word or phrase."
+    query, hits, words, current = session.search
+    # After reading on with continue, matches already passed are skipped
+    current = max(current + 1, match_at_reading(session, hits))
+    if current >= len(hits):
+        return f"That was the last match for {query}. Say previous match to go back."
+    session.search = (query, hits, words, current)
+    return await read_match(session)
+
+async def previous_match(session, spoken, intent):
+    if not session.document_text:
+        return NO_DOCUMENT
+    if not session.search:
+        return "Nothing to find yet. Say find and a word or phrase."
+    query, hits, words, current = session.search
+    here = match_at_reading(session, hits)
+    current = here - 1 if here > current + 1 else current - 1
+    if current < 0:
+        return f"That was the first match for {query}. Say next match to go on."
+    session.search = (query, hits, words, current)
+    return await read_match(session)
+
+def pause_reading(session, spoken, intent):
+    if session.document_text:
+        return "Paused. Say continue or resume."
+    return "Nothing is playing right now."
+
+def resume_reading(session, spoken, intent):
+    if session.document_text:
+        return "Resuming... Say continue."
+    return "No document to resume. Load one first."
+
+def stop_reading(session, spoken, intent):
+    if session.document_text:
+        document = session.document
+        session.close_document()
+        sessions.release(document)
+        return "Document closed."
+    return "No document is open."
+
+def summarize_command(session, spoken, intent):
+    if not session.document_text:
+        return "No document loaded. Load one first to get a summary."
+    if not GROQ_AVAILABLE:
+        return "Summary unavailable right now."
+    if not session.document.whole_text:
+        return "This file is too large to summarize. Say read, or extract page 5, to hear parts of it."
+    # "summarize the next chapter" is resolved from where the learner is
+    relative = None
+    if "which" in intent.slots:
+        relative = (intent.slots["kind"], intent.slots["which"], reading_offset(session))
+    return summarize_reply(session.document, spoken.lower(), relative)
+
+def general_question(session, spoken):
+    if not GROQ_AVAILABLE:
+        return "I'm currently unable to answer general questions. I can still read documents, extract parts, change speed, etc."
+    system_prompt = (
+        "You are LearnOutLoud, a friendly voice assistant for visually impaired students. "
+        "Answer clearly, concisely, naturally and helpfully. Use simple language. "
+        "If the question relates to a loaded document, refer to it if relevant. "
+        "Otherwise answer normally like a helpful companion. "
+        "Keep answers suitable for voice output — short, clear, no very long lists."
+    )
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": spoken}
+    ]
+    if session.document and session.document.retrieval:
+        return grounded_reply(session.document, messages)
+    return general_reply(messages, session.document.key if session.document else "")
+
+# Intent name -> handler(session, spoken, intent); routes live in intents.COMMAND_ROUTES
+COMMANDS = {
+    "speed_reset": speed_reset,
+    "speed_set": speed_set,
+    "speed_up": speed_up,
+    "speed_down": speed_down,
+    "goto_page": goto_page,
+    "goto_heading": goto_heading,
+    "next_heading": next_heading,
+    "previous_heading": previous_heading,
+    "find": find_text,
+    "next_match": next_match,
+    "previous_match": previous_match,
+    "list": list_documents,
+    "load": load_not_found,
+    "extract": extract_part,
+    "read": read_document_start,
+    "continue": continue_reading,
+    "repeat": repeat_chunk,
+    "previous": previous_chunk,
+    "seek_percent": seek_percent,
+    "pause": pause_reading,
+    "resume": resume_reading,
+    "stop": stop_reading,
+    "summary": summarize_command,
+}
+
+router = IntentRouter(COMMAND_ROUTES)
+
+def respond(session, spoken: str):
+    # Returns the reply text, an LLMReply, or a coroutine producing either
+    spoken = spoken.strip()
+    cmd = spoken.lower()
+    print(f"→ Heard: {spoken}")
+
+    with span("routing"):
+        intent = router.route(cmd)
+
+    # A file name wins over document commands ("read biology notes"),
+    # and short utterances may be just the name
+    if intent is None or intent.priority <= LOAD_PRIORITY:
+        # Misheard names count only when the learner asked to open something,
+        # so "what is photosynthesis" is not taken for "Photosynthesis Notes"
+        opening = intent is not None and intent.name in ("load", "read")
+        matched = find_matching_file(spoken, fuzzy=opening)
+        if matched and (opening or len(spoken.split()) <= 4):
+            tag("open_file")
+            return load_document(session, matched)
 
     # ── General / common questions – always allowed, runs last ──────────
+    if intent is None:
+        tag("question")
+        return general_question(session, spoken)
+    tag(intent.name)
+    return COMMANDS[intent.name](session, spoken, intent)
+
+async def summarize_reply(document, cmd, relative=None):
+    with span("summary"):
+        return await _summarize_reply(document, cmd, relative)
+
+async def _summarize_reply(document, cmd, relative=None):
+    await wait_for_text(document, whole=True)
+
+    heading_match = re.search(r'(section|chapter)\s*(\d+(?:\.\d+)*)', cmd)
+    try:
+        if relative:
+            kind, which, current = relative
+            heading = await relative_heading(document, kind, which, current)
+            if not heading:
+                return f"No {which} {kind} found."
+            summary = await summarizer.summarize_heading(document, heading)
+            return f"Summary of {kind} {heading.number or heading.title}:\n{summary}"
+        if heading_match:
+            heading = document.outline.heading(heading_match.group(2))
+            if not heading:
+                return f"{heading_match.group(1).title()} {heading_match.group(2)} not found."
+            summary = await summarizer.summarize_heading(document, heading)
+            return f"Summary of {heading_match.group(1)} {heading.number}:\n{summary}"
+        return "Summary:\n" + await summarizer.summarize_document(document)
+    except Exception as e:
+        print("Summary failed:", repr(e))
+        return "Could not generate summary right now."
+
+def general_reply(messages, context=""):
+    return LLMReply(
+        messages=messages,
+        temperature=0.7,
+        max_tokens=400,
+        fallback="Sorry, I couldn't answer that right now. Try asking about a loaded document or say 'help'.",
+        label="General QA error:",
+        context=context
+    )
+
+async def grounded_reply(document, messages):
+    # Add the passages that best match the question; if the index is still
+    # building after RETRIEVAL_WAIT seconds, answer without them
+    builder = document.retrieval
+    with span("retrieval"):
+        if not builder.ready.is_set():
+            await asyncio.to_thread(builder.ready.wait, RETRIEVAL_WAIT)
+        hits = builder.index.search(messages[-1]["content"]) if builder.index is not None else None
+    if hits:
+        passages = "\n\n".join(f"[{i}] {text}" for i, (text, _) in enumerate(hits, 1))
+        messages = [messages[0], {
+            "role": "system",
+            "content": f"Relevant passages from the loaded document '{document.name}':\n\n{passages}"
+        }] + messages[1:]
+    return general_reply(messages, document.key)
+
+async def complete_reply(reply):
+    # reply is the text itself, an LLMReply, or a coroutine producing either
+    if inspect.isawaitable(reply):
+        reply = await reply
+    if not isinstance(reply, LLMReply):
+        return reply
+    try:
+        with span("llm"):
+            if ANSWER_CACHE and reply.context is not None:
+                return await answers.complete(reply.messages, reply.context, temperature=reply.temperature,
+                                              max_tokens=reply.max_tokens)
+            return await llm.complete(reply.messages, temperature=reply.temperature, max_tokens=reply.max_tokens)
+    except Exception as e:
+        print(reply.label, repr(e))
+        return reply.fallback
+
+async def stream_reply(reply):
+    # Sentence-sized pieces, so speech can start before the whole answer exists
+    if inspect.isawaitable(reply):
+        reply = await reply
+    if not isinstance(reply, LLMReply):
+        for piece in split_sentences(reply):
+            yield piece
+        return
+
+    sent = False
+    buffer = SentenceBuffer()
+    if ANSWER_CACHE and reply.context is not None:
+        deltas = answers.stream(reply.messages, reply.context, temperature=reply.temperature, max_tokens=reply.max_tokens)
     else:
-        if GROQ_AVAILABLE:
+        deltas = llm.stream(reply.messages, temperature=reply.temperature, max_tokens=reply.max_tokens)
+    # Until the last token, including the time the client took to read each piece
+    with span("llm"):
+        try:
+            async for delta in deltas:
+                for piece in buffer.feed(delta):
+                    sent = True
+                    yield piece
+        except Exception as e:
+            print(reply.label, repr(e))
+            if not sent:
+                buffer.flush()
+                yield reply.fallback
+                return
+    for piece in buffer.flush():
+        yield piece
+
+# ───────────────────────────────────────────────
+# Endpoints
+# ───────────────────────────────────────────────
+
+def take_audio(session):
+    # Reply fields for the chunk rendered on the server: its /audio URL and
+    # the intro and outro text the audio leaves out
+    key, session.audio = session.audio, None
+    if not key:
+        return {"audio": None}
+    intro, outro = session.audio_text
+    return {"audio": f"/audio/{key}", "intro": intro, "outro": outro}
+
+@app.post("/talk")
+async def talk(req: VoiceRequest):
+    session = sessions.get(req.session)
+    session.audio = None
+    with Trace("talk") as trace:
+        reply = await complete_reply(respond(session, req.text))
+    trace.finish(reply)
+    return {"reply": reply, "rate": round(session.speech_rate, 2), "session": session.token,
+            **take_audio(session)}
+
+@app.post("/talk/stream")
+async def talk_stream(req: VoiceRequest):
+    # Newline-delimited JSON: one {"text": ...} line per sentence, then {"done": true}.
+    # A reading chunk rendered on the server comes as a {"text", "audio"} line
+    # between text lines for its intro and outro
+    session = sessions.get(req.session)
+    session.audio = None
+    trace = Trace("talk_stream")
+    with trace:
+        reply = respond(session, req.text)
+        # Commands that wait for text finish here, so a chunk they read has
+        # its audio; an LLMReply still streams below
+        if inspect.isawaitable(reply):
+            reply = await reply
+    audio = take_audio(session)
+
+    async def lines():
+        # Runs after the endpoint returned; the trace ends with the last line
+        trace.attach()
+        try:
+            if audio["audio"]:
+                trace.chars += len(reply)
+                rate = round(session.speech_rate, 2)
+                if audio["intro"]:
+                    yield json.dumps({"text": audio["intro"], "rate": rate}, ensure_ascii=False) + "\n"
+                yield json.dumps({"text": reply, "audio": audio["audio"], "rate": rate}, ensure_ascii=False) + "\n"
+                if audio["outro"]:
+                    yield json.dumps({"text": audio["outro"], "rate": rate}, ensure_ascii=False) + "\n"
+            else:
+                async for piece in stream_reply(reply):
+                    trace.chars += len(piece)
+                    yield json.dumps({"text": piece, "rate": round(session.speech_rate, 2)}, ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True, "rate": round(session.speech_rate, 2), "session": session.token}) + "\n"
+        finally:
+            trace.finish()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# ───────────────────────────────────────────────
+# Live reading (WebSocket)
+# ───────────────────────────────────────────────
+
+# One socket per learner instead of a "continue" request per chunk. JSON messages:
+#   client: {"type": "say", "text", "epoch"}         any utterance, as on /talk
+#           {"type": "pause" | "resume" | "stop", "epoch"}
+#           {"type": "seek", "percent" | "position", "epoch"}
+#           {"type": "progress", "id", "epoch"}      chunk `id` finished playing
+#   server: {"type": "session", "session", "rate"} on connect
+#           {"type": "chunk", "id", "epoch", "text", "audio", "rate", "start", "end", "progress"}
+#             (with "intro" and "outro" to speak around the audio when there is audio)
+#           {"type": "reply", "text", "rate", "epoch"} per sentence, then {"type": "done", "epoch"}
+#           {"type": "paused" | "resumed" | "stopped" | "seeked", "epoch", "position", "text"}
+#           {"type": "end", "text", "epoch"} when reading reaches the end (or text still loading)
+# While reading, LIVE_LOOKAHEAD chunks wait behind the one playing, so the
+# next one is already on the client when a chunk ends. Every command drops
+# the queued chunks and starts a new epoch (the client's, when it sends
+# one); the client ignores messages from older epochs, so nothing queued
+# before a pause or seek plays after it.
+
+LIVE_LOOKAHEAD = int(os.getenv("LEARNOUTLOUD_LIVE_LOOKAHEAD", "1"))
+LIVE_COMMANDS = ("say", "pause", "resume", "stop", "seek")
+
+class LiveReading:
+    def __init__(self, session):
+        self.session = session
+        self.sent = deque()     # (id, start, end) of chunks sent and not yet played, oldest first
+        self.next_id = 0
+        self.epoch = 0
+        self.reading = False
+
+    def chunk(self, text):
+        session = self.session
+        start, end = session.cursor.last
+        self.sent.append((self.next_id, start, end))
+        self.next_id += 1
+        return {"type": "chunk", "id": self.next_id - 1, "epoch": self.epoch, "text": text,
+                **take_audio(session), "rate": round(session.speech_rate, 2), "start": start, "end": end,
+                "progress": round(end / session.document.length * 100) if session.document.length else 100}
+
+    async def fill(self):
+        # Read on until LIVE_LOOKAHEAD chunks are queued behind the playing one
+        messages = []
+        while self.reading and len(self.sent) <= LIVE_LOOKAHEAD:
+            session = self.session
+            if not session.document_text:
+                self.reading = False
+                break
+            session.audio = None
+            spoken = session.chunks
+            text = await read_on(session, outro="")
+            if session.chunks == spoken:
+                self.reading = False
+                messages.append({"type": "end", "text": text, "epoch": self.epoch})
+                break
+            messages.append(self.chunk(text))
+        return messages
+
+    async def played(self, chunk_id):
+        while self.sent and self.sent[0][0] <= chunk_id:
+            self.sent.popleft()
+        return await self.fill()
+
+    def halt(self, epoch=None):
+        # Drop queued chunks; reading picks up again at the start of the one that was playing
+        if self.sent and self.session.document:
+            _, start, end = self.sent[0]
+            self.session.position = start
+            self.session.cursor.last = (start, end)
+        self.sent.clear()
+        self.epoch = self.epoch + 1 if epoch is None else int(epoch)
+        self.reading = False
+
+    def ack(self, kind, text=""):
+        return {"type": kind, "epoch": self.epoch, "position": self.session.position, "text": text}
+
+async def live_seek(session, msg):
+    # Reading position for a seek message, or None
+    document = session.document
+    if "percent" in msg:
+        await wait_for_text(document, whole=True)
+        table = chunk_table(document, session.speech_rate)
+        return session.cursor.percent_position(table, min(100, max(0, float(msg["percent"]))), document.length)
+    if "position" in msg:
+        position = int(msg["position"])
+        await wait_for_text(document, length=position + 1)
+        return min(max(0, position), document.length)
+    return None
+
+async def live_say(live, websocket, text):
+    session = live.session
+    session.audio = None
+    spoken = session.chunks
+    with Trace("live") as trace:
+        reply = respond(session, text)
+        if inspect.isawaitable(reply):
+            reply = await reply
+        if trace.intent == "pause":
+            trace.finish(reply)
+            return [live.ack("paused", reply)]
+        if trace.intent == "resume" and session.document:
+            live.reading = True
+            trace.finish()
+            return [live.ack("resumed")] + await live.fill()
+        if session.chunks != spoken:
+            # The command read a chunk ("read", "chapter 2", "40 percent"): keep reading from it
+            live.reading = True
+            trace.finish(reply)
+            return [live.chunk(reply)] + await live.fill()
+
+        async for piece in stream_reply(reply):
+            trace.chars += len(piece)
+            await websocket.send_json({"type": "reply", "text": piece, "rate": round(session.speech_rate, 2),
+                                       "epoch": live.epoch})
+        trace.finish()
+    return [{"type": "done", "epoch": live.epoch, "rate": round(session.speech_rate, 2)}]
+
+async def live_message(live, websocket, msg):
+    kind = msg.get("type")
+    session = live.session
+    if kind == "progress":
+        if msg.get("epoch") != live.epoch:
+            return []
+        return await live.played(int(msg["id"]))
+    if kind not in LIVE_COMMANDS:
+        return [{"type": "error", "error": f"Unknown message type: {kind}"}]
+
+    live.halt(msg.get("epoch"))
+    if kind == "say":
+        return await live_say(live, websocket, str(msg.get("text", "")))
+    if kind == "pause":
+        return [live.ack("paused")]
+    if kind == "stop":
+        return [live.ack("stopped")]
+    if not session.document_text:
+        return [{"type": "end", "text": NO_DOCUMENT, "epoch": live.epoch}]
+    if kind == "resume":
+        live.reading = True
+        return [live.ack("resumed")] + await live.fill()
+    # seek
+    position = await live_seek(session, msg)
+    if position is None:
+        return [{"type": "error", "error": "Seek needs a percent or a position."}]
+    session.position = position
+    live.reading = True
+    return [live.ack("seeked")] + await live.fill()
+
+@app.websocket("/live")
+async def live_socket(websocket: WebSocket, session: Optional[str] = None):
+    await websocket.accept()
+    live = LiveReading(sessions.get(session))
+    await websocket.send_json({"type": "session", "session": live.session.token,
+                               "rate": round(live.session.speech_rate, 2)})
+    try:
+        while True:
             try:
-                system_prompt = (
-                    "You are LearnOutLoud, a friendly voice assistant for visually impaired students. "
-                    "Answer clearly, concisely, naturally and helpfully. Use simple language. "
-                    "If the question relates to a loaded document, refer to it if relevant. "
-                    "Otherwise answer normally like a helpful companion. "
-                    "Keep answers suitable for voice output — short, clear, no very long lists."
-                )
-                r = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": spoken}
-                    ],
-                    temperature=0.7,
-                    max_tokens=400
-                )
-                reply_text = r.choices[0].message.content.strip()
-            except Exception as e:
-                print("General QA error:", str(e))
-                reply_text = "Sorry, I couldn't answer that right now. Try asking about a loaded document or say 'help'."
-        else:
-            reply_text = "I'm currently unable to answer general questions. I can still read documents, extract parts, change speed, etc."
+                msg = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "error": "Messages are JSON objects."})
+                continue
+            # Keeps the session recently used while the learner only listens
+            session = sessions.get(live.session.token)
+            if session is not live.session:
+                # Evicted: start over on a fresh session, as /talk would
+                live = LiveReading(session)
+            ingestor.request_started()
+            try:
+                messages = await live_message(live, websocket, msg if isinstance(msg, dict) else {})
+            except (KeyError, TypeError, ValueError) as e:
+                messages = [{"type": "error", "error": f"Bad message: {e!r}"}]
+            finally:
+                ingestor.request_finished()
+            for message in messages:
+                await websocket.send_json(message)
+    except WebSocketDisconnect:
+        # The next connection resumes at the chunk that was playing
+        live.halt()
 
-    response_data["reply"] = reply_text
-    return response_data
+@app.get("/audio/{key}")
+async def audio(key: str):
+    # WAV for a reading chunk; waits if it is still being rendered
+    path = await tts.audio_path(key)
+    if not path:
+        return Response(status_code=404)
+    return FileResponse(path, media_type="audio/wav")
 
 if __name__ == "__main__":
     print("LearnOutLoud server – general questions fixed")
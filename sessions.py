@@ -0,0 +1,147 @@
+import os
+import time
+import uuid
+import threading
+import weakref
+from collections import OrderedDict
+
+from reader import ReadingCursor
+
+# Per-learner state keyed by a session token.
+# Sessions live in an LRU store with a total memory budget; when the budget
+# is exceeded the least recently used idle sessions are dropped. Identical
+# documents (same path, mtime and size) are loaded once and shared.
+
+SESSION_MEMORY_BUDGET = int(os.getenv("LEARNOUTLOUD_SESSION_MEMORY_MB", "1024")) * 1024 * 1024
+SESSION_MIN_IDLE = float(os.getenv("LEARNOUTLOUD_SESSION_MIN_IDLE", "60"))
+SESSION_OVERHEAD = 16 * 1024    # rough cost of an empty session
+
+
+class Session:
+    def __init__(self, token):
+        self.token = token
+        self.document = None      # LoadedDocument, possibly shared with other sessions
+        self.position = 0         # offset where reading continues
+        self.cursor = ReadingCursor()
+        self.audio = None         # /audio key of the chunk in the reply being built
+        self.audio_text = ("", "")  # (intro, outro) of that reply, which the audio leaves out
+        self.chunks = 0           # reading chunks spoken so far; tells callers a reply was one
+        self.search = None        # (query, hits, words per hit, current hit) of the last find
+        self.speech_rate = 1.0
+        self.last_seen = time.monotonic()
+
+    @property
+    def document_text(self):
+        return self.document.text if self.document else ""
+
+    @property
+    def document_name(self):
+        return self.document.name if self.document else ""
+
+    @property
+    def document_type(self):
+        return self.document.doc_type if self.document else ""
+
+    def open_document(self, document):
+        self.document = document
+        self.position = 0
+        self.cursor.reset()
+        self.search = None
+
+    def close_document(self):
+        self.open_document(None)
+
+
+class SessionStore:
+    def __init__(self, memory_budget=SESSION_MEMORY_BUDGET, min_idle=SESSION_MIN_IDLE):
+        self.memory_budget = memory_budget
+        self.min_idle = min_idle
+        self.evictions = 0
+        self._sessions = OrderedDict()                    # token -> Session, oldest first
+        self._documents = weakref.WeakValueDictionary()   # document key -> LoadedDocument
+        self._lock = threading.Lock()
+
+    def get(self, token=None):
+        # Unknown or evicted tokens get a fresh session under the same token
+        with self._lock:
+            if not token or len(token) > 64:
+                token = uuid.uuid4().hex
+            session = self._sessions.get(token)
+            created = session is None
+            if created:
+                session = Session(token)
+                self._sessions[token] = session
+            else:
+                self._sessions.move_to_end(token)
+            session.last_seen = time.monotonic()
+        if created:
+            self.enforce_budget()
+        return session
+
+    def shared_document(self, key):
+        return self._documents.get(key)
+
+    def share_document(self, key, document):
+        document.key = key
+        self._documents[key] = document
+        return document
+
+    def release(self, document):
+        # A progressive PDF that no session reads any more stops extracting;
+        # it is unshared, so the next open of the file starts a fresh load
+        if document is None or document.loader is None:
+            return
+        with self._lock:
+            if any(s.document is document for s in self._sessions.values()):
+                return
+            if document.key is not None and self._documents.get(document.key) is document:
+                del self._documents[document.key]
+        document.loader.cancel()
+
+    def memory_used(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        seen = set()
+        total = len(sessions) * SESSION_OVERHEAD
+        for s in sessions:
+            doc = s.document
+            if doc is not None and id(doc) not in seen:
+                seen.add(id(doc))
+                total += doc.memory_size()
+        return total
+
+    def enforce_budget(self):
+        used = self.memory_used()
+        if used <= self.memory_budget:
+            return
+
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            for token in list(self._sessions):
+                if used <= self.memory_budget:
+                    break
+                session = self._sessions[token]
+                if now - session.last_seen < self.min_idle:
+                    continue
+                del self._sessions[token]
+                self.evictions += 1
+                used -= SESSION_OVERHEAD
+                doc = session.document
+                if doc is not None and not any(s.document is doc for s in self._sessions.values()):
+                    used -= doc.memory_size()
+                    dropped.append(doc)
+        for doc in dropped:
+            self.release(doc)
+
+    def stats(self):
+        with self._lock:
+            count = len(self._sessions)
+            documents = len({id(s.document) for s in self._sessions.values() if s.document is not None})
+        return {
+            "sessions": count,
+            "documents": documents,
+            "memory_bytes": self.memory_used(),
+            "memory_budget": self.memory_budget,
+            "evictions": self.evictions
+        }
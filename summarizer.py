@@ -0,0 +1,218 @@
+import os
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+from doc_cache import CACHE_FOLDER
+from file_store import FileStore
+
+# Hierarchical map-reduce summaries over the whole document.
+# The text is split into sections (top-level headings from the outline, or
+# the whole text when there are none) and each section into paragraph-aligned
+# chunks. Chunks are summarized concurrently, chunk summaries are reduced into
+# section summaries, and section summaries into the document summary.
+# Every summary is cached by a hash of its input, so "summarize chapter 3"
+# after "summarize" reuses the chapter's summary without another LLM call.
+# Chunks grow with the document so a long book takes at most about
+# MAX_MAP_CALLS chunk summaries (up to MAX_CHUNK_CHARS per chunk); the size
+# depends only on the document, so its chapters split the same way alone.
+# The files are capped at SUMMARY_MAX_BYTES, least recently used out first.
+
+SUMMARY_FOLDER = os.path.join(CACHE_FOLDER, "summaries")
+CHUNK_CHARS = int(os.getenv("LEARNOUTLOUD_SUMMARY_CHUNK", "6000"))
+MAX_MAP_CALLS = int(os.getenv("LEARNOUTLOUD_SUMMARY_MAX_CHUNKS", "48"))
+MAX_CHUNK_CHARS = 24000
+REDUCE_CHARS = 8000
+MEMORY_ENTRIES = 2048
+SUMMARY_MAX_BYTES = int(os.getenv("LEARNOUTLOUD_SUMMARY_CACHE_MB", "32")) * 1024 * 1024
+
+CHUNK_PROMPT = "Summarize concisely:\n{text}"
+REDUCE_PROMPT = ("These are summaries of consecutive parts of one document. "
+                 "Combine them into a single concise summary suitable for listening:\n{text}")
+
+
+class SummaryCache:
+    def __init__(self, folder=SUMMARY_FOLDER, max_entries=MEMORY_ENTRIES, max_bytes=SUMMARY_MAX_BYTES):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._store = FileStore(folder, ".json", max_bytes, label="Summary cache folder",
+                                on_drop=lambda key: self._memory.pop(key, None))
+
+    @property
+    def evictions(self):
+        return self._store.evictions
+
+    def path(self, key):
+        return self._store.path(key)
+
+    def get(self, key):
+        summary = self._memory.get(key)
+        if summary is not None:
+            self._memory.move_to_end(key)
+            self._store.touch(key)
+            return summary
+        if key not in self._store:
+            return None
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as f:
+                summary = json.load(f)["summary"]
+        except (OSError, ValueError, KeyError):
+            self._store.drop(key)
+            return None
+        self._store.touch(key)
+        self._remember(key, summary)
+        return summary
+
+    def put(self, key, summary):
+        self._remember(key, summary)
+        try:
+            with open(self.path(key), "w", encoding="utf-8") as f:
+                json.dump({"summary": summary}, f, ensure_ascii=False)
+            size = os.path.getsize(self.path(key))
+        except OSError as e:
+            print("Summary cache write failed:", e)
+            return
+        self._store.add(key, size)
+
+    def stats(self):
+        return self._store.stats()
+
+    def _remember(self, key, summary):
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+async def _ready(value):
+    return value
+
+
+def split_chunks(text, limit=CHUNK_CHARS):
+    # Paragraph-aligned pieces of at most `limit` characters (longer paragraphs are cut)
+    chunks = []
+    current = ""
+    for para in text.split("\n\n"):
+        para = para.strip()
+        if not para:
+            continue
+        while len(para) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(para[:limit])
+            para = para[limit:]
+        if current and len(current) + len(para) + 2 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class Summarizer:
+    def __init__(self, llm, cache=None, chunk_chars=CHUNK_CHARS):
+        self.llm = llm
+        self.cache = cache or SummaryCache()
+        self.chunk_chars = chunk_chars
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self._pending = {}      # key -> task answering it, shared by identical requests
+        # Leave half of the LLM slots for interactive questions; queueing here
+        # does not count against the per-call timeout
+        self._slots = asyncio.Semaphore(max(1, llm.max_concurrency // 2))
+
+    def _key(self, kind, text):
+        return hashlib.sha1(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    async def _cached_completion(self, kind, prompt, text, max_tokens):
+        key = self._key(kind, text)
+        summary = self.cache.get(key)
+        if summary is not None:
+            self.cache_hits += 1
+            return summary
+
+        # Learners summarizing the same document at once share each call;
+        # shielded so one of them hanging up does not cancel it for the rest
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._complete(key, prompt, text, max_tokens))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _complete(self, key, prompt, text, max_tokens):
+        async with self._slots:
+            self.llm_calls += 1
+            summary = await self.llm.complete(
+                messages=[{"role": "user", "content": prompt.format(text=text)}],
+                temperature=0.3,
+                max_tokens=max_tokens
+            )
+        self.cache.put(key, summary)
+        return summary
+
+    async def _reduce(self, summaries):
+        # Reduce in rounds so no single prompt grows past REDUCE_CHARS
+        while len(summaries) > 1:
+            groups, current = [], []
+            for s in summaries:
+                if current and sum(len(x) for x in current) + len(s) > REDUCE_CHARS:
+                    groups.append(current)
+                    current = []
+                current.append(s)
+            groups.append(current)
+            if len(groups) == len(summaries):
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            summaries = await asyncio.gather(*(
+                self._cached_completion("reduce", REDUCE_PROMPT, "\n\n".join(g), 350) if len(g) > 1 else _ready(g[0])
+                for g in groups
+            ))
+        return summaries[0] if summaries else ""
+
+    def chunk_size(self, document):
+        # Chunk length for this document: chunk_chars, or more for a long one
+        per_call = -(-len(document.text) // MAX_MAP_CALLS)
+        return min(max(self.chunk_chars, per_call), max(self.chunk_chars, MAX_CHUNK_CHARS))
+
+    async def summarize_text(self, text, chunk_chars=None):
+        chunks = split_chunks(text, chunk_chars or self.chunk_chars)
+        if not chunks:
+            return ""
+        summaries = await asyncio.gather(*(
+            self._cached_completion("chunk", CHUNK_PROMPT, c, 250) for c in chunks
+        ))
+        return await self._reduce(list(summaries))
+
+    def sections(self, document):
+        # Top-level outline headings, plus any text before the first one
+        outline = document.outline
+        if not outline.headings:
+            return [document.text]
+        top = min(h.level for h in outline.headings)
+        heads = [h for h in outline.headings if h.level == top]
+        parts = []
+        if document.text[:heads[0].start].strip():
+            parts.append(document.text[:heads[0].start])
+        parts.extend(outline.heading_text(h) for h in heads)
+        return parts
+
+    async def summarize_document(self, document):
+        size = self.chunk_size(document)
+        section_summaries = await asyncio.gather(*(
+            self.summarize_text(s, size) for s in self.sections(document)
+        ))
+        return await self._reduce([s for s in section_summaries if s])
+
+    async def summarize_heading(self, document, heading):
+        return await self.summarize_text(document.outline.heading_text(heading), self.chunk_size(document))
+
+    def stats(self):
+        return {"llm_calls": self.llm_calls, "cache_hits": self.cache_hits, "coalesced": self.coalesced,
+                "cache": self.cache.stats()}
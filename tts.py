@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import shutil
+import asyncio
+import hashlib
+import threading
+import subprocess
+import multiprocessing
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from doc_cache import CACHE_FOLDER
+from file_store import FileStore
+
+# Offline speech synthesis for reading chunks.
+# Chunks are rendered to WAV in a background pool (pyttsx3 in worker
+# processes, since its engine is not thread-safe, or the espeak command in
+# threads) as soon as they are known: the chunk being read and the one the
+# reader prefetched after it. Files are cached on disk by (text, voice, rate)
+# with size-bounded LRU eviction and served from /audio/<key>, so by the
+# time the learner says "continue" the next chunk is usually already there.
+
+# pyttsx3 is only imported in the render workers
+PYTTSX3_AVAILABLE = importlib.util.find_spec("pyttsx3") is not None
+
+ESPEAK = shutil.which("espeak-ng") or shutil.which("espeak")
+AUDIO_FOLDER = os.path.join(CACHE_FOLDER, "audio")
+AUDIO_MAX_BYTES = int(os.getenv("LEARNOUTLOUD_AUDIO_CACHE_MB", "256")) * 1024 * 1024
+TTS_WORKERS = int(os.getenv("LEARNOUTLOUD_TTS_WORKERS", "2"))
+TTS_VOICE = os.getenv("LEARNOUTLOUD_TTS_VOICE", "en")
+BASE_WPM = 175          # words per minute at 1x
+RENDER_TIMEOUT = 60
+KEY = re.compile(r'[0-9a-f]{40}')
+
+
+def voice_for(text, default=TTS_VOICE):
+    # Same script detection the browser uses for its utterances
+    if re.search(r'[ऀ-ॿ]', text):
+        return "hi"
+    if re.search(r'[ఀ-౿]', text):
+        return "te"
+    if re.search(r'[ಀ-೿]', text):
+        return "kn"
+    return default
+
+
+_engine = None
+
+
+def _render_pyttsx3(text, voice, wpm, path):
+    # Runs in a worker process; each process keeps one engine
+    global _engine
+    if _engine is None:
+        import pyttsx3
+        _engine = pyttsx3.init()
+    _engine.setProperty("rate", wpm)
+    for v in _engine.getProperty("voices"):
+        if voice in (v.id, v.name) or any(voice == str(lang).strip("\x05") for lang in v.languages or []):
+            _engine.setProperty("voice", v.id)
+            break
+    _engine.save_to_file(text, path)
+    _engine.runAndWait()
+    return path
+
+
+def _render_espeak(text, voice, wpm, path):
+    subprocess.run([ESPEAK, "-v", voice, "-s", str(wpm), "-w", path, "--stdin"],
+                   input=text.encode("utf-8"), check=True, timeout=RENDER_TIMEOUT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return path
+
+
+class AudioCache:
+    def __init__(self, folder=AUDIO_FOLDER, max_bytes=AUDIO_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._store = FileStore(folder, ".wav", max_bytes, label="Audio cache")
+
+    @property
+    def evictions(self):
+        return self._store.evictions
+
+    def path(self, key):
+        return self._store.path(key)
+
+    def get(self, key):
+        return self.path(key) if self._store.touch(key) else None
+
+    def put(self, key, rendered):
+        try:
+            os.replace(rendered, self.path(key))
+            size = os.path.getsize(self.path(key))
+        except OSError as e:
+            print("Audio cache write failed:", e)
+            return
+        self._store.add(key, size)
+
+    def stats(self):
+        return self._store.stats()
+
+
+class Synthesizer:
+    def __init__(self, cache=None, workers=TTS_WORKERS):
+        self.workers = workers
+        self.rendered = 0
+        self.failures = 0
+        self.ready_hits = 0      # /audio requests answered without waiting
+        self.waited = 0          # /audio requests that waited for a render
+        self._pending = {}       # key -> concurrent Future
+        self._lock = threading.Lock()
+        self._pool = None
+        if PYTTSX3_AVAILABLE:
+            self.backend = "pyttsx3"
+        elif ESPEAK:
+            self.backend = "espeak"
+        else:
+            self.backend = None
+        self.cache = (cache or AudioCache()) if self.backend else None
+
+    @property
+    def available(self):
+        return self.backend is not None
+
+    def key_for(self, text, voice, rate):
+        raw = json.dumps([text, voice, round(rate, 1)], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _get_pool(self):
+        # Called with self._lock held. pyttsx3 workers are spawned, not forked
+        # from a threaded server
+        if self._pool is None:
+            if self.backend == "pyttsx3":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tts")
+        return self._pool
+
+    def render(self, text, rate=1.0):
+        # Key of the audio for text at this rate; rendering starts in the
+        # background unless it is cached or already under way
+        text = text.strip()
+        voice = voice_for(text)
+        key = self.key_for(text, voice, rate)
+        if not text or self.cache.get(key):
+            return key
+
+        with self._lock:
+            if key in self._pending:
+                return key
+            tmp = os.path.join(self.cache.folder, f"{key}.{os.getpid()}.tmp.wav")
+            render = _render_pyttsx3 if self.backend == "pyttsx3" else _render_espeak
+            future = self._get_pool().submit(render, text, voice, int(BASE_WPM * rate), tmp)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._finished(key, tmp, f))
+        return key
+
+    def _finished(self, key, tmp, future):
+        try:
+            future.result()
+            self.cache.put(key, tmp)
+            self.rendered += 1
+        except Exception as e:
+            self.failures += 1
+            print("Speech synthesis failed:", repr(e))
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    async def audio_path(self, key, timeout=RENDER_TIMEOUT):
+        # Path of the rendered audio, waiting for a render in progress
+        if not self.available or not KEY.fullmatch(key):
+            return None
+        path = self.cache.get(key)
+        if path:
+            self.ready_hits += 1
+            return path
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None:
+            return None
+        self.waited += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except Exception:
+            return None
+        # _finished was registered first, so the file is already in the cache
+        return self.cache.get(key)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "backend": self.backend,
+            "pending": pending,
+            "rendered": self.rendered,
+            "failures": self.failures,
+            "ready_hits": self.ready_hits,
+            "waited": self.waited,
+            "cache": self.cache.stats() if self.cache else None
+        }